@@ -1,14 +1,21 @@
+// Prints the index of a buzzer once when it is pressed.
+// Must match SERIAL_BAUD / --serial-baud in jeopardy.py.
+const long BAUD = 115200;
+
+bool pressed[4];
+
 void setup() {
-  Serial.begin(9600);
+  Serial.begin(BAUD);
 }
 
 void loop() {
-  float voltages[4];
   for (int i = 0; i < 4; i++) {
     int sensorValue = analogRead(A0 + i); 
     float value = sensorValue * (5.0 / 1023.0);
-    if(value >= 2.5) {
+    bool down = value >= 2.5;
+    if(down && !pressed[i]) {
       Serial.println(i);
     }
+    pressed[i] = down;
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,247 @@
+"""Repeatable latency/throughput benchmark for the jeopardy.py buzzer client.
+
+Starts buzzer_server.py with simulated teams and a state-snapshot flood, runs
+the real client (BuzzerClient, frame dispatch, board and question window)
+against it on an offscreen Qt platform and plays a number of question rounds.
+Reports buzz-to-highlight latency, message throughput and CPU use.
+
+    python buzzer_bench.py --rounds 50 --teams 24 --state-rate 200
+
+With --replay, a recorded session (jeopardy.py --record-session) is played
+through the client instead, as fast as it takes it unless --speed is given:
+
+    python buzzer_bench.py --replay show.jbuz
+"""
+import argparse
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+import jeopardy
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"buzzer_server.py did not start on port {port}")
+
+
+def wait_until(condition, timeout):
+    deadline = time.perf_counter() + timeout
+    loop = QEventLoop()
+    while not condition():
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+        QTimer.singleShot(min(5, int(remaining * 1000) + 1), loop.quit)
+        loop.exec()
+    return True
+
+
+def make_questions(root, categories, per_category):
+    for c in range(categories):
+        category = os.path.join(root, f"Category {c + 1}")
+        os.makedirs(category)
+        for p in range(1, per_category + 1):
+            with open(os.path.join(category, f"{p * 100}.txt"), "w") as f:
+                f.write(f"Question {c + 1}/{p * 100}")
+
+
+def percentile(samples, q):
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the jeopardy.py buzzer client against buzzer_server.py")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--reaction-ms", type=float, default=150)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--state-rate", type=float, default=100, help="Background state snapshots per second")
+    parser.add_argument("--churn-rate", type=float, default=0, help="Background team renames per second")
+    parser.add_argument("--replay", help="Play this recorded session instead of running buzzer_server.py")
+    parser.add_argument("--speed", type=float, default=0, help="Replay speed factor, 0 for as fast as possible")
+    parser.add_argument("--output", help="Append the report to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="jeopardy-bench-")
+    questions = os.path.join(workdir, "questions")
+    make_questions(questions, 6, 5)
+    if args.replay:
+        args.replay = os.path.abspath(args.replay)
+        os.chdir(workdir)
+        finish(args, replay(args, questions))
+        return
+    port = free_port()
+    server = subprocess.Popen([
+        sys.executable, os.path.join(HERE, "buzzer_server.py"), "--port", str(port), "--teams", str(args.teams),
+        "--reaction-ms", str(args.reaction_ms), "--jitter-ms", str(args.jitter_ms), "--buzz-probability", "1",
+        "--state-rate", str(args.state_rate), "--churn-rate", str(args.churn_rate), "--timestamps",
+    ], stdout=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        os.chdir(workdir)
+        report = run(args, port, questions)
+    finally:
+        server.terminate()
+        server.wait()
+    finish(args, report)
+
+
+def finish(args, report):
+    print(report)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(report + "\n")
+
+
+def run(args, port, questions):
+    app = QApplication([])
+    jeopardy.BUZZER_URL = f"ws://127.0.0.1:{port}"
+    jeopardy.question_dir = questions
+    jeopardy.create_rooms([jeopardy.INSTANCE])
+    room = jeopardy.rooms[0]
+    jeopardy.open_journal()
+    jeopardy.open_catalog()
+    jeopardy.preload_question_assets()
+
+    frames = {"received": 0, "teams": 0}
+    winner_sent_at = []
+
+    # the server stamps frames with its monotonic clock; perf_counter is comparable on the same host
+    dispatch = room.dispatch_frame
+    last_winner = [None]
+
+    def counting_dispatch(kind, data, received_at):
+        frames["received"] += 1
+        stream_val = data.get("streamVal")
+        if kind == "StreamServerState" and isinstance(stream_val, dict) and "lastWinner" in stream_val:
+            # flood snapshots keep repeating the previous round's winner until the
+            # server sees the re-arm, so only time the frame that changes it
+            winner = stream_val["lastWinner"]
+            if winner and winner != last_winner[0] and not winner_sent_at:
+                winner_sent_at.append(data.get("sentAt", received_at))
+            last_winner[0] = winner
+        dispatch(kind, data, received_at)
+
+    # before the room subscribes, so its streams are routed through the counter
+    room.dispatch_frame = counting_dispatch
+    room.events.teams_updated.connect(lambda _: frames.__setitem__("teams", frames["teams"] + 1))
+
+    jeopardy.start_buzzer_connection()
+    room.show()
+    if not wait_until(lambda: room.teams_initialized, 10):
+        raise RuntimeError("no teams received from buzzer_server.py")
+
+    question_window = room.main_window.question_window
+    highlighted = []
+    on_buzz = question_window.on_buzz
+
+    def timed_on_buzz(team_index):
+        buzzed = on_buzz(team_index)
+        if buzzed:
+            highlighted.append(time.perf_counter())
+        return buzzed
+
+    question_window.on_buzz = timed_on_buzz
+
+    tiles = [(category, score) for category in jeopardy.categories for score in sorted(jeopardy.question_file[category])]
+    latencies = []
+    missed = 0
+    usage_start = resource.getrusage(resource.RUSAGE_SELF)
+    frames_start = dict(frames)
+    wall_start = time.perf_counter()
+    for i in range(args.rounds):
+        category, score = tiles[i % len(tiles)]
+        winner_sent_at.clear()
+        highlighted.clear()
+        room.select_point(category, score)
+        timeout = (args.reaction_ms + 4 * args.jitter_ms) / 1000 + 2
+        if wait_until(lambda: highlighted and winner_sent_at, timeout):
+            latencies.append((highlighted[0] - winner_sent_at[0]) * 1000)
+        else:
+            missed += 1
+        question_window.nobody_points(category, score)
+        # let the disable request go out before the next round arms the buzzers again
+        wait_until(lambda: False, 0.02)
+    wall = time.perf_counter() - wall_start
+    usage_end = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (usage_end.ru_utime - usage_start.ru_utime) + (usage_end.ru_stime - usage_start.ru_stime)
+    received = frames["received"] - frames_start["received"]
+    teams_handled = frames["teams"] - frames_start["teams"]
+    app.quit()
+
+    lines = [
+        f"buzzer_bench: {args.rounds} rounds, {args.teams} teams, state flood {args.state_rate}/s, churn {args.churn_rate}/s",
+        f"  buzz-to-highlight latency (server send -> highlighted): "
+        f"p50 {percentile(latencies, 0.5):.2f} ms, p90 {percentile(latencies, 0.9):.2f} ms, "
+        f"p99 {percentile(latencies, 0.99):.2f} ms, max {max(latencies, default=float('nan')):.2f} ms, missed {missed}",
+        f"  throughput: {received / wall:.0f} frames/s received, {teams_handled / wall:.0f} changed team snapshots/s handled",
+        f"  {room.frame_buffer.summary()}",
+        f"  client CPU: {cpu:.2f} s over {wall:.2f} s wall ({100 * cpu / wall:.1f}%)",
+        f"  points sync: sent {room.points_sync.sent}, saved {room.points_sync.saved}",
+    ]
+    lines.extend(f"  {line}" for line in jeopardy.metrics.summary().splitlines())
+    return "\n".join(lines)
+
+
+def replay(args, questions):
+    app = QApplication([])
+    jeopardy.question_dir = questions
+    jeopardy.REPLAY_SESSION = args.replay
+    jeopardy.REPLAY_SPEED = args.speed
+    jeopardy.create_rooms([jeopardy.INSTANCE])
+    room = jeopardy.rooms[0]
+    jeopardy.open_journal()
+    jeopardy.open_catalog()
+    jeopardy.preload_question_assets()
+    room.show()
+    usage_start = resource.getrusage(resource.RUSAGE_SELF)
+    wall_start = time.perf_counter()
+    jeopardy.start_buzzer_connection()
+    client = jeopardy.pool.client
+    wait_until(client.finished.is_set, 24 * 3600)
+    # let the Qt thread drain what the replay handed over last
+    wait_until(lambda: False, 0.05)
+    wall = time.perf_counter() - wall_start
+    usage_end = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (usage_end.ru_utime - usage_start.ru_utime) + (usage_end.ru_stime - usage_start.ru_stime)
+    app.quit()
+
+    lines = [
+        f"buzzer_bench: replay of {args.replay} " + (f"at {args.speed}x" if args.speed else "as fast as possible"),
+        f"  throughput: {client.replayed} frames in {wall:.2f} s, {client.replayed / wall:.0f} frames/s",
+        f"  {room.frame_buffer.summary()}",
+        f"  client CPU: {cpu:.2f} s over {wall:.2f} s wall ({100 * cpu / wall:.1f}%)",
+    ]
+    lines.extend(f"  {line}" for line in jeopardy.metrics.summary().splitlines())
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    main()
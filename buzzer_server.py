@@ -0,0 +1,263 @@
+"""Local stand-in for the buzzer server.
+
+Speaks the part of the protocol jeopardy.py uses: StreamServerState,
+StreamSettings, StreamBuzzFeed, SetPoints, SetTeamName and SetBuzzersEnabled, answering
+with streamVal frames carrying teams, lastWinner, settings and the buzz feed.
+A built-in load generator simulates teams buzzing with configurable reaction
+times, jitter and roster churn, so the client can be rehearsed and benchmarked
+without the real server.
+
+    python buzzer_server.py --port 8765 --teams 12 --reaction-ms 250 --jitter-ms 80
+    python jeopardy.py --buzzer-url ws://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+STREAM_KINDS = ("StreamServerState", "StreamSettings", "StreamBuzzFeed")
+
+
+def server_time_ms():
+    return time.time() * 1000
+
+
+class Instance:
+    """State of one buzzer instance and the connections streaming it."""
+
+    def __init__(self, name, team_count):
+        self.name = name
+        self.teams = [
+            {"uuid": str(uuid.uuid4()), "name": f"Team {i + 1}", "score": 0, "isLobby": False}
+            for i in range(team_count)
+        ]
+        self.buzzers_enabled = False
+        self.last_winner = None
+        self.enabled_at = None
+        self.buzzes = []
+        self.round = 0
+        self.subscribers = {kind: [] for kind in STREAM_KINDS}  # kind -> [(websocket, request id)]
+
+    def state(self):
+        return {"teams": self.teams, "lastWinner": self.last_winner}
+
+    def settings(self):
+        return {"buzzersEnabled": self.buzzers_enabled}
+
+    def feed(self):
+        return {"buzzFeed": {"round": self.round, "enabledAt": self.enabled_at, "buzzes": self.buzzes}}
+
+    def team(self, team_uuid):
+        return next((team for team in self.teams if team["uuid"] == team_uuid), None)
+
+
+class BuzzerServer:
+    def __init__(self, team_count=4, timestamps=False):
+        self.team_count = team_count
+        self.timestamps = timestamps
+        self.instances = {}
+        self.on_arm = []  # callbacks(instance) run whenever buzzers get enabled
+        self.frames_sent = 0
+
+    def instance(self, name):
+        if name not in self.instances:
+            self.instances[name] = Instance(name, self.team_count)
+        return self.instances[name]
+
+    def instance_for_session(self, session):
+        # admin sessions are not checked; a session named like an instance controls
+        # that instance (jeopardy.py --room a:a --room b:b), any other the first one
+        if session in self.instances:
+            return self.instances[session]
+        if not self.instances:
+            return self.instance("test")
+        return next(iter(self.instances.values()))
+
+    async def send(self, websocket, frame):
+        if self.timestamps:
+            frame["sentAt"] = time.perf_counter()
+        try:
+            await websocket.send(json.dumps(frame))
+            self.frames_sent += 1
+        except ConnectionClosed:
+            pass
+
+    async def publish(self, instance, kind):
+        value = {"StreamServerState": instance.state, "StreamSettings": instance.settings, "StreamBuzzFeed": instance.feed}[kind]()
+        for websocket, request_id in list(instance.subscribers[kind]):
+            await self.send(websocket, {"id": request_id, "streamVal": value})
+
+    async def handler(self, websocket):
+        try:
+            async for message in websocket:
+                try:
+                    request = json.loads(message)
+                    await self.handle(websocket, request["id"], request["payload"])
+                except (ValueError, KeyError, TypeError) as e:
+                    await self.send(websocket, {"id": None, "error": f"bad request: {e}"})
+        except ConnectionClosed:
+            pass
+        finally:
+            for instance in self.instances.values():
+                for kind in STREAM_KINDS:
+                    instance.subscribers[kind] = [s for s in instance.subscribers[kind] if s[0] is not websocket]
+
+    async def handle(self, websocket, request_id, payload):
+        kind = payload["kind"]
+        if kind in STREAM_KINDS:
+            instance = self.instance(payload["instance"])
+            instance.subscribers[kind].append((websocket, request_id))
+            value = {"StreamServerState": instance.state, "StreamSettings": instance.settings, "StreamBuzzFeed": instance.feed}[kind]()
+            await self.send(websocket, {"id": request_id, "streamVal": value})
+        elif kind == "SetPoints":
+            instance = self.instance_for_session(payload["session"])
+            team = instance.team(payload["teamId"])
+            if team is None:
+                await self.send(websocket, {"id": request_id, "error": "unknown team"})
+                return
+            team["score"] = payload["points"]
+            await self.send(websocket, {"id": request_id, "ok": True})
+            await self.publish(instance, "StreamServerState")
+        elif kind == "SetTeamName":
+            instance = self.instance_for_session(payload["session"])
+            team = instance.team(payload["teamId"])
+            if team is None:
+                await self.send(websocket, {"id": request_id, "error": "unknown team"})
+                return
+            team["name"] = payload["name"]
+            await self.send(websocket, {"id": request_id, "ok": True})
+            await self.publish(instance, "StreamServerState")
+        elif kind == "SetBuzzersEnabled":
+            instance = self.instance_for_session(payload["session"])
+            await self.send(websocket, {"id": request_id, "ok": True})
+            await self.set_enabled(instance, payload["enabled"])
+        elif kind == "Buzz":
+            instance = self.instance(payload["instance"])
+            await self.send(websocket, {"id": request_id, "ok": True})
+            await self.buzz(instance, payload["teamId"])
+        else:
+            await self.send(websocket, {"id": request_id, "error": f"unknown request kind {kind}"})
+
+    async def set_enabled(self, instance, enabled):
+        instance.buzzers_enabled = enabled
+        if enabled:
+            instance.round += 1
+            instance.last_winner = None
+            instance.buzzes = []
+            instance.enabled_at = server_time_ms()
+        await self.publish(instance, "StreamSettings")
+        await self.publish(instance, "StreamServerState")
+        await self.publish(instance, "StreamBuzzFeed")
+        if enabled:
+            for callback in self.on_arm:
+                callback(instance)
+
+    async def buzz(self, instance, team_uuid):
+        if not instance.buzzers_enabled or instance.team(team_uuid) is None:
+            return
+        if any(b["uuid"] == team_uuid for b in instance.buzzes):
+            return
+        instance.buzzes.append({"uuid": team_uuid, "at": server_time_ms()})
+        if instance.last_winner is None:
+            instance.last_winner = team_uuid
+            await self.publish(instance, "StreamServerState")
+        await self.publish(instance, "StreamBuzzFeed")
+
+
+class LoadGenerator:
+    """Simulated teams: every time buzzers are armed, each team buzzes with
+    probability buzz_probability after a reaction time drawn from
+    N(reaction_ms, jitter_ms). Optionally floods state snapshots and renames
+    teams to exercise the client's roster handling."""
+
+    def __init__(self, server, reaction_ms=250, jitter_ms=80, buzz_probability=0.8, state_rate=0.0, churn_rate=0.0, auto_round_s=0.0):
+        self.server = server
+        self.reaction_ms = reaction_ms
+        self.jitter_ms = jitter_ms
+        self.buzz_probability = buzz_probability
+        self.state_rate = state_rate
+        self.churn_rate = churn_rate
+        self.auto_round_s = auto_round_s
+        server.on_arm.append(self.schedule_buzzes)
+
+    def schedule_buzzes(self, instance):
+        round_number = instance.round
+        for team in instance.teams:
+            if team["isLobby"] or random.random() > self.buzz_probability:
+                continue
+            delay = max(0.0, random.gauss(self.reaction_ms, self.jitter_ms)) / 1000
+            asyncio.get_running_loop().call_later(delay, self._buzz, instance, team["uuid"], round_number)
+
+    def _buzz(self, instance, team_uuid, round_number):
+        if instance.round == round_number:
+            asyncio.ensure_future(self.server.buzz(instance, team_uuid))
+
+    async def run(self):
+        tasks = []
+        if self.state_rate > 0:
+            tasks.append(self._every(1 / self.state_rate, self._publish_states))
+        if self.churn_rate > 0:
+            tasks.append(self._every(1 / self.churn_rate, self._churn))
+        if self.auto_round_s > 0:
+            tasks.append(self._every(self.auto_round_s, self._auto_round))
+        await asyncio.gather(*tasks)
+
+    async def _every(self, interval, action):
+        while True:
+            await asyncio.sleep(interval)
+            await action()
+
+    async def _publish_states(self):
+        for instance in list(self.server.instances.values()):
+            await self.server.publish(instance, "StreamServerState")
+
+    async def _churn(self):
+        for instance in list(self.server.instances.values()):
+            team = random.choice(instance.teams)
+            if random.random() < 0.25:
+                team["isLobby"] = not team["isLobby"]
+            else:
+                team["name"] = f"Team {random.randint(1, 999)}"
+            await self.server.publish(instance, "StreamServerState")
+
+    async def _auto_round(self):
+        for instance in list(self.server.instances.values()):
+            await self.server.set_enabled(instance, True)
+
+
+async def serve_forever(host, port, server, generator):
+    async with serve(server.handler, host, port):
+        print(f"Buzzer stand-in listening on ws://{host}:{port}", flush=True)
+        await generator.run()
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in buzzer server with load generator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--teams", type=int, default=4, help="Teams per instance")
+    parser.add_argument("--reaction-ms", type=float, default=250, help="Mean simulated reaction time")
+    parser.add_argument("--jitter-ms", type=float, default=80, help="Standard deviation of the reaction time")
+    parser.add_argument("--buzz-probability", type=float, default=0.8, help="Chance that a team buzzes in a round")
+    parser.add_argument("--state-rate", type=float, default=0.0, help="Extra state snapshots per second")
+    parser.add_argument("--churn-rate", type=float, default=0.0, help="Team renames and lobby moves per second")
+    parser.add_argument("--auto-round", type=float, default=0.0, help="Arm the buzzers every N seconds without a client")
+    parser.add_argument("--timestamps", action="store_true", help="Add a monotonic sentAt to every frame (for buzzer_bench.py)")
+    args = parser.parse_args()
+
+    server = BuzzerServer(args.teams, args.timestamps)
+    generator = LoadGenerator(server, args.reaction_ms, args.jitter_ms, args.buzz_probability, args.state_rate, args.churn_rate, args.auto_round)
+    try:
+        asyncio.run(serve_forever(args.host, args.port, server, generator))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Operational commands that need neither Qt nor the buzzer server.
+
+jeopardy.py hands these subcommands over before it imports Qt, so they start
+in a few tens of milliseconds and never open a window or a socket:
+
+    python jeopardy.py export --format csv --output scores.csv
+    python jeopardy.py validate questions
+    python jeopardy.py reset --room room-b --keep-teams --yes
+    python jeopardy.py pack-check board.jpack --source questions
+
+Games are read from the journal jeopardy.py writes (game.db); with several
+rooms each has its own namespace, named after its buzzer instance.
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from game_engine import GameEngine, journal_namespaces
+from question_pack import check_pack, parse_question_filename, question_kind
+
+JOURNAL = "game.db"
+SIGNATURES = {  # what jeopardy.py can show or play, by file signature
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+    ".gif": (b"GIF87a", b"GIF89a"),
+    ".bmp": (b"BM",),
+    ".webp": (b"RIFF",),
+    ".mp3": (b"ID3", b"\xff"),
+    ".aac": (b"\xff",),
+    ".wav": (b"RIFF",),
+    ".avi": (b"RIFF",),
+    ".ogg": (b"OggS",),
+    ".oga": (b"OggS",),
+    ".opus": (b"OggS",),
+    ".flac": (b"fLaC",),
+    ".webm": (b"\x1a\x45\xdf\xa3",),
+    ".mkv": (b"\x1a\x45\xdf\xa3",),
+}
+ISO_MEDIA_SUFFIXES = (".mp4", ".m4v", ".mov", ".m4a")  # "ftyp" at byte 4
+
+
+def room_label(namespace):
+    return namespace or "(default)"
+
+
+def open_game(path, namespace):
+    engine = GameEngine()
+    engine.open(path, migrate=False, verbose=False, namespace=namespace, readonly=True)
+    return engine
+
+
+def pick_namespaces(path, room):
+    if not os.path.exists(path):
+        raise SystemExit(f"{path}: no such journal")
+    namespaces = journal_namespaces(path)
+    if room is None:
+        return namespaces
+    if room not in namespaces:
+        raise SystemExit(f"{path}: no room {room!r}, it has {', '.join(map(room_label, namespaces)) or 'none'}")
+    return [room]
+
+
+def game_report(engine):
+    teams = [
+        {"team": team, "name": data["name"], "score": engine.totals.get(team, 0), "present": not data.get("away", False)}
+        for team, data in sorted(engine.teams.items(), key=lambda item: int(item[0].replace("team", "")))
+    ]
+    tiles = []
+    for category, scores in sorted(engine.point_dict.items()):
+        for score in sorted(scores):
+            winner, losers = engine.tile_result(category, score)
+            tiles.append({
+                "category": category, "points": score,
+                "winner": winner[0] if winner else None, "awarded": winner[1] if winner else 0,
+                "wrong": losers, "answered": engine.is_answered(category, score),
+            })
+    return {"teams": teams, "tiles": tiles, "events": engine.journal.seq}
+
+
+def export(path, room=None, fmt="text", output=None):
+    reports = {}
+    for namespace in pick_namespaces(path, room):
+        engine = open_game(path, namespace)
+        reports[namespace] = game_report(engine)
+        engine.close()
+    out = open(output, "w", newline="") if output else sys.stdout
+    try:
+        if fmt == "json":
+            json.dump(reports, out, indent=2, ensure_ascii=False)
+            out.write("\n")
+        elif fmt == "csv":
+            writer = csv.writer(out)
+            writer.writerow(["room", "team", "name", "score", "present"])
+            for namespace, report in reports.items():
+                for team in report["teams"]:
+                    writer.writerow([namespace, team["team"], team["name"], team["score"], int(team["present"])])
+        else:
+            for namespace, report in reports.items():
+                answered = sum(tile["answered"] for tile in report["tiles"])
+                out.write(f"{room_label(namespace)}: {answered} tiles answered, {report['events']} journal events\n")
+                for rank, team in enumerate(sorted(report["teams"], key=lambda t: -t["score"]), 1):
+                    away = "" if team["present"] else "  (left)"
+                    out.write(f"  {rank:>2}. {team['name']:<30} {team['score']:>7}{away}\n")
+    finally:
+        if output:
+            out.close()
+
+
+def check_question_file(category, entry):
+    """Problems with one question file, judged without decoding images or media."""
+    name = entry.name
+    suffix = os.path.splitext(name)[1].lower()
+    kind = question_kind(name)
+    with open(entry.path, "rb") as f:
+        head = f.read(16) if kind != "text" else f.read()
+    if not head:
+        return [f"{category}/{name}: empty file"]
+    if kind == "text":
+        try:
+            head.decode("utf-8")
+        except UnicodeDecodeError as e:
+            return [f"{category}/{name}: not UTF-8 text ({e.reason} at byte {e.start})"]
+        return []
+    if suffix in ISO_MEDIA_SUFFIXES:
+        matches = head[4:8] == b"ftyp"
+    elif suffix in SIGNATURES:
+        matches = head.startswith(SIGNATURES[suffix])
+    else:
+        return [f"{category}/{name}: unknown question type {suffix or '(no extension)'}"]
+    if not matches:
+        return [f"{category}/{name}: contents do not match the {suffix} extension"]
+    return []
+
+
+def validate(root):
+    """Check a question directory the way jeopardy.py reads it. Returns the problems."""
+    if not os.path.isdir(root):
+        raise SystemExit(f"{root}: not a directory")
+    problems = []
+    questions = 0
+    categories = 0
+    with os.scandir(root) as entries:
+        for category_entry in sorted(entries, key=lambda e: e.name):
+            if category_entry.name.startswith(".") or not category_entry.is_dir():
+                continue
+            categories += 1
+            category = category_entry.name
+            seen = {}  # points -> filename
+            with os.scandir(category_entry.path) as files:
+                for entry in sorted(files, key=lambda e: e.name):
+                    if not entry.is_file():
+                        continue
+                    points = parse_question_filename(entry.name)
+                    if points is None:
+                        if "disabled" not in entry.name and not entry.name.startswith("."):
+                            problems.append(f"{category}/{entry.name}: ignored, name is not <points>.<ext>")
+                        continue
+                    if points in seen:
+                        problems.append(f"{category}/{entry.name}: same points as {seen[points]}, only one of them is shown")
+                    seen[points] = entry.name
+                    problems += check_question_file(category, entry)
+            if not [points for points in seen if points != 0]:
+                problems.append(f"{category}: no questions")
+            questions += len(seen)
+    for problem in problems:
+        print(problem)
+    print(f"{root}: {questions} questions in {categories} categories, {len(problems)} problems")
+    return problems
+
+
+def pick_room(path, room):
+    namespaces = pick_namespaces(path, room)
+    if not namespaces:
+        raise SystemExit(f"{path}: no game to reset")
+    if len(namespaces) > 1:
+        raise SystemExit(f"{path} has several rooms, name one with --room: {', '.join(map(room_label, namespaces))}")
+    return namespaces[0]
+
+
+def reset(path, namespace, keep_teams=False):
+    backup = f"{path}.{time.strftime('%Y%m%d-%H%M%S')}.bak"
+    source = sqlite3.connect(path)
+    target = sqlite3.connect(backup)
+    with target:
+        source.backup(target)
+    target.close()
+    source.close()
+    engine = GameEngine()
+    engine.open(path, migrate=False, verbose=False, namespace=namespace)
+    roster = None
+    if keep_teams:
+        roster = {team: dict(data, score=0) for team, data in engine.teams.items() if not data.get("away")}
+    engine.reset(roster)
+    engine.close()
+    print(f"Reset {room_label(namespace)} in {path}" + (f", kept {len(roster)} teams" if keep_teams else "") + f"; the old journal is in {backup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jeopardy maintenance commands (no Qt, no buzzer server)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Scores of every room (or one) from the game journal")
+    export_parser.add_argument("--journal", default=JOURNAL)
+    export_parser.add_argument("--room", help="Only this room (its buzzer instance)")
+    export_parser.add_argument("--format", choices=["text", "csv", "json"], default="text", help="json includes every tile's result")
+    export_parser.add_argument("--output", help="Write here instead of to stdout")
+    validate_parser = commands.add_parser("validate", help="Check a question directory for files the game would skip or fail on")
+    validate_parser.add_argument("question_dir", nargs="?", default=os.getenv("QUESTION_DIR", "questions"))
+    reset_parser = commands.add_parser("reset", help="Start a room's game over, keeping a backup of the journal")
+    reset_parser.add_argument("--journal", default=JOURNAL)
+    reset_parser.add_argument("--room", help="Room to reset, needed when the journal has several")
+    reset_parser.add_argument("--keep-teams", action="store_true", help="Keep the teams still in the game, with zero points")
+    reset_parser.add_argument("--yes", action="store_true", help="Do it; without this only says what would be reset")
+    pack_parser = commands.add_parser("pack-check", help="Verify a compiled question pack (see question_pack.py)")
+    pack_parser.add_argument("pack")
+    pack_parser.add_argument("--source", help="Question directory the pack should match")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            export(args.journal, args.room, args.format, args.output)
+        elif args.command == "validate":
+            return 1 if validate(args.question_dir) else 0
+        elif args.command == "reset":
+            namespace = pick_room(args.journal, args.room)
+            if not args.yes:
+                print(f"Would reset {room_label(namespace)} in {args.journal}; add --yes to do it")
+                return 1
+            reset(args.journal, namespace, args.keep_teams)
+        else:
+            if not os.path.exists(args.pack):
+                raise SystemExit(f"{args.pack}: no such pack")
+            return 1 if check_pack(args.pack, args.source) else 0
+    except BrokenPipeError:
+        return 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,911 @@
+"""Scoring, board and roster state of a Jeopardy game, without any Qt.
+
+GameEngine owns the teams, the answered tiles, the running score totals and
+the SQLite journal they are persisted in. Every change is written to the
+journal and reported to subscribers (the Qt board in jeopardy.py, or nothing
+at all when simulating):
+
+    "teams"  ()                the roster was replaced
+    "join"   (team)            a team was added, or came back after leaving
+    "leave"  (team)            a team left; its points stay on the board
+    "rename" (team, name)
+    "score"  (team, total)     a team's total changed
+    "tile"   (category, score) a tile was answered, re-answered or undone
+
+Scoring actions form a timeline: undo_action() and redo_action() step along
+it and goto() jumps to any earlier action. A single step changes the board
+as it is, by the one event; longer jumps rebuild it from the nearest
+checkpoint, not from the start of the game. Only the tiles and totals that
+differ are reported. Roster changes stay as they are.
+
+Run on its own it plays random full games as fast as it can, to load-test
+scoring and persistence without a display:
+
+    python game_engine.py --simulate 5000 --teams 8 --categories 6
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import pathlib
+import random
+import shelve
+import sqlite3
+import time
+
+import metrics
+
+log = logging.getLogger("game_engine")
+
+journal_append_time = metrics.timer("journal_append", "Writing one game event to the SQLite journal")
+journal_snapshot_time = metrics.timer("journal_snapshot", "Writing a full state snapshot to the journal")
+score_rebuild_time = metrics.timer("score_rebuild", "Recomputing every team total from the board")
+scoring_time = metrics.timer("scoring_action", "One award, wrong answer or nobody, journal write and listeners included")
+history_jump_time = metrics.timer("history_jump", "One undo, redo or jump in the game's timeline, listeners included")
+
+SCORING_EVENTS = ("points", "undo", "adjust")  # what undo and redo step through
+
+
+class GameJournal:
+    """Append-only SQLite (WAL) log of game events plus occasional state snapshots.
+
+    Every scoring action is one INSERT, so the write cost per action does not
+    grow with the length of the game. Startup loads the newest snapshot and
+    replays the events recorded after it. Games sharing one file keep apart
+    by namespace: each has its own pair of tables, the default namespace the
+    plain events and snapshots.
+
+    Scoring events point to the one they followed, so after an undo a new
+    action starts a branch and the old one stays redoable. head is the
+    scoring event the board is at; a "goto" event moves it. Boards at
+    scoring events are checkpointed in memory every CHECKPOINT_EVERY steps.
+    """
+
+    SNAPSHOT_EVERY = 500
+    CHECKPOINT_EVERY = 32
+
+    def __init__(self, path, namespace="", readonly=False):
+        self.path = path
+        self.namespace = namespace
+        self.readonly = readonly
+        self.events = quote_identifier(f"events:{namespace}" if namespace else "events")
+        self.snapshots = quote_identifier(f"snapshots:{namespace}" if namespace else "snapshots")
+        if readonly:
+            # for reports: a missing file or namespace is an error, not a new game
+            self.db = connect_readonly(path)
+        else:
+            self.db = sqlite3.connect(path, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(f"CREATE TABLE IF NOT EXISTS {self.events} (seq INTEGER PRIMARY KEY, kind TEXT NOT NULL, data TEXT NOT NULL, parent INTEGER)")
+            self.db.execute(f"CREATE TABLE IF NOT EXISTS {self.snapshots} (seq INTEGER PRIMARY KEY, state TEXT NOT NULL)")
+            if "parent" not in [column for _, column, *_ in self.db.execute(f"PRAGMA table_info({self.events})")]:
+                self.add_parents()
+            self.db.execute(f"CREATE INDEX IF NOT EXISTS {quote_identifier(f'parent:{namespace}' if namespace else 'parent')} ON {self.events} (parent)")
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.head = 0
+        self.checkpoints = {}  # scoring event seq -> board after it
+        self.undos = {}        # scoring event seq -> what undoing it puts back (see tile_before)
+        self.since_checkpoint = 0
+        self.snapshots_scanned = False
+        self.verbose = True
+
+    def add_parents(self):
+        # journals from before undo and redo: their scoring events are one straight line
+        scoring = ", ".join(f"'{kind}'" for kind in SCORING_EVENTS)
+        with self.db:
+            self.db.execute(f"ALTER TABLE {self.events} ADD COLUMN parent INTEGER")
+            self.db.execute(
+                f"UPDATE {self.events} SET parent = COALESCE((SELECT MAX(previous.seq) FROM {self.events} AS previous "
+                f"WHERE previous.seq < {self.events}.seq AND previous.kind IN ({scoring})), 0) WHERE kind IN ({scoring})")
+
+    @metrics.timed(journal_append_time)
+    def append(self, kind, data):
+        parent = self.head if kind in SCORING_EVENTS else None
+        cursor = self.db.execute(f"INSERT INTO {self.events} (kind, data, parent) VALUES (?, ?, ?)", (kind, json.dumps(data), parent))
+        self.seq = cursor.lastrowid
+        if kind in SCORING_EVENTS:
+            self.head = self.seq
+        elif kind == "goto":
+            self.head = data["head"]
+        return self.seq
+
+    def applied(self, state, before):
+        """Called once a scoring event is applied, with what undoing it puts back
+        (tile_before() of the board it was applied to); checkpoints the board now and then."""
+        self.undos[self.head] = before
+        self.since_checkpoint += 1
+        if self.since_checkpoint >= self.CHECKPOINT_EVERY:
+            self.checkpoints[self.head] = dump_board(state)
+            self.since_checkpoint = 0
+
+    def load(self, state, from_start=False):
+        """Restore state from the newest snapshot and the events after it, or with
+        from_start from every event, snapshots ignored even as undo checkpoints."""
+        self.head = 0
+        self.checkpoints = {}
+        self.undos = {}
+        self.since_checkpoint = 0
+        self.snapshots_scanned = from_start
+        self.snapshot_seq = 0
+        row = None if from_start else self.db.execute(f"SELECT seq, state FROM {self.snapshots} ORDER BY seq DESC LIMIT 1").fetchone()
+        if row is not None:
+            self.snapshot_seq, snapshot = row
+            snapshot = json.loads(snapshot)
+            restore_state(state, snapshot)
+            self.head = self.snapshot_head(self.snapshot_seq, snapshot)
+            self.checkpoints[self.head] = dump_board(state)
+        self.seq = self.snapshot_seq
+        replayed = 0
+        for seq, kind, data in self.db.execute(f"SELECT seq, kind, data FROM {self.events} WHERE seq > ? ORDER BY seq", (self.snapshot_seq,)):
+            data = json.loads(data)
+            self.seq = seq
+            if kind == "goto":
+                restore_board(state, self.board_at(data["head"]))
+                self.head = data["head"]
+            elif kind in SCORING_EVENTS:
+                before = tile_before(state, kind, data)
+                apply_event(state, kind, data)
+                self.head = seq
+                self.applied(state, before)
+            else:
+                apply_event(state, kind, data)
+            replayed += 1
+        if self.verbose:
+            log.info("Loaded game journal %s%s: snapshot at %d, replayed %d events", self.path, f" ({self.namespace})" if self.namespace else "", self.snapshot_seq, replayed)
+        return replayed
+
+    def snapshot_head(self, seq, snapshot):
+        if "head" in snapshot:
+            return snapshot["head"]
+        # snapshots from before undo and redo, when the last scoring event was the head
+        scoring = ", ".join("?" for _ in SCORING_EVENTS)
+        return self.db.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {self.events} WHERE seq <= ? AND kind IN ({scoring})", (seq, *SCORING_EVENTS)).fetchone()[0]
+
+    def snapshot(self, state):
+        if self.seq == self.snapshot_seq:
+            return
+        with journal_snapshot_time.time(), self.db:
+            self.db.execute(f"INSERT OR REPLACE INTO {self.snapshots} (seq, state) VALUES (?, ?)", (self.seq, json.dumps(dict(dump_state(state), head=self.head))))
+        self.snapshot_seq = self.seq
+
+    # timeline
+
+    def event(self, seq):
+        row = self.db.execute(f"SELECT parent, kind, data FROM {self.events} WHERE seq = ?", (seq,)).fetchone()
+        if row is None or row[1] not in SCORING_EVENTS:
+            raise KeyError(f"No scoring event {seq} in {self.path}")
+        parent, kind, data = row
+        return parent, kind, json.loads(data)
+
+    def parent(self, seq):
+        return self.event(seq)[0] if seq else None
+
+    def latest_child(self, seq):
+        """The scoring event most recently recorded right after seq, what redo goes to."""
+        return self.db.execute(f"SELECT MAX(seq) FROM {self.events} WHERE parent = ?", (seq,)).fetchone()[0]
+
+    def board_at(self, head):
+        """The board (tiles and adjustments) after scoring event head: the nearest
+        checkpoint on its branch plus the scoring events since."""
+        if not self.snapshots_scanned:
+            # snapshots on disk are checkpoints too, once a restart has emptied memory
+            for seq, snapshot in self.db.execute(f"SELECT seq, state FROM {self.snapshots} ORDER BY seq"):
+                snapshot = json.loads(snapshot)
+                self.checkpoints.setdefault(self.snapshot_head(seq, snapshot), {"points": snapshot["points"], "additional": snapshot["additional"]})
+            self.snapshots_scanned = True
+        path = []
+        seq = head
+        while seq not in self.checkpoints and seq:
+            parent, kind, data = self.event(seq)
+            path.append((kind, data))
+            seq = parent
+        board = ({}, {}, {})
+        if seq in self.checkpoints:
+            restore_board(board, self.checkpoints[seq])
+        for kind, data in reversed(path):
+            apply_event(board, kind, data)
+        self.checkpoints[head] = dump_board(board)
+        return self.checkpoints[head]
+
+    def clear(self):
+        """Drop every event and snapshot of this namespace."""
+        with self.db:
+            self.db.execute(f"DELETE FROM {self.events}")
+            self.db.execute(f"DELETE FROM {self.snapshots}")
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.head = 0
+        self.checkpoints = {}
+        self.undos = {}
+        self.since_checkpoint = 0
+
+    def reader(self):
+        """A separate read-only journal over the same game, to replay without touching this one."""
+        reader = GameJournal(self.path, self.namespace, readonly=True)
+        reader.verbose = False
+        return reader
+
+    def is_empty(self):
+        return self.db.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {self.events}) AND NOT EXISTS (SELECT 1 FROM {self.snapshots})").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Commit everything appended inside at once, for bulk writers like simulate()."""
+        self.db.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+
+class MemoryJournal(GameJournal):
+    """A GameJournal kept in a list, for simulations that never need the file.
+
+    Events are stored as the dicts they were recorded with, so appending costs
+    neither SQL nor JSON, and nothing is timed. Loading always replays every
+    event from the start; snapshots are not kept.
+    """
+
+    def __init__(self):
+        self.path = ":memory:"
+        self.namespace = ""
+        self.readonly = False
+        self.rows = [None]  # seq -> (kind, data, parent)
+        self.children = {}  # scoring event seq -> the latest one recorded after it
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.head = 0
+        self.checkpoints = {}
+        self.undos = {}
+        self.since_checkpoint = 0
+        self.snapshots_scanned = True
+        self.verbose = False
+
+    def append(self, kind, data):
+        if kind == "teams":
+            # the roster is the caller's; every other event is built fresh from immutable values
+            data = {"teams": {team: dict(team_data) for team, team_data in data["teams"].items()}}
+        parent = self.head if kind in SCORING_EVENTS else None
+        self.rows.append((kind, data, parent))
+        self.seq = len(self.rows) - 1
+        if kind in SCORING_EVENTS:
+            self.children[parent] = self.seq
+            self.head = self.seq
+        elif kind == "goto":
+            self.head = data["head"]
+        return self.seq
+
+    def load(self, state, from_start=True):
+        self.head = 0
+        self.checkpoints = {}
+        self.undos = {}
+        self.since_checkpoint = 0
+        for seq in range(1, len(self.rows)):
+            kind, data, _ = self.rows[seq]
+            if kind == "goto":
+                restore_board(state, self.board_at(data["head"]))
+                self.head = data["head"]
+            elif kind in SCORING_EVENTS:
+                before = tile_before(state, kind, data)
+                apply_event(state, kind, data)
+                self.head = seq
+                self.applied(state, before)
+            else:
+                apply_event(state, kind, data)
+        return len(self.rows) - 1
+
+    def snapshot(self, state):
+        self.snapshot_seq = self.seq
+
+    def event(self, seq):
+        kind, data, parent = self.rows[seq] if 0 < seq < len(self.rows) else (None, None, None)
+        if kind not in SCORING_EVENTS:
+            raise KeyError(f"No scoring event {seq} in memory")
+        return parent, kind, data
+
+    def latest_child(self, seq):
+        return self.children.get(seq)
+
+    def clear(self):
+        self.rows = [None]
+        self.children = {}
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.head = 0
+        self.checkpoints = {}
+        self.undos = {}
+        self.since_checkpoint = 0
+
+    def reader(self):
+        reader = MemoryJournal()
+        reader.rows = self.rows
+        reader.children = self.children
+        return reader
+
+    def is_empty(self):
+        return len(self.rows) == 1
+
+    def close(self):
+        pass
+
+    def transaction(self):
+        return contextlib.nullcontext()
+
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def connect_readonly(path):
+    return sqlite3.connect(pathlib.Path(path).absolute().as_uri() + "?mode=ro", uri=True, isolation_level=None)
+
+
+def journal_namespaces(path):
+    """Namespaces of the games journaled in the file at path, "" for the default one."""
+    db = connect_readonly(path)
+    try:
+        tables = [name for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+    finally:
+        db.close()
+    return [name.partition(":")[2] for name in tables if name == "events" or name.startswith("events:")]
+
+
+def apply_event(state, kind, data):
+    teams, point_dict, additional_points = state
+    if kind == "points":
+        entries = point_dict.setdefault(data["category"], {}).setdefault(data["score"], [])
+        if data.get("replace"):
+            entries.clear()
+        entries.append((data["team"], data["value"]))
+    elif kind == "undo":
+        point_dict.get(data["category"], {}).pop(data["score"], None)
+    elif kind == "adjust":
+        additional_points.setdefault(data["team"], []).append(data["delta"])
+    elif kind == "teams":
+        teams.clear()
+        teams.update({team: dict(team_data) for team, team_data in data["teams"].items()})
+    elif kind == "rename":
+        if data["team"] in teams:
+            teams[data["team"]]["name"] = data["name"]
+    elif kind == "join":
+        team = teams.setdefault(data["team"], {"name": data["name"], "score": 0})
+        team["name"] = data["name"]
+        if "uuid" in data:
+            team["uuid"] = data["uuid"]
+        team.pop("away", None)
+    elif kind == "leave":
+        if data["team"] in teams:
+            teams[data["team"]]["away"] = True
+    else:
+        log.warning("Unknown journal event %s", kind)
+
+
+def tile_before(state, kind, data):
+    """What undoing a scoring event about to be applied puts back: the tile's
+    entries, None if it had none. Adjustments only need their own delta."""
+    if kind == "adjust":
+        return None
+    entries = state[1].get(data["category"], {}).get(data["score"])
+    return None if entries is None else list(entries)
+
+
+def revert_event(state, kind, data, before):
+    """Undo apply_event() of a scoring event, given tile_before() of the board it was applied to."""
+    teams, point_dict, additional_points = state
+    if kind == "adjust":
+        deltas = additional_points[data["team"]]
+        deltas.pop()
+        if not deltas:
+            del additional_points[data["team"]]
+    elif before is not None:
+        point_dict.setdefault(data["category"], {})[data["score"]] = list(before)
+    else:
+        tiles = point_dict.get(data["category"], {})
+        tiles.pop(data["score"], None)
+        if not tiles:
+            point_dict.pop(data["category"], None)
+
+
+def dump_board(state):
+    """Copy of the tiles and adjustments, the part of the state undo and redo move."""
+    teams, point_dict, additional_points = state
+    return {
+        "points": [[category, score, list(entries)] for category, data in point_dict.items() for score, entries in data.items()],
+        "additional": {team: list(deltas) for team, deltas in additional_points.items()},
+    }
+
+
+def restore_board(state, board):
+    teams, point_dict, additional_points = state
+    point_dict.clear()
+    additional_points.clear()
+    for category, score, entries in board["points"]:
+        point_dict.setdefault(category, {})[score] = [tuple(entry) for entry in entries]
+    for team, deltas in board["additional"].items():
+        additional_points[team] = list(deltas)
+
+
+def dump_state(state):
+    return dict(dump_board(state), teams=state[0])
+
+
+def restore_state(state, snapshot):
+    teams = state[0]
+    teams.clear()
+    teams.update(snapshot["teams"])
+    restore_board(state, snapshot)
+
+
+def import_shelves(state):
+    # one-time migration from the old writeback shelve files
+    teams, point_dict, additional_points = state
+    for name, target in (("teams.db", teams), ("points.db", point_dict), ("additional_points.db", additional_points)):
+        try:
+            with shelve.open(name, flag="r") as db:
+                target.update(dict(db))
+        except Exception:
+            continue
+        log.info("Imported %d entries from %s", len(target), name)
+
+
+def compute_scores(state):
+    teams, point_dict, additional_points = state
+    scores = {}
+    for team in teams:
+        scores[team] = 0
+    for category, data in point_dict.items():
+        for point_value, teamdata in data.items():
+            for team, awarded_score in teamdata:
+                if team == "-":
+                    continue
+                if team not in scores:
+                    log.warning("Invalid team %s in for category %s and score %s", team, category, point_value)
+                    continue
+                scores[team] += awarded_score
+
+    for team, deltas in additional_points.items():
+        for delta in deltas:
+            if team not in scores:
+                log.warning("Invalid team %s in additional points", team)
+                continue
+            scores[team] += delta
+    return scores
+
+
+class GameEngine:
+    """Teams, answered tiles and running score totals, persisted in a GameJournal.
+
+    Scoring methods take the tile explicitly; override=True replaces whatever
+    the tile recorded before (re-opening an answered question). Totals are
+    kept as running deltas so an action costs the same early and late in a
+    game, undo and redo included; verify() checks them against a full
+    recompute.
+    """
+
+    def __init__(self):
+        self.teams = {}              # team key -> {"name", "score"}, plus "uuid" for buzzer server teams
+        self.point_dict = {}         # category -> points -> [(team, awarded)]
+        self.additional_points = {}  # team -> [delta]
+        self.state = (self.teams, self.point_dict, self.additional_points)
+        self.journal : "GameJournal | None" = None
+        self.totals = {}
+        self.listeners = {}          # event -> [callback]
+
+    def on(self, event, callback):
+        self.listeners.setdefault(event, []).append(callback)
+
+    def emit(self, event, *args):
+        for callback in self.listeners.get(event, ()):
+            callback(*args)
+
+    def open(self, path="game.db", migrate=True, verbose=True, namespace="", readonly=False):
+        """Open or create the game journaled at path, or one kept in memory if path is None."""
+        self.journal = GameJournal(path, namespace, readonly) if path is not None else MemoryJournal()
+        self.journal.verbose = verbose
+        if self.journal.is_empty():
+            # the old shelve files only ever held one game
+            if migrate and not namespace:
+                import_shelves(self.state)
+            if any(self.state):
+                self.journal.append("teams", {"teams": self.teams})
+                self.journal.snapshot(self.state)
+        elif self.journal.load(self.state) > GameJournal.SNAPSHOT_EVERY and not readonly:
+            self.journal.snapshot(self.state)
+        self.rebuild()
+
+    def close(self):
+        if self.journal is not None:
+            if not self.journal.readonly:
+                self.journal.snapshot(self.state)
+            self.journal.close()
+            self.journal = None
+
+    def snapshot(self):
+        if self.journal is not None:
+            self.journal.snapshot(self.state)
+
+    def record(self, kind, **data):
+        if self.journal is None:
+            apply_event(self.state, kind, data)
+        elif kind in SCORING_EVENTS:
+            before = tile_before(self.state, kind, data)
+            self.journal.append(kind, data)
+            apply_event(self.state, kind, data)
+            self.journal.applied(self.state, before)
+        else:
+            self.journal.append(kind, data)
+            apply_event(self.state, kind, data)
+
+    # roster
+
+    def set_teams(self, roster):
+        self.record("teams", teams=roster)
+        self.emit("teams")
+        self.rebuild()
+
+    def reset(self, roster=None):
+        """Start the game over in the same journal: all events and snapshots are
+        dropped and the game restarts with roster (or no teams) and no points."""
+        if self.journal is not None:
+            self.journal.clear()
+        for part in self.state:
+            part.clear()
+        self.set_teams(roster or {})
+
+    def join(self, team, name, uuid=None):
+        """Add a team, or bring one back; uuid is its buzzer server id, journaled
+        so a restarted game maps the server's teams to the same keys."""
+        if uuid is None:
+            self.record("join", team=team, name=name)
+        else:
+            self.record("join", team=team, name=name, uuid=uuid)
+        self.totals.setdefault(team, 0)
+        self.emit("join", team)
+        self.publish(team)
+
+    def leave(self, team):
+        if team not in self.teams:
+            log.warning("Invalid team %s", team)
+            return False
+        self.record("leave", team=team)
+        self.emit("leave", team)
+        return True
+
+    def rename(self, team, name):
+        if team not in self.teams:
+            log.warning("Invalid team %s", team)
+            return False
+        self.record("rename", team=team, name=name)
+        self.emit("rename", team, name)
+        return True
+
+    # board
+
+    def entries(self, category, score):
+        return self.point_dict.get(category, {}).get(score, [])
+
+    def is_recorded(self, category, score):
+        return score in self.point_dict.get(category, {})
+
+    def is_answered(self, category, score):
+        # a tile is done once someone got points or nobody did; wrong answers alone leave it open
+        return any(team == "-" or value > 0 for team, value in self.entries(category, score))
+
+    def tile_result(self, category, score):
+        """(winner team, awarded) or None, and the sorted teams that answered wrong."""
+        winner = None
+        losers = []
+        for team, value in self.entries(category, score):
+            if value > 0:
+                winner = (team, value)
+            elif value < 0:
+                losers.append(team)
+        return winner, sorted(losers)
+
+    # scoring
+
+    def award(self, team, category, score, full_points=True, override=False):
+        if team not in self.teams:
+            log.warning("Invalid team %s in for category %s and score %s", team, category, score)
+            return False
+        awarded_score = score if full_points else score // 2
+        self._record_points(category, score, team, awarded_score, override)
+        return True
+
+    def wrong(self, team, category, score, override=False):
+        if team not in self.teams:
+            log.warning("Invalid team %s in for category %s and score %s", team, category, score)
+            return False
+        self._record_points(category, score, team, -score, override)
+        return True
+
+    def nobody(self, category, score, override=False):
+        self._record_points(category, score, "-", 0, override)
+        return True
+
+    def undo(self, category, score):
+        if category not in self.point_dict:
+            log.warning("Category %s not found", category)
+            return False
+        if score not in self.point_dict[category]:
+            log.warning("Score %s not found in category %s", score, category)
+            return False
+        self.revoke(self.point_dict[category][score])
+        self.record("undo", category=category, score=score)
+        self.emit("tile", category, score)
+        return True
+
+    def adjust(self, team, delta):
+        if team not in self.teams:
+            log.warning("Invalid team %s", team)
+            return False
+        self.record("adjust", team=team, delta=delta)
+        self.apply(team, delta)
+        return True
+
+    @metrics.timed(scoring_time)
+    def _record_points(self, category, score, team, value, override):
+        if override:
+            self.revoke(self.entries(category, score))
+        self.record("points", category=category, score=score, team=team, value=value, replace=bool(override))
+        self.apply(team, value)
+        self.emit("tile", category, score)
+
+    # timeline
+
+    def undo_action(self):
+        """Go back to before the last scoring action, adjustments and tile undos included."""
+        if self.journal is None or not self.journal.head:
+            return False
+        return self.goto(self.journal.parent(self.journal.head))
+
+    def redo_action(self):
+        """Go forward to the action recorded last after this point."""
+        if self.journal is None:
+            return False
+        child = self.journal.latest_child(self.journal.head)
+        return child is not None and self.goto(child)
+
+    @metrics.timed(history_jump_time)
+    def goto(self, head):
+        """Put the board back to just after scoring event head (0: before the first).
+        Only the tiles and totals that differ are reported."""
+        if self.journal is None or head == self.journal.head:
+            return False
+        current = self.journal.head
+        if current and current in self.journal.undos:
+            parent, kind, data = self.journal.event(current)
+            if parent == head:
+                # one step back: put back what the event replaced
+                self.journal.append("goto", {"head": head})
+                self._step(kind, data, lambda: revert_event(self.state, kind, data, self.journal.undos[current]))
+                return True
+        if head:
+            parent, kind, data = self.journal.event(head)
+            if parent == current:
+                # one step forward: the event applies to the board as it is
+                before = tile_before(self.state, kind, data)
+                self.journal.append("goto", {"head": head})
+                self._step(kind, data, lambda: apply_event(self.state, kind, data))
+                self.journal.undos[head] = before
+                return True
+        board = self.journal.board_at(head)
+        tiles = self.tiles()
+        additional = {team: sum(deltas) for team, deltas in self.additional_points.items()}
+        self.journal.append("goto", {"head": head})
+        restore_board(self.state, board)
+        new_tiles = self.tiles()
+        changed = sorted(tile for tile in tiles.keys() | new_tiles.keys() if tiles.get(tile) != new_tiles.get(tile))
+        deltas = {}
+        for tile in changed:
+            for team, value in tiles.get(tile, ()):
+                deltas[team] = deltas.get(team, 0) - value
+            for team, value in new_tiles.get(tile, ()):
+                deltas[team] = deltas.get(team, 0) + value
+        for team in additional.keys() | self.additional_points.keys():
+            deltas[team] = deltas.get(team, 0) + sum(self.additional_points.get(team, ())) - additional.get(team, 0)
+        for team, delta in deltas.items():
+            self.apply(team, delta)
+        for category, score in changed:
+            self.emit("tile", category, score)
+        return True
+
+    def _step(self, kind, data, change):
+        # a single event's tile or adjustment changes, nothing else on the board
+        if kind == "adjust":
+            team = data["team"]
+            total = sum(self.additional_points.get(team, ()))
+            change()
+            self.apply(team, sum(self.additional_points.get(team, ())) - total)
+            return
+        category, score = data["category"], data["score"]
+        entries = list(self.entries(category, score))
+        change()
+        self.revoke(entries)
+        for team, value in self.entries(category, score):
+            self.apply(team, value)
+        self.emit("tile", category, score)
+
+    def tiles(self):
+        return {(category, score): entries for category, data in self.point_dict.items() for score, entries in data.items()}
+
+    # ledger
+
+    @metrics.timed(score_rebuild_time)
+    def rebuild(self):
+        self.totals = compute_scores(self.state)
+        for team in self.totals:
+            self.publish(team)
+
+    def apply(self, team, delta):
+        if team == "-" or delta == 0:
+            return
+        if team not in self.totals:
+            log.warning("Invalid team %s in score ledger", team)
+            return
+        self.totals[team] += delta
+        self.publish(team)
+
+    def revoke(self, entries):
+        for team, awarded_score in list(entries):
+            self.apply(team, -awarded_score)
+
+    def publish(self, team):
+        score = self.totals[team]
+        if team in self.teams:
+            self.teams[team]["score"] = score
+        self.emit("score", team, score)
+
+    def verify(self):
+        """Check the running totals against a full recompute and repair any drift."""
+        expected = compute_scores(self.state)
+        mismatches = {
+            team: (self.totals.get(team), score)
+            for team, score in expected.items()
+            if self.totals.get(team) != score
+        }
+        if mismatches:
+            log.warning("Score ledger mismatch (ledger, recomputed): %s", mismatches)
+            self.rebuild()
+        else:
+            log.info("Score ledger verified for %d teams", len(expected))
+        return not mismatches
+
+    def replay_matches(self):
+        """Play the journal from its first event into a fresh engine, snapshots
+        ignored, and compare the board and final scores with this one's."""
+        replayed = GameEngine()
+        replayed.journal = self.journal.reader()
+        try:
+            replayed.journal.load(replayed.state, from_start=True)
+        finally:
+            replayed.journal.close()
+        replayed.journal = None
+        replayed.rebuild()
+        roster = lambda teams: {team: (data["name"], data.get("away", False), data["score"]) for team, data in teams.items()}
+        # steps and jumps may leave empty categories and adjustment lists behind, they mean nothing
+        adjustments = lambda engine: {team: deltas for team, deltas in engine.additional_points.items() if deltas}
+        return (
+            roster(replayed.teams) == roster(self.teams)
+            and replayed.tiles() == self.tiles()
+            and adjustments(replayed) == adjustments(self)
+            and replayed.totals == self.totals
+        )
+
+
+def play_random_game(engine, rng, team_count, categories, scores):
+    """One full game: every tile answered, with wrong answers, overrides, undos and adjustments mixed in."""
+    engine.set_teams({f"team{i}": {"name": f"Team {i + 1}", "score": 0} for i in range(team_count)})
+    team_keys = list(engine.teams)
+    tiles = [(category, score) for category in categories for score in scores]
+    rng.shuffle(tiles)
+    actions = 0
+    for category, score in tiles:
+        for team in rng.sample(team_keys, min(len(team_keys), rng.choice((0, 0, 0, 1, 1, 2)))):
+            engine.wrong(team, category, score)
+            actions += 1
+        outcome = rng.random()
+        if outcome < 0.7:
+            engine.award(rng.choice(team_keys), category, score)
+        elif outcome < 0.8:
+            engine.award(rng.choice(team_keys), category, score, full_points=False)
+        else:
+            engine.nobody(category, score)
+        actions += 1
+        if rng.random() < 0.03:
+            engine.undo(category, score)
+            engine.award(rng.choice(team_keys), category, score)
+            actions += 2
+        if rng.random() < 0.05:
+            redo_category, redo_score = rng.choice(tiles)
+            if engine.is_answered(redo_category, redo_score):
+                engine.award(rng.choice(team_keys), redo_category, redo_score, True, override=True)
+                actions += 1
+        if rng.random() < 0.02:
+            engine.adjust(rng.choice(team_keys), rng.choice((-100, 100)))
+            actions += 1
+        if rng.random() < 0.04:
+            # the host steps back a few actions, and sometimes forward again
+            steps = rng.randint(1, 4)
+            for _ in range(steps):
+                engine.undo_action()
+            for _ in range(rng.randint(0, steps)):
+                engine.redo_action()
+            actions += steps
+        if rng.random() < 0.02:
+            # roster churn: a late team, a team stepping out and back, a rename
+            roll = rng.random()
+            if roll < 0.3:
+                team_keys.append(f"team{len(team_keys)}")
+                engine.join(team_keys[-1], f"Team {len(team_keys)}")
+            elif roll < 0.6:
+                team = rng.choice(team_keys)
+                engine.leave(team)
+                engine.join(team, engine.teams[team]["name"])
+            else:
+                team = rng.choice(team_keys)
+                engine.rename(team, f"{engine.teams[team]['name']}!")
+        if rng.random() < 0.01:
+            engine.rename(rng.choice(team_keys), f"Team {rng.randint(1, 999)}")
+            actions += 1
+    return actions
+
+
+def simulate(games, team_count=6, category_count=6, tiles_per_category=5, journal_dir=None, check_replay=False, seed=None):
+    rng = random.Random(seed)
+    categories = [f"Category {i + 1}" for i in range(category_count)]
+    scores = [100 * (i + 1) for i in range(tiles_per_category)]
+    if journal_dir:
+        os.makedirs(journal_dir, exist_ok=True)
+    # in memory there is no I/O worth timing, only the cost of timing it
+    metrics.enabled = bool(journal_dir)
+    actions = 0
+    failures = 0
+    start = time.perf_counter()
+    for game in range(games):
+        engine = GameEngine()
+        path = os.path.join(journal_dir, f"game-{game}.db") if journal_dir else None
+        engine.open(path, migrate=False, verbose=False)
+        with engine.journal.transaction():
+            actions += play_random_game(engine, rng, team_count, categories, scores)
+        if engine.totals != compute_scores(engine.state):
+            failures += 1
+            print(f"Game {game}: running totals drifted from a full recompute")
+        if check_replay and not engine.replay_matches():
+            failures += 1
+            print(f"Game {game}: journal replay does not match the live state")
+        engine.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"Simulated {games} games ({actions} scoring actions) in {elapsed:.2f} s: "
+        f"{games / elapsed:.0f} games/s, {actions / elapsed:.0f} actions/s, {failures} failures"
+    )
+    if metrics.enabled:
+        print(metrics.summary())
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Jeopardy game engine")
+    parser.add_argument("--simulate", type=int, default=1000, metavar="GAMES", help="Random full games to play")
+    parser.add_argument("--teams", type=int, default=6)
+    parser.add_argument("--categories", type=int, default=6)
+    parser.add_argument("--tiles", type=int, default=5, help="Tiles per category")
+    parser.add_argument("--journal-dir", help="Write each game's journal to a file here (one transaction per game) instead of keeping it in memory")
+    parser.add_argument("--check-replay", action="store_true", help="Replay every journal and compare it with the live state")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    failures = simulate(args.simulate, args.teams, args.categories, args.tiles, args.journal_dir, args.check_replay, args.seed)
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,327 +1,1438 @@
-import shelve
-from PySide6.QtWidgets import *
-from PySide6.QtCore import *
-from PySide6.QtGui import *
+import time
+STARTUP_T0 = time.perf_counter()
 import sys
+if __name__ == "__main__" and sys.argv[1:2] and sys.argv[1] in ("export", "validate", "reset", "pack-check"):
+    # operational subcommands start without Qt, a window or the buzzer server
+    import game_admin
+    sys.exit(game_admin.main())
+from PySide6.QtWidgets import (QApplication, QHBoxLayout, QLabel, QLineEdit, QMainWindow, QPushButton, QSizePolicy,
+                               QVBoxLayout, QWidget)
+from PySide6.QtCore import QBuffer, QByteArray, QFileSystemWatcher, QIODevice, QObject, QRect, QSize, Qt, QTimer, QUrl, Signal
+from PySide6.QtGui import QColor, QGuiApplication, QIcon, QImage, QKeySequence, QPainter, QPixmap, QShortcut
 import os
 import json
 import threading
-import time
-import websockets.sync.client as ws_client
-import queue
+import asyncio
+import itertools
+import random
+import concurrent.futures
+from collections import OrderedDict, deque
+import websockets
+from websockets.asyncio.client import connect as ws_connect
 import argparse
 from dotenv import load_dotenv
+from game_engine import GameEngine
+from question_pack import MEDIA_KINDS, QuestionPack, load_qt, parse_question_filename, question_kind
+from spectator import SpectatorServer, file_media
+import metrics
+import logs
+import session_log
+import logging
+from urllib.parse import quote
 
-load_dotenv()
-
-BUZZER_URL = os.getenv("BUZZER_URL", "wss://buzzer.neuralcoder.de/api")
-INSTANCE = os.getenv("BUZZER_INSTANCE", "test")
-ADMIN_SESSION = os.getenv("BUZZER_ADMIN_SESSION", "cdcdc6fc-99d1X")
-QUESTION_DIR = os.getenv("QUESTION_DIR", "questions")
-
-
+# defaults; main() applies the environment (and .env) and then the command line
 BUZZER_URL = "wss://buzzer.neuralcoder.de/api"
 INSTANCE = "test"
 ADMIN_SESSION = "cdcdc6fc-99d1X"
-buzzer_socket = None
-buzzer_message_queue = queue.Queue()
-buzzer_team_map = {}
-team_uuid_map = {}
-session = None
-teams_initialized = False
-request_id_counter = 0
-
-def parse_args():
+BUZZER_ROOMS = None  # comma-separated INSTANCE[:ADMIN_SESSION], one game each
+BUZZER_CONNECTIONS = 1
+QUESTION_DIR = "questions"
+QUESTION_PACK = None
+SERIAL_PORT = "none"  # a port, or "auto" to use the first USB serial device
+SERIAL_BAUD = 115200
+SPECTATOR_PORT = 0
+METRICS_PORT = 0
+LOG_LEVEL = "info"
+LOG_FILE = None
+RECORD_SESSION = None
+REPLAY_SESSION = None
+REPLAY_SPEED = 1.0
+log = logging.getLogger("jeopardy")
+
+def load_environment():
+    """Apply .env and the environment over the defaults above."""
+    global BUZZER_URL, INSTANCE, ADMIN_SESSION, BUZZER_ROOMS, BUZZER_CONNECTIONS, QUESTION_DIR, QUESTION_PACK, SERIAL_PORT, SERIAL_BAUD, SPECTATOR_PORT, METRICS_PORT, LOG_LEVEL, LOG_FILE, RECORD_SESSION, REPLAY_SESSION, REPLAY_SPEED
+    load_dotenv()
+    BUZZER_URL = os.getenv("BUZZER_URL", BUZZER_URL)
+    INSTANCE = os.getenv("BUZZER_INSTANCE", INSTANCE)
+    ADMIN_SESSION = os.getenv("BUZZER_ADMIN_SESSION", ADMIN_SESSION)
+    BUZZER_ROOMS = os.getenv("BUZZER_ROOMS", BUZZER_ROOMS)
+    BUZZER_CONNECTIONS = int(os.getenv("BUZZER_CONNECTIONS", BUZZER_CONNECTIONS))
+    QUESTION_DIR = os.getenv("QUESTION_DIR", QUESTION_DIR)
+    QUESTION_PACK = os.getenv("QUESTION_PACK", QUESTION_PACK)
+    SERIAL_PORT = "none" if os.getenv("NO_SERIAL_PORTS") else os.getenv("SERIAL_PORT", SERIAL_PORT)
+    SERIAL_BAUD = int(os.getenv("SERIAL_BAUD", SERIAL_BAUD))
+    SPECTATOR_PORT = int(os.getenv("SPECTATOR_PORT", SPECTATOR_PORT))
+    METRICS_PORT = int(os.getenv("METRICS_PORT", METRICS_PORT))
+    LOG_LEVEL = os.getenv("LOG_LEVEL", LOG_LEVEL)
+    LOG_FILE = os.getenv("LOG_FILE", LOG_FILE)
+    RECORD_SESSION = os.getenv("RECORD_SESSION", RECORD_SESSION)
+    REPLAY_SESSION = os.getenv("REPLAY_SESSION", REPLAY_SESSION)
+    REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", REPLAY_SPEED))
+
+
+def build_parser():
     parser = argparse.ArgumentParser(description='Jeopardy game with buzzer support')
     parser.add_argument('--buzzer-url', dest='buzzer_url', help='Buzzer server URL')
     parser.add_argument('--instance', dest='instance', help='Buzzer instance ID')
     parser.add_argument('--admin-session', dest='admin_session', help='Admin session token')
+    parser.add_argument('--room', dest='rooms', action='append', metavar='INSTANCE[:ADMIN_SESSION]', help='Run a game for this buzzer instance (repeatable, one board window each; the session defaults to --admin-session)')
+    parser.add_argument('--connections', dest='connections', type=int, help='Buzzer server connections shared by all rooms')
     parser.add_argument('--question-dir', dest='question_dir', help='Questions directory')
-    return parser.parse_args()
+    parser.add_argument('--question-pack', dest='question_pack', help='Compiled question pack (see question_pack.py), used instead of the questions directory')
+    parser.add_argument('--serial-port', dest='serial_port', help='Serial port of a local buzzer box ("auto" to detect one, default "none")')
+    parser.add_argument('--serial-baud', dest='serial_baud', type=int, help='Baud rate of the local buzzer box')
+    parser.add_argument('--spectator-port', dest='spectator_port', type=int, help='Serve browser displays of the board on this port (0 to disable)')
+    parser.add_argument('--log-level', dest='log_level', choices=['debug', 'info', 'warning', 'error'], help='Log level (debug also logs every buzzer frame)')
+    parser.add_argument('--log-file', dest='log_file', help='Also write the log to this file')
+    parser.add_argument('--log-json', dest='log_json', action='store_true', help='Write the log as one JSON object per line')
+    parser.add_argument('--record-session', dest='record_session', help='Record every buzzer frame to this file (see session_log.py)')
+    parser.add_argument('--replay-session', dest='replay_session', help='Play a recorded session instead of connecting to the buzzer server')
+    parser.add_argument('--replay-speed', dest='replay_speed', type=float, help='Replay speed factor, 0 for as fast as possible')
+    parser.add_argument('--metrics-port', dest='metrics_port', type=int, help='Serve Prometheus metrics on 127.0.0.1:PORT/metrics (0 to disable)')
+    return parser
 
-args = parse_args()
-BUZZER_URL = args.buzzer_url or BUZZER_URL
-INSTANCE = args.instance or INSTANCE
-ADMIN_SESSION = args.admin_session or ADMIN_SESSION
-QUESTION_DIR = args.question_dir or QUESTION_DIR
 
+startup_phases = []  # (phase, ms spent, ms since process start)
+_last_startup_mark = STARTUP_T0
 
-def send_buzzer_request(payload):
-    global request_id_counter
-    if buzzer_socket is None:
-        print(f"Cannot send request: No socket connected")
-        return None
-    msg_id = request_id_counter
-    request_id_counter += 1
-    request = {
-        "id": msg_id,
-        "payload": payload
-    }
-    print(f"Sending request: {json.dumps(request)}")
-    buzzer_socket.send(json.dumps(request))
-    return msg_id
 
+def startup_phase(name):
+    global _last_startup_mark
+    now = time.perf_counter()
+    startup_phases.append((name, (now - _last_startup_mark) * 1000, (now - STARTUP_T0) * 1000))
+    _last_startup_mark = now
 
-def set_buzzer_points(team_uuid, points):
-    global session
-    if session is None:
-        print(f"Cannot set points for {team_uuid}: No session")
-        return
-    print(f"Setting team {team_uuid} points to {points}")
-    send_buzzer_request({
-        "kind": "SetPoints",
-        "session": session,
-        "teamId": team_uuid,
-        "points": points
-    })
 
+def startup_event(name):
+    # asynchronous milestones (socket connect, first teams frame) are reported as they happen
+    log.info("Startup: %s at %.1f ms", name, (time.perf_counter() - STARTUP_T0) * 1000)
+
+
+def report_startup():
+    log.info("Startup timing:")
+    for name, spent, total in startup_phases:
+        log.info("  %-22s %8.1f ms  (at %8.1f ms)", name, spent, total)
+
+
+frames_received = metrics.counter("buzzer_frames", "Frames received from the buzzer server")
+bytes_received = metrics.counter("buzzer_bytes", "Bytes of frames received from the buzzer server")
+requests_sent = metrics.counter("buzzer_requests", "Requests queued for the buzzer server")
+frame_receive_time = metrics.timer("buzzer_frame_receive", "Client thread work per received frame, decode and buffering")
+frame_decode_time = metrics.timer("buzzer_json_decode", "json.loads of one received frame")
+frame_dispatch_time = metrics.timer("frame_dispatch", "Qt thread draining the frame buffer and running the handlers")
+points_sync_time = metrics.timer("points_sync_flush", "Comparing scores with the server and queueing SetPoints")
+question_build_time = metrics.timer("question_window_build", "Building the question window")
+question_buttons_time = metrics.timer("question_team_buttons", "Rebuilding the team buttons of the question window")
+question_show_time = metrics.timer("question_show", "Showing a question in the reused window")
+board_paint_time = metrics.timer("board_paint", "One paint of the board")
+
+
+class BuzzerClient:
+    """Websocket client running its own asyncio event loop on a background thread.
+
+    Requests are pipelined through a bounded send queue and answered through
+    futures keyed by request id. Lost connections are re-established with
+    exponential backoff and all stream subscriptions are re-issued. Several
+    rooms can share one client: each subscription's frames go to its own
+    on_frame, looked up by the subscription's request id.
+    """
+
+    # shared by all clients, so ids stay unique in a recording of several connections
+    _ids = itertools.count()
+    _id_lock = threading.Lock()
+
+    def __init__(self, url, on_frame=None, on_connect=None, send_queue_size=256, min_backoff=0.05, max_backoff=5.0, recorder=None, name="buzzer-client"):
+        self.url = url
+        self.on_frame = on_frame  # frames no subscription claims
+        self.on_connect = on_connect
+        self.recorder : "session_log.SessionRecorder | None" = recorder
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.subscriptions = []  # (payload, on_frame) re-issued on every (re)connect
+        self._pending = {}  # request id -> future, only touched on the loop thread
+        self._routes = {}   # subscription request id -> on_frame, only touched on the loop thread
+        self._unsent = None
+        self._ws = None
+        self._loop = asyncio.new_event_loop()
+        self._send_queue = asyncio.Queue(maxsize=send_queue_size)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _next_id(self):
+        with self._id_lock:
+            return next(self._ids)
+
+    def request(self, payload):
+        """Queue a request from any thread; returns a future resolved with the reply frame."""
+        msg_id = self._next_id()
+        future = concurrent.futures.Future()
+        frame = json.dumps({"id": msg_id, "payload": payload})
+        requests_sent.inc()
+        self._loop.call_soon_threadsafe(self._enqueue, msg_id, frame, future)
+        return future
+
+    def subscribe(self, payload, on_frame=None):
+        """Register a stream subscription that survives reconnects. Its frames
+        go to on_frame, or to the client's own on_frame if none is given."""
+        self._loop.call_soon_threadsafe(self._add_subscription, payload, on_frame or self.on_frame)
+
+    def _add_subscription(self, payload, on_frame):
+        self.subscriptions.append((payload, on_frame))
+        if self._ws is not None:
+            msg_id = self._next_id()
+            self._routes[msg_id] = on_frame
+            self._enqueue(msg_id, json.dumps({"id": msg_id, "payload": payload}), concurrent.futures.Future())
+
+    def _enqueue(self, msg_id, frame, future):
+        try:
+            self._send_queue.put_nowait((msg_id, frame, future))
+        except asyncio.QueueFull:
+            future.set_exception(RuntimeError(f"Buzzer send queue full, dropping request {msg_id}"))
+            log.warning("Buzzer send queue full, dropping request %s", msg_id)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._connect_forever())
+
+    async def _connect_forever(self):
+        backoff = self.min_backoff
+        while True:
+            try:
+                log.info("Connecting to buzzer server %s...", self.url)
+                async with ws_connect(self.url, ping_interval=5, ping_timeout=5) as ws:
+                    backoff = self.min_backoff
+                    await self._serve(ws)
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+                log.warning("Buzzer connection error: %s", e)
+            except Exception:
+                log.exception("Buzzer connection failed")
+            self._fail_pending(ConnectionError("Buzzer connection lost"))
+            await asyncio.sleep(backoff * random.uniform(1.0, 1.5))
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _serve(self, ws):
+        self._ws = ws
+        self.connected = True
+        log.info("Connected to buzzer server")
+        if self.on_connect is not None:
+            self.on_connect()
+        sender = None
+        try:
+            # subscriptions go out ahead of anything queued while disconnected
+            self._routes = {}
+            for payload, on_frame in self.subscriptions:
+                msg_id = self._next_id()
+                self._pending[msg_id] = concurrent.futures.Future()
+                self._routes[msg_id] = on_frame
+                await self._send(ws, json.dumps({"id": msg_id, "payload": payload}))
+            sender = asyncio.create_task(self._send_loop(ws))
+            async for message in ws:
+                self._on_message(message, time.perf_counter())
+        finally:
+            self.connected = False
+            self._ws = None
+            if sender is not None:
+                sender.cancel()
+
+    async def _send_loop(self, ws):
+        if self._unsent is not None:
+            # a request interrupted by the last disconnect goes out first
+            msg_id, frame, future = self._unsent
+            self._pending[msg_id] = future
+            await self._send(ws, frame)
+            self._unsent = None
+        while True:
+            msg_id, frame, future = await self._send_queue.get()
+            self._unsent = (msg_id, frame, future)
+            self._pending[msg_id] = future
+            await self._send(ws, frame)
+            self._unsent = None
+
+    async def _send(self, ws, frame):
+        await ws.send(frame)
+        if self.recorder is not None:
+            self.recorder.record(session_log.OUTBOUND, time.perf_counter(), frame)
+
+    def _route(self, msg_id):
+        return self._routes.get(msg_id, self.on_frame)
+
+    def _on_message(self, message, received_at):
+        if self.recorder is not None:
+            self.recorder.record(session_log.INBOUND, received_at, message)
+        frames_received.inc()
+        bytes_received.inc(len(message))
+        try:
+            with frame_decode_time.time():
+                data = json.loads(message)
+        except ValueError as e:
+            log.warning("Invalid buzzer frame: %s", e)
+            return
+        if not isinstance(data, dict):
+            log.warning("Ignoring buzzer frame that is not an object: %.200s", message)
+            return
+        if log.isEnabledFor(logging.DEBUG):
+            stream_val = data.get("streamVal")
+            if isinstance(stream_val, dict) and "teams" in stream_val:
+                # state snapshots repeat many times a second
+                log.debug("Received state frame %s", message, extra=logs.RATE_LIMITED)
+            else:
+                log.debug("Received frame %s", message)
+        try:
+            future = self._pending.pop(data.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(data)
+            on_frame = self._route(data.get("id"))
+            if on_frame is not None:
+                on_frame(data, received_at)
+        except Exception:
+            # one bad frame or handler must not end the receive loop
+            log.exception("Error handling buzzer frame %.200s", message)
+        frame_receive_time.observe(time.perf_counter() - received_at)
+
+    def _fail_pending(self, error):
+        pending, self._pending = self._pending, {}
+        for msg_id, future in pending.items():
+            if self._unsent is not None and self._unsent[0] == msg_id:
+                continue
+            if not future.done():
+                future.set_exception(error)
+
+
+class ReplayClient(BuzzerClient):
+    """Plays a recorded session (see session_log.py) into the same frame path
+    as a live connection. Requests are answered locally and never sent. With
+    speed 0 the frames are fed as fast as the client takes them. Stream frames
+    go to the room subscribed to the instance they were recorded for, frames
+    of other instances to the first room subscribed to the same stream."""
+
+    def __init__(self, path, on_frame=None, speed=1.0, on_connect=None):
+        super().__init__(f"replay:{path}", on_frame, on_connect=on_connect, name="buzzer-replay")
+        self.path = path
+        self.speed = speed
+        self.replayed = 0
+        self.finished = threading.Event()
+        self._recorded = {}  # recorded subscription id -> (kind, instance)
+
+    def _enqueue(self, msg_id, frame, future):
+        if not future.done():
+            future.set_result({"id": msg_id, "ok": True})
+
+    def _route(self, msg_id):
+        if msg_id not in self._routes:
+            kind, instance = self._recorded.get(msg_id, (None, None))
+            # the room playing the recorded instance, else the first room subscribed to that stream
+            routes = [on_frame for payload, on_frame in self.subscriptions if payload["kind"] == kind and payload.get("instance") == instance]
+            routes += [on_frame for payload, on_frame in self.subscriptions if payload["kind"] == kind]
+            self._routes[msg_id] = routes[0] if routes else self.on_frame
+        return self._routes[msg_id]
+
+    async def _connect_forever(self):
+        meta, records = session_log.read_session(self.path)
+        log.info("Replaying %s (recorded from %s, instance %s) at %s", self.path, meta.get("url"), meta.get("instance"), f"{self.speed}x" if self.speed else "full speed")
+        self.connected = True
+        if self.on_connect is not None:
+            self.on_connect()
+        start = time.perf_counter()
+        first = None
+        for direction, at, frame in records:
+            if direction != session_log.INBOUND:
+                request = json.loads(frame)
+                payload = request.get("payload", {})
+                if payload.get("kind", "").startswith("Stream"):
+                    self._recorded[request.get("id")] = (payload["kind"], payload.get("instance"))
+                continue
+            if first is None:
+                first = at
+            if self.speed > 0:
+                delay = (at - first) / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif self.replayed % 64 == 0:
+                # let queued requests through now and then
+                await asyncio.sleep(0)
+            self._on_message(frame, time.perf_counter())
+            self.replayed += 1
+        self.connected = False
+        log.info("Replay finished: %d frames in %.2f s", self.replayed, time.perf_counter() - start)
+        self.finished.set()
+        # stay up so requests keep being answered
+        await asyncio.Future()
+
+
+class BuzzerPool:
+    """A small, fixed number of buzzer connections shared by all rooms.
+
+    Rooms are handed out round-robin, so one connection, thread and send
+    queue serve several games and the connection count stays at `size`
+    however many rooms run. Connections are only opened for rooms that use
+    them, and all of them record into the same session recording.
+    """
+
+    def __init__(self, url, size=1, recorder=None):
+        self.url = url
+        self.size = max(1, size)
+        self.recorder : "session_log.SessionRecorder | None" = recorder
+        self.clients = []
+        self._assigned = 0
+
+    def client_for(self, room):
+        index = self._assigned % self.size
+        self._assigned += 1
+        if index == len(self.clients):
+            self.clients.append(BuzzerClient(
+                self.url, on_connect=lambda: startup_event("socket connected"), recorder=self.recorder,
+                name=f"buzzer-client-{index}"))
+        room.log.info("Using buzzer connection %d of %d", index + 1, self.size)
+        return self.clients[index]
+
+    def start(self):
+        for client in self.clients:
+            client.start()
+
+
+class ReplayPool(BuzzerPool):
+    """Every room on the one replayed recording."""
+
+    def __init__(self, path, speed=1.0):
+        super().__init__(f"replay:{path}")
+        self.client = ReplayClient(path, speed=speed, on_connect=lambda: startup_event("replay started"))
+        self.clients = [self.client]
+
+    def client_for(self, room):
+        return self.client
 
-def sync_all_team_points():
-    print(f"Syncing all teams. team_uuid_map: {team_uuid_map}, teams: {dict(teams)}")
-    for team, data in teams.items():
-        team_index = int(team.replace("team", ""))
-        team_uuid = team_uuid_map.get(team_index)
-        if team_uuid:
+
+class PointsSync:
+    """Coalesces score changes and sends SetPoints only for teams the server disagrees with."""
+
+    def __init__(self, room, window_ms=25):
+        self.room = room
+        self.window_ms = window_ms
+        self.acked = {}      # team uuid -> points the server confirmed or reported
+        self.in_flight = {}  # team uuid -> points sent but not yet acknowledged
+        self.requested = 0   # sync requests, each of which used to resend every team
+        self.naive = 0       # SetPoints a full resend per request would have sent
+        self.sent = 0
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def saved(self):
+        return self.naive - self.sent
+
+    def schedule(self):
+        self.requested += 1
+        self.naive += len(self.room.teams)
+        if self._timer is None:
+            self._timer = QTimer()
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self.flush)
+        if not self._timer.isActive():
+            self._timer.start(self.window_ms)
+
+    def observe(self, team_uuid, points):
+        # the server's own state frames count as acknowledgement
+        with self._lock:
+            self.acked[team_uuid] = points
+
+    @metrics.timed(points_sync_time)
+    def flush(self):
+        room = self.room
+        sent_before = self.sent
+        for team, data in room.sorted_teams():
+            team_uuid = room.team_uuid_map.get(team_index_of(team))
+            if not team_uuid:
+                room.log.warning("No UUID for team %s", team)
+                continue
             team_score = data.get("score", 0)
-            set_buzzer_points(team_uuid, team_score)
+            with self._lock:
+                last = self.in_flight.get(team_uuid, self.acked.get(team_uuid))
+                if last == team_score:
+                    continue
+                self.in_flight[team_uuid] = team_score
+            future = room.set_points(team_uuid, team_score)
+            if future is None:
+                with self._lock:
+                    self.in_flight.pop(team_uuid, None)
+                continue
+            self.sent += 1
+            future.add_done_callback(lambda f, u=team_uuid, p=team_score: self._on_reply(u, p, f))
+        room.log.debug("Points sync: sent %d, saved %d of %d SetPoints so far", self.sent - sent_before, self.saved, self.naive)
+
+    def _on_reply(self, team_uuid, points, future):
+        # runs on the buzzer client thread; the server rejects with {"error": ...}, not an exception
+        reply = None if future.exception() is not None else future.result()
+        if reply is None or "error" in reply:
+            self.room.log.warning("Server did not take %s points for %s: %s", points, team_uuid, future.exception() or reply.get("error"))
+        with self._lock:
+            if self.in_flight.get(team_uuid) == points:
+                del self.in_flight[team_uuid]
+            if reply is not None and "error" not in reply:
+                self.acked[team_uuid] = points
+
+
+class BuzzerEvents(QObject):
+    """Typed buzzer events. frames_ready and local_winner cross from the reader
+    threads to the Qt thread; the rest are emitted on the Qt thread by FrameBuffer.drain()."""
+    teams_updated = Signal(object)      # list of server team dicts
+    winner = Signal(str, float)         # winner uuid, perf_counter() at frame arrival
+    settings_updated = Signal(object)   # settings dict
+    local_winner = Signal(int, float)   # team index decided by the serial buzzer, perf_counter() at line arrival
+    buzz_feed = Signal(object, float)   # StreamBuzzFeed value, perf_counter() at frame arrival
+    frames_ready = Signal()             # the frame buffer has something for the Qt thread
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (bounds in milliseconds)."""
+
+    BOUNDS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(self.BOUNDS) if ms <= bound), len(self.BOUNDS))
+        with self._lock:
+            self.counts[index] += 1
+            self.total += ms
+            self.count += 1
+            self.max = max(self.max, ms)
+
+    def summary(self):
+        if self.count == 0:
+            return f"{self.name}: no samples"
+        lines = [f"{self.name}: {self.count} samples, mean {self.total / self.count:.3f} ms, max {self.max:.3f} ms"]
+        for bound, count in zip(self.BOUNDS + (float("inf"),), self.counts):
+            if count:
+                lines.append(f"  <= {bound:>6} ms: {count}")
+        return "\n".join(lines)
+
+
+def parse_buzz_feed(stream_val):
+    """The buzz feed of a StreamBuzzFeed value, or None if it is not shaped as expected.
+
+    Expected: {"buzzFeed": {"round": ..., "enabledAt": ..., "buzzes": [{"uuid": ..., "at": ...}, ...]}},
+    as buzzer_server.py sends it; the feed without the "buzzFeed" wrapper, or
+    just the list of buzzes, is taken too. "at" and "enabledAt" are server
+    times in milliseconds and may be missing.
+    """
+    feed = stream_val.get("buzzFeed", stream_val) if isinstance(stream_val, dict) else stream_val
+    buzzes = feed.get("buzzes") if isinstance(feed, dict) else feed
+    if not isinstance(buzzes, list) or not all(isinstance(buzz, dict) and "uuid" in buzz for buzz in buzzes):
+        return None
+    return feed
+
+
+class FrameBuffer:
+    """Hand-off between the buzzer client thread and the Qt thread.
+
+    Frames arrive with the stream kind of the subscription they answer.
+    Server state snapshots and settings are coalesced, so only the newest of
+    each waits for the Qt thread. Buzz events (a new lastWinner, buzz feed
+    updates) are queued in order. A feed frame is the whole round so far, so
+    a newer one for a round already queued replaces the older in place and no
+    buzz is lost; that leaves about one event per buzz in the queue, which is
+    bounded by buzz_capacity: beyond it the oldest event is dropped and
+    counted. Feed frames that do not parse are logged and counted, not
+    guessed at. The Qt thread is woken by
+    one queued signal when the buffer goes from empty to non-empty, so the
+    work per wake-up stays flat however fast frames arrive.
+    """
+
+    def __init__(self, events, buzz_capacity=1024):
+        self.events = events
+        self.buzz_capacity = buzz_capacity
+        self._lock = threading.Lock()
+        self._teams = None      # newest teams list
+        self._settings = None   # newest settings dict
+        self._buzzes = deque()  # ["winner" | "feed", value, received_at, feed round]
+        self._feeds = {}        # feed round -> its event in _buzzes
+        self._last_winner = None
+        self._wake_pending = False
+        self._last_teams = None
+        self.frames = 0
+        self.coalesced = 0      # snapshots replaced by a newer one before the Qt thread saw them
+        self.unchanged = 0      # snapshots identical to the previous one, skipped
+        self.overflows = 0      # oldest buzz events dropped beyond buzz_capacity
+        self.unparsed = 0       # frames of a stream that did not have its expected shape
+        self.high_water = 0
+
+    def push(self, kind, data, received_at):
+        # runs on the client thread; kind is the stream the frame was subscribed with
+        if "streamVal" not in data:
+            return  # the subscription's acknowledgement
+        stream_val = data["streamVal"]
+        if kind == "StreamBuzzFeed":
+            feed = parse_buzz_feed(stream_val)
+            parsed = feed is not None
         else:
-            print(f"Warning: No UUID for team {team}")
+            parsed = isinstance(stream_val, dict)
+        if not parsed:
+            with self._lock:
+                self.unparsed += 1
+            log.warning("Unexpected %s frame, ignored: %.200s", kind, stream_val, extra=logs.RATE_LIMITED)
+            return
+        with self._lock:
+            self.frames += 1
+            if kind == "StreamServerState":
+                if "teams" in stream_val:
+                    if self._teams is not None:
+                        self.coalesced += 1
+                    self._teams = stream_val["teams"]
+                if "lastWinner" in stream_val:
+                    winner = stream_val["lastWinner"]
+                    # every state snapshot repeats the winner, only a change is a buzz
+                    if winner and winner != self._last_winner:
+                        self._push_buzz("winner", winner, received_at)
+                    self._last_winner = winner
+            elif kind == "StreamBuzzFeed":
+                self._push_buzz("feed", feed, received_at, feed.get("round") if isinstance(feed, dict) else None)
+            else:
+                if self._settings is not None:
+                    self.coalesced += 1
+                self._settings = stream_val
+            wake = not self._wake_pending
+            self._wake_pending = True
+        if wake:
+            self.events.frames_ready.emit()
 
+    def _push_buzz(self, kind, value, received_at, feed_round=None):
+        if kind == "feed" and feed_round in self._feeds:
+            # BuzzQueue diffs snapshots, the newest has every buzz of the one it replaces;
+            # the older arrival time stays, latency counts from the first frame with news
+            self._feeds[feed_round][1] = value
+            self.coalesced += 1
+            return
+        if len(self._buzzes) >= self.buzz_capacity:
+            dropped = self._buzzes.popleft()
+            self.overflows += 1
+            if dropped[0] == "feed":
+                del self._feeds[dropped[3]]
+        event = [kind, value, received_at, feed_round]
+        self._buzzes.append(event)
+        if kind == "feed":
+            self._feeds[feed_round] = event
+        self.high_water = max(self.high_water, len(self._buzzes))
 
-def set_buzzers_enabled(enabled):
-    global session
-    if session is None:
-        print(f"Cannot set buzzers to {enabled}: No session")
-        return
-    print(f"Setting buzzers to {enabled}")
-    send_buzzer_request({
-        "kind": "SetBuzzersEnabled",
-        "session": session,
-        "enabled": enabled
-    })
+    @metrics.timed(frame_dispatch_time)
+    def drain(self):
+        # runs on the Qt thread
+        with self._lock:
+            self._wake_pending = False
+            server_teams, self._teams = self._teams, None
+            settings, self._settings = self._settings, None
+            buzzes, self._buzzes = self._buzzes, deque()
+            self._feeds = {}
+        # roster first, so a buzz from a team that just joined can be mapped
+        if server_teams is not None:
+            if server_teams == self._last_teams:
+                self.unchanged += 1
+            else:
+                self._last_teams = server_teams
+                self.events.teams_updated.emit(server_teams)
+        if settings is not None:
+            self.events.settings_updated.emit(settings)
+        for kind, value, received_at, _ in buzzes:
+            if kind == "winner":
+                self.events.winner.emit(value, received_at)
+            else:
+                self.events.buzz_feed.emit(value, received_at)
 
+    def summary(self):
+        return (
+            f"Frame buffer: {self.frames} frames, {self.coalesced} coalesced, {self.unchanged} unchanged snapshots skipped, "
+            f"{self.overflows} buzz overflows, buzz queue high water {self.high_water}, {self.unparsed} unparsed"
+        )
 
-def connect_to_buzzer():
-    global buzzer_socket, session
-    try:
-        print("Connecting to buzzer server...")
-        buzzer_socket = ws_client.connect(BUZZER_URL)
-        
-        session = ADMIN_SESSION
-        print(f"Using admin session: {session}")
-        
-        send_buzzer_request({
-            "kind": "StreamServerState",
-            "instance": INSTANCE
-        })
-        send_buzzer_request({
-            "kind": "StreamSettings",
-            "instance": INSTANCE
-        })
-        send_buzzer_request({
-            "kind": "StreamBuzzFeed",
-            "instance": INSTANCE
-        })
-        
+
+class BuzzQueue:
+    """Order in which teams buzzed in the current round, with server timestamps (StreamBuzzFeed)."""
+
+    def __init__(self, room):
+        self.room = room
+        self.round = None
+        self.enabled_at = None
+        self.entries = []  # (team uuid, server time) in buzz order
+
+    def update(self, feed):
+        """Take a feed snapshot; returns the entries that are new since the last one."""
+        buzzes = feed.get("buzzes", []) if isinstance(feed, dict) else feed
+        round_id = feed.get("round") if isinstance(feed, dict) else None
+        entries = [(buzz["uuid"], buzz.get("at")) for buzz in buzzes]
+        if round_id != self.round or entries[:len(self.entries)] != self.entries:
+            # a new round started (or the feed was reset)
+            self.round = round_id
+            self.entries = []
+        if isinstance(feed, dict):
+            self.enabled_at = feed.get("enabledAt")
+        new = entries[len(self.entries):]
+        self.entries = entries
+        return new
+
+    def next_team(self, excluded):
+        for team_uuid, _ in self.entries:
+            team_index = self.room.buzzer_team_map.get(team_uuid)
+            if team_index is not None and team_index not in excluded:
+                return team_index
+        return None
+
+
+class ReactionStats:
+    """Per-team reaction times (buzz time minus arm time, server clock) across the game."""
+
+    def __init__(self, room):
+        self.room = room
+        self.samples = {}  # team uuid -> [ms]
+
+    def observe(self, team_uuid, reaction_ms):
+        self.samples.setdefault(team_uuid, []).append(reaction_ms)
+
+    def summary(self):
+        lines = ["Reaction times:"]
+        for team_uuid, samples in self.samples.items():
+            team_index = self.room.buzzer_team_map.get(team_uuid)
+            name = self.room.teams.get(f"team{team_index}", {}).get("name", team_uuid)
+            ordered = sorted(samples)
+            lines.append(
+                f"  {name}: {len(samples)} buzzes, best {ordered[0]:.0f} ms, "
+                f"median {ordered[len(ordered) // 2]:.0f} ms, mean {sum(samples) / len(samples):.0f} ms"
+            )
+        return "\n".join(lines)
+
+
+class SerialBuzzer:
+    """Local buzzer box on a serial port (see buzzer.ino).
+
+    The box prints the pin index of every pressed buzzer, one per line. A
+    reader thread timestamps each line on arrival and decides the first press
+    locally: presses of the same pin within debounce_ms are ignored, and once
+    a winner is chosen later presses only queue up behind it until the buzzers
+    are re-armed. Pin i buzzes for team index i of the room the box belongs to.
+    """
+
+    def __init__(self, port, baud, events, debounce_ms=30):
+        self.port = port
+        self.baud = baud
+        self.events = events
+        self.debounce = debounce_ms / 1000
+        self.armed = False
+        self.winner = None
+        self.presses = []     # pins in press order since the buzzers were armed
+        self.excluded = set()
+        self.latency = LatencyHistogram("serial line to highlight")
+        self.arbitration = LatencyHistogram("serial line to local decision")
+        self._last_press = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._read_forever, name="serial-buzzer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def set_armed(self, armed):
+        with self._lock:
+            self.armed = armed
+            self.winner = None
+            self.presses = []
+            self.excluded = set()
+
+    def rule_out(self, pin):
+        # after a wrong answer the next pin in press order wins, without re-arming
+        with self._lock:
+            self.excluded.add(pin)
+            self.winner = next((p for p in self.presses if p not in self.excluded), None)
+            winner = self.winner
+        if winner is not None:
+            self.events.local_winner.emit(winner, time.perf_counter())
+
+    def _read_forever(self):
+        import serial
         while True:
-            message = buzzer_socket.recv()
-            buzzer_message_queue.put(message)
-    except Exception as e:
-        print(f"Buzzer connection error: {e}")
-        buzzer_socket = None
+            try:
+                with serial.Serial(self.port, self.baud, timeout=1) as connection:
+                    log.info("Serial buzzer connected on %s at %s baud", self.port, self.baud)
+                    connection.reset_input_buffer()
+                    while True:
+                        line = connection.readline()
+                        if line:
+                            self.on_line(line, time.perf_counter())
+            except (serial.SerialException, OSError) as e:
+                log.warning("Serial buzzer error on %s: %s", self.port, e)
+                time.sleep(1)
+
+    def on_line(self, line, received_at):
+        try:
+            pin = int(line.strip())
+        except ValueError:
+            return
+        with self._lock:
+            last = self._last_press.get(pin)
+            self._last_press[pin] = received_at
+            if last is not None and received_at - last < self.debounce:
+                return
+            if not self.armed:
+                return
+            if pin not in self.presses:
+                self.presses.append(pin)
+            if self.winner is not None or pin in self.excluded:
+                return
+            self.winner = pin
+        self.arbitration.observe(time.perf_counter() - received_at)
+        self.events.local_winner.emit(pin, received_at)
+
+
+def find_serial_port():
+    from serial.tools import list_ports
+    ports = [port.device for port in list_ports.comports() if port.vid is not None]
+    return ports[0] if ports else None
 
 
-def reset_buzzer():
-    global session
-    if session is None:
-        print("Cannot reset buzzer: No session")
+def start_serial_buzzer(room, port, baud):
+    if port == "none":
         return
-    print("Resetting buzzer")
-    send_buzzer_request({
-        "kind": "SetBuzzersEnabled",
-        "session": session,
-        "enabled": False
-    })
-    send_buzzer_request({
-        "kind": "SetBuzzersEnabled",
-        "session": session,
-        "enabled": True
-    })
+    if port == "auto":
+        port = find_serial_port()
+        if port is None:
+            log.info("No serial buzzer found")
+            return
+    room.serial_buzzer = SerialBuzzer(port, baud, room.events)
+    room.serial_buzzer.start()
 
 
-def start_buzzer_connection():
-    thread = threading.Thread(target=connect_to_buzzer, daemon=True)
-    thread.start()
-    time.sleep(1)
-    process_buzzer_messages()
+def team_index_of(team):
+    return int(team.replace("team", ""))
 
 
-def process_buzzer_messages():
-    global teams_initialized
-    while not buzzer_message_queue.empty():
-        try:
-            message = buzzer_message_queue.get_nowait()
-            data = json.loads(message)
-            
-            print(f"Received from server: {json.dumps(data)}")
-            
-            if "streamVal" in data:
-                stream_val = data["streamVal"]
-                
-                if "teams" in stream_val:
-                    if not teams_initialized:
-                        initialize_teams_from_server(stream_val["teams"])
-                    else:
-                        for team in stream_val["teams"]:
-                            team_uuid = team["uuid"]
-                            team_name = team["name"]
-                            if team_uuid not in buzzer_team_map:
-                                team_index = len(buzzer_team_map)
-                                buzzer_team_map[team_uuid] = team_index
-                                team_uuid_map[team_index] = team_uuid
-        except Exception as e:
-            print(f"Error processing buzzer message: {e}")
-
-
-def initialize_teams_from_server(server_teams):
-    global teams, buzzer_team_map, team_uuid_map, teams_initialized
-    
-    print(f"Initializing teams from server. server_teams: {server_teams}")
-    print(f"Before: buzzer_team_map={buzzer_team_map}, team_uuid_map={team_uuid_map}")
-    
-    teams.clear()
-    buzzer_team_map.clear()
-    team_uuid_map.clear()
-    
-    for team in server_teams:
-        if team.get("isLobby", False):
-            continue
-            
-        team_uuid = team["uuid"]
-        team_name = team["name"]
-        
-        if team_uuid in buzzer_team_map:
-            continue
-            
-        team_index = len(buzzer_team_map)
-        buzzer_team_map[team_uuid] = team_index
-        team_uuid_map[team_index] = team_uuid
-        
-        teamkey = f"team{team_index}"
-        teams[teamkey] = {
-            "name": team_name,
-            "score": team.get("score", 0)
-        }
-        print(f"  Mapped {team_name} (uuid={team_uuid}) to {teamkey}")
-    
-    teams.sync()
-    teams_initialized = True
-    print(f"Initialized {len(teams)} teams from server")
-    print(f"After: buzzer_team_map={buzzer_team_map}, team_uuid_map={team_uuid_map}")
-        
+class RosterSync:
+    """Keeps the local roster in step with the server's, keyed by team uuid.
+
+    Every state snapshot is diffed against the one applied before, so only
+    teams that joined, left, went to the lobby or were renamed reach the
+    engine and the UI. Names typed locally are debounced: the journal write
+    and the SetTeamName request go out once the operator stops typing, and
+    the server's old name is ignored until it confirms the new one.
+    """
+
+    def __init__(self, room, debounce_ms=750):
+        self.room = room
+        self.debounce_ms = debounce_ms
+        self.seen = {}       # team uuid -> (name, isLobby) as last applied
+        self.pending = {}    # team key -> name typed locally, not written yet
+        self.in_flight = {}  # team uuid -> name sent with SetTeamName, not confirmed yet
+        self.applied = 0     # team changes applied from snapshots
+        self.typed = 0       # local edits
+        self.sent = 0        # SetTeamName requests
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def reset(self, server_teams):
+        self.seen = {team["uuid"]: (team["name"], team.get("isLobby", False)) for team in server_teams}
+
+    def apply(self, server_teams):
+        current = {team["uuid"]: team for team in server_teams}
+        for team_uuid, team in current.items():
+            state = (team["name"], team.get("isLobby", False))
+            if self.seen.get(team_uuid) == state:
+                continue
+            self.seen[team_uuid] = state
+            self.applied += 1
+            self._apply_team(team_uuid, *state)
+        for team_uuid in [u for u in self.seen if u not in current]:
+            del self.seen[team_uuid]
+            self.applied += 1
+            self._apply_team(team_uuid, None, True)
+
+    def _apply_team(self, team_uuid, name, lobby):
+        room = self.room
+        teams = room.teams
+        team_index = room.buzzer_team_map.get(team_uuid)
+        key = f"team{team_index}"
+        if lobby:
+            if team_index is not None and not teams.get(key, {}).get("away"):
+                room.log.info("Team %s left", key)
+                room.engine.leave(key)
+            return
+        if team_index is None:
+            # indices are never reused, the journal refers to teams by key
+            team_index = max(room.team_uuid_map, default=-1) + 1
+            room.buzzer_team_map[team_uuid] = team_index
+            room.team_uuid_map[team_index] = team_uuid
+            key = f"team{team_index}"
+            room.log.info("Team %s joined as %s (uuid=%s)", name, key, team_uuid)
+            room.engine.join(key, name, team_uuid)
+            room.sync_all_team_points()
+            return
+        if teams.get(key, {}).get("away") or key not in teams:
+            room.log.info("Team %s is back as %s", key, name)
+            room.engine.join(key, name)
+            return
+        with self._lock:
+            sent = self.in_flight.get(team_uuid)
+            if sent is not None:
+                if sent == name:
+                    del self.in_flight[team_uuid]
+                # until the server confirms our name, its old one is stale
+                return
+        if key in self.pending or teams[key]["name"] == name:
+            return
+        room.engine.rename(key, name)
+
+    def rename_local(self, team, name):
+        self.pending[team] = name
+        self.typed += 1
+        if self._timer is None:
+            self._timer = QTimer()
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self.flush)
+        self._timer.start(self.debounce_ms)
+
+    def flush(self):
+        room = self.room
+        pending, self.pending = self.pending, {}
+        for team, name in pending.items():
+            if team not in room.teams or room.teams[team]["name"] == name:
+                continue
+            room.engine.rename(team, name)
+            team_uuid = room.team_uuid_map.get(team_index_of(team))
+            if team_uuid is None or room.session is None:
+                continue
+            with self._lock:
+                self.in_flight[team_uuid] = name
+            future = room.request({"kind": "SetTeamName", "session": room.session, "teamId": team_uuid, "name": name})
+            if future is None:
+                with self._lock:
+                    self.in_flight.pop(team_uuid, None)
+                continue
+            self.sent += 1
+            future.add_done_callback(lambda f, u=team_uuid, n=name: self._on_reply(u, n, f))
+
+    def _on_reply(self, team_uuid, name, future):
+        # runs on the buzzer client thread
+        reply = None if future.exception() is not None else future.result()
+        if reply is None or "error" in reply:
+            self.room.log.warning("Server did not take the name %r for %s: %s", name, team_uuid, future.exception() or reply.get("error"))
+            with self._lock:
+                if self.in_flight.get(team_uuid) == name:
+                    del self.in_flight[team_uuid]
+
+    def summary(self):
+        return f"Roster sync: {self.applied} team changes applied, {self.typed} name edits sent as {self.sent} SetTeamName"
+
 
 question_dir = QUESTION_DIR
 
 
-teams = shelve.open("teams.db", writeback=True)
-point_dict = shelve.open("points.db", writeback=True)
-additional_points = shelve.open("additional_points.db", writeback=True)
+class QuestionCatalog(QObject):
+    """Index of question_dir/<category>/<points>.<ext>.
+
+    Categories are only re-listed when their directory mtime changed, so a
+    rescan costs one stat per category. Once watch() is called, changes on
+    disk are picked up through QFileSystemWatcher and reported as
+    ("added" | "removed" | "updated", category, points) tuples.
+    """
+
+    changed = Signal(object)
 
-categories = sorted(os.listdir(question_dir))
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+        self.categories = []
+        self.files = {}    # category -> points -> filename
+        self._mtimes = {}  # category -> (directory mtime, {points: file mtime})
+        self._dirty = set()
+        self._watcher = None
+        self._timer = None
+
+    def scan(self, force=()):
+        changes = []
+        seen = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.is_dir():
+                    continue
+                seen.append(entry.name)
+                changes += self._scan_category(entry, entry.name in force)
+        for category in [c for c in self.files if c not in seen]:
+            changes += [("removed", category, points) for points in self.files.pop(category)]
+            self._mtimes.pop(category, None)
+        self.categories[:] = sorted(seen)
+        return changes
+
+    def _scan_category(self, dir_entry, force):
+        category = dir_entry.name
+        dir_mtime = dir_entry.stat().st_mtime_ns
+        cached = self._mtimes.get(category)
+        if cached is not None and cached[0] == dir_mtime and not force:
+            return []
+        old_files = self.files.get(category, {})
+        old_mtimes = cached[1] if cached is not None else {}
+        files = {}
+        mtimes = {}
+        with os.scandir(dir_entry.path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                points = parse_question_filename(entry.name)
+                if points is None:
+                    if "disabled" not in entry.name and not entry.name.startswith("."):
+                        log.warning("Ignoring question file %s/%s: name is not <points>.<ext>", category, entry.name)
+                    continue
+                files[points] = entry.name
+                mtimes[points] = entry.stat().st_mtime_ns
+        changes = []
+        for points, filename in files.items():
+            if points not in old_files:
+                changes.append(("added", category, points))
+            elif old_files[points] != filename or old_mtimes.get(points) != mtimes[points]:
+                changes.append(("updated", category, points))
+        changes += [("removed", category, points) for points in old_files if points not in files]
+        self.files[category] = files
+        self._mtimes[category] = (dir_mtime, mtimes)
+        return changes
+
+    def watch(self):
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_path_changed)
+        self._watcher.fileChanged.connect(self._on_path_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._rescan)
+        self._update_watched_paths()
+
+    def _update_watched_paths(self):
+        wanted = {self.root}
+        for category, files in self.files.items():
+            category_dir = os.path.join(self.root, category)
+            wanted.add(category_dir)
+            wanted.update(os.path.join(category_dir, filename) for filename in files.values())
+        watched = set(self._watcher.files()) | set(self._watcher.directories())
+        if wanted - watched:
+            self._watcher.addPaths(sorted(wanted - watched))
+        if watched - wanted:
+            self._watcher.removePaths(sorted(watched - wanted))
+
+    def _on_path_changed(self, path):
+        # editors tend to write in bursts, so collect changes briefly before rescanning
+        relative = os.path.relpath(path, self.root)
+        if relative != ".":
+            self._dirty.add(relative.split(os.sep)[0])
+        self._timer.start(200)
+
+    def _rescan(self):
+        dirty, self._dirty = self._dirty, set()
+        changes = self.scan(force=dirty)
+        self._update_watched_paths()
+        if changes:
+            log.info("Question directory changed: %s", changes)
+            self.changed.emit(changes)
+
+
+catalog : "QuestionCatalog | None" = None
+categories = []
 question_file = {} # category -> points -> filename
-for category in categories:
-    question_file[category] = {}
-    for filename in os.listdir(os.path.join(question_dir, category)):
-        if "disabled" in filename:
-            continue
-        points = int(filename.split(".")[0])
-        question_file[category][points] = filename
+
+
+question_pack : "QuestionPack | None" = None
+
+
+def open_catalog():
+    global catalog, categories, question_file, question_pack
+    if QUESTION_PACK:
+        # a pack is fixed at build time, there is nothing to scan or watch
+        load_qt()
+        question_pack = QuestionPack(QUESTION_PACK)
+        categories = question_pack.categories
+        question_file = question_pack.files
+        log.info("Opened question pack %s: %d questions", QUESTION_PACK, sum(len(files) for files in question_file.values()))
+        return
+    catalog = QuestionCatalog(question_dir)
+    catalog.scan()
+    categories = catalog.categories
+    question_file = catalog.files
             
-score_buttons = {}
-point_buttons = {}
-mainWindow : "MainWindow | None" = None
-
-def recompute_scores():
-    scores = {}
-    for team in teams:
-        scores[team] = 0
-    for category, data in point_dict.items():
-        for point_value, teamdata in data.items():
-            for team, awarded_score in teamdata:
-                if team not in scores:
-                    print(f"Invalid team {team} in for category {category} and score {point_value}")
-                    continue
-                scores[team] += awarded_score
-                
-    for team, deltas in additional_points.items():
-        for delta in deltas:
-            if team not in scores:
-                print(f"Invalid team {team} in additional points")
+
+
+class QuestionAssetCache(QObject):
+    """Decodes and scales question files on a worker pool so opening a tile is a lookup.
+
+    Text is read and images are decoded and scaled to the display size in the
+    background; audio and video files are read into memory for MediaPlayers.
+    Workers only produce QImages and bytes: a finished load crosses to the GUI
+    thread through the queued finished signal, which stores it in an LRU
+    bounded by max_bytes, so pixmaps are only created and dropped there. An
+    evicted or not yet loaded question is loaded synchronously on demand. With
+    a question pack open, loading is a slice of the mapped pack instead.
+    """
+    finished = Signal(object, object)  # (category, score), its future, from a worker thread
+    ready = Signal(object)             # (category, score) is cached, its waiters run from the event loop
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, workers=4):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.target_size = QSize(800, 600)
+        self.device_pixel_ratio = 1.0
+        self._entries = OrderedDict()  # (category, score) -> (kind, content, nbytes), GUI thread only
+        self._bytes = 0
+        self._pending = {}  # (category, score) -> future, GUI thread only
+        self._waiters = {}  # (category, score) -> [callback(key)], GUI thread only
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="question-assets")
+        self.finished.connect(self._on_finished, Qt.ConnectionType.QueuedConnection)
+        self.ready.connect(self._notify, Qt.ConnectionType.QueuedConnection)
+
+    def preload(self, question_file, target_size, device_pixel_ratio=1.0):
+        self.target_size = target_size
+        self.device_pixel_ratio = device_pixel_ratio
+        for category, files in question_file.items():
+            for score in files:
+                key = (category, score)
+                if key not in self._pending and key not in self._entries:
+                    self._submit(key)
+        log.info("Preloading %d questions at %dx%d", len(self._pending), target_size.width(), target_size.height())
+
+    def refresh(self, key, removed=False):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+        self._pending.pop(key, None)
+        if not removed:
+            self._submit(key)
+
+    def get(self, category, score):
+        key = (category, score)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        else:
+            future = self._pending.pop(key, None)
+            entry = future.result() if future is not None else self._load(key)
+        kind, content, nbytes = entry
+        if kind == "image" and isinstance(content, QImage):
+            # pixmaps may only be created on the GUI thread, convert once on first use
+            content = QPixmap.fromImage(content)
+            entry = (kind, content, nbytes)
+        self._store(key, entry)
+        if key in self._waiters:
+            self.ready.emit(key)
+        return kind, content
+
+    def loaded(self, key):
+        return key in self._entries
+
+    def when_loaded(self, key, callback):
+        """Call callback(key) once key is cached, always later from the event loop and
+        never from within this call; not at all if it cannot be read."""
+        self._waiters.setdefault(key, []).append(callback)
+        if key in self._entries:
+            self.ready.emit(key)
+        elif key not in self._pending:
+            self._submit(key)
+
+    def _submit(self, key):
+        future = self._pending[key] = self._pool.submit(self._load, key)
+        future.add_done_callback(lambda f: self.finished.emit(key, f))
+        return future
+
+    def _on_finished(self, key, future):
+        if self._pending.get(key) is not future:
+            return  # taken by get() or superseded by refresh()
+        del self._pending[key]
+        if future.exception() is not None:
+            log.warning("Cannot load question %s/%s: %s", *key, future.exception())
+            self._waiters.pop(key, None)
+            return
+        self._store(key, future.result())
+        self._notify(key)
+
+    def _notify(self, key):
+        if key not in self._waiters:
+            return
+        if key not in self._entries:
+            # evicted before its waiters ran: read it again rather than call them with nothing
+            if key not in self._pending:
+                self._submit(key)
+            return
+        for callback in self._waiters.pop(key):
+            callback(key)
+
+    def _load(self, key):
+        category, score = key
+        filename = question_file[category][score]
+        path = os.path.join(question_dir, category, filename)
+        kind = question_pack.entry(category, score)["kind"] if question_pack is not None else question_kind(filename)
+        if question_pack is not None:
+            if kind == "text":
+                question = question_pack.text(category, score)
+                return ("text", question, len(question))
+            if kind in MEDIA_KINDS:
+                data = question_pack.media(category, score)
+                return (kind, data, len(data))
+            target = self.target_size
+            img = question_pack.image(category, score, target.width(), target.height(), self.device_pixel_ratio)
+            return ("image", img, img.sizeInBytes())
+        if kind == "text":
+            with open(path, "r") as f:
+                question = f.read()
+            return ("text", question, len(question))
+        if kind in MEDIA_KINDS:
+            with open(path, "rb") as f:
+                data = f.read()
+            return (kind, data, len(data))
+        img = QImage(path)
+        img = img.scaled(self.target_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        img.setDevicePixelRatio(self.device_pixel_ratio)
+        return ("image", img, img.sizeInBytes())
+
+    def _store(self, key, entry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        self._entries[key] = entry
+        self._bytes += entry[2]
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted[2]
+
+
+def preload_question_assets():
+    # scale for the screen in use, leaving room for the award buttons below the question
+    screen = QGuiApplication.primaryScreen()
+    if screen is None:
+        question_assets.preload(question_file, QSize(800, 600))
+        return
+    ratio = screen.devicePixelRatio()
+    available = screen.availableGeometry().size() * ratio
+    target = QSize(int(available.width() * 0.9), int(available.height() * 0.65))
+    question_assets.preload(question_file, target, ratio)
+
+
+question_assets = QuestionAssetCache()
+
+QMediaPlayer = None  # Qt Multimedia is only imported once the board has audio or video
+multimedia_error = None
+MEDIA_LABELS = {"audio": "\u266a", "video": "\u25b6"}
+
+
+def load_multimedia():
+    """Import Qt Multimedia on first use; False if it cannot be loaded here."""
+    global QMediaPlayer, QAudioOutput, QVideoWidget, multimedia_error
+    if QMediaPlayer is not None:
+        return True
+    if multimedia_error is not None:
+        return False
+    try:
+        from PySide6.QtMultimedia import QAudioOutput, QMediaPlayer
+        from PySide6.QtMultimediaWidgets import QVideoWidget
+    except ImportError as e:
+        multimedia_error = str(e)
+        log.warning("Qt Multimedia is not available, audio and video questions will not play: %s", e)
+        return False
+    return True
+
+
+class MediaPlayers(QObject):
+    """Players for a room's next unanswered audio and video questions, set up
+    ahead so that opening one only has to start playback.
+
+    The asset cache reads the files on its worker pool; as soon as one is in,
+    a player gets it as its source and Qt opens and probes it on its own
+    threads while the board is idle. At most `limit` players wait at a time,
+    a question without one gets a player when it is opened.
+    """
+
+    def __init__(self, room, limit=3):
+        super().__init__()
+        self.room = room
+        self.limit = limit
+        self.players = {}    # (category, score) -> QMediaPlayer with its source set
+        self.waiting = set()  # keys whose files are being read, one when_loaded() each
+
+    def upcoming(self):
+        for category in categories:
+            files = question_file.get(category, {})
+            for score in sorted(files):
+                if question_kind(files[score]) in MEDIA_KINDS and not self.room.engine.is_answered(category, score):
+                    yield category, score
+
+    def prime(self, *_):
+        wanted = list(itertools.islice(self.upcoming(), self.limit))
+        for key in [key for key in self.players if key not in wanted]:
+            self.discard(key)
+        if not wanted or not load_multimedia():
+            return
+        for key in wanted:
+            if key in self.players or key in self.waiting:
                 continue
-            scores[team] += delta
-            
-    for team, score in scores.items():
-        if team not in score_buttons:
-            print(f"Invalid team {team} in score buttons")
-            continue
-        score_buttons[team].setText(str(score))
-        teams[team].update({"score": score})
-         
+            if question_assets.loaded(key):
+                self.players[key] = self.create(key)
+            else:
+                self.waiting.add(key)
+                question_assets.when_loaded(key, self._on_loaded)
+
+    def _on_loaded(self, key):
+        if key not in self.waiting:
+            return  # discarded while it was read
+        self.waiting.discard(key)
+        self.prime()
+
+    def create(self, key):
+        category, score = key
+        _, data = question_assets.get(category, score)
+        player = QMediaPlayer(self)
+        player.setAudioOutput(QAudioOutput(player))
+        source = QBuffer(player)
+        source.setData(QByteArray(data))
+        source.open(QIODevice.OpenModeFlag.ReadOnly)
+        # the file name tells the backend the container format
+        player.setSourceDevice(source, QUrl(question_file[category][score]))
+        player.errorOccurred.connect(lambda _, message: self.room.log.warning("Cannot play %s %s: %s", category, score, message))
+        return player
+
+    def take(self, key):
+        """The player for key, ready or not; the caller releases it."""
+        player = self.players.pop(key, None)
+        return player if player is not None else self.create(key)
+
+    def release(self, player):
+        player.stop()
+        player.deleteLater()
+        self.prime()
+
+    def discard(self, key):
+        self.waiting.discard(key)
+        player = self.players.pop(key, None)
+        if player is not None:
+            player.deleteLater()
+
+
+QUESTION_WINDOW_STYLE = """
+QWidget { background-color: white; color: black; font-size: 20px; font-weight: bold; }
+QPushButton { background-color: darkblue; color: yellow; }
+QPushButton[buzzed="true"] { background-color: green; color: white; }
+QPushButton#wrong { background-color: red; }
+"""
+
+_icons = {}
+
+
+def shared_icon(path="P.png"):
+    if path not in _icons:
+        _icons[path] = QIcon(path)
+    return _icons[path]
+
+
+def set_buzzed(button, buzzed):
+    # flip a style property and re-polish just this button instead of re-parsing a stylesheet
+    button.setProperty("buzzed", buzzed)
+    button.style().unpolish(button)
+    button.style().polish(button)
+
 
 class QuestionWindow(QWidget):
-    def __init__(self, category, score, override=False):
-        super().__init__()
-        print("Creating question window for", category, score, f"(override: {override})")
+    """The question view. Created once and reused: each question only swaps the
+    content and resets the buzz state; team buttons are rebuilt only when the
+    team set changes. Audio and video pause while a team that buzzed answers
+    and play on after Reset."""
+
+    question_changed = Signal()  # shown, buzzed, cleared or closed
+
+    @metrics.timed(question_build_time)
+    def __init__(self, room, parent=None):
+        # parented to its room's board: window modal, it blocks that board and not the other rooms
+        super().__init__(parent)
+        self.room = room
         layout = QVBoxLayout()
         
-        self.category = category
-        self.score = score
+        self.category = None
+        self.score = None
         self.input = -1
         self.team_buttons = []
-        self.override = override
+        self.button_positions = {}  # team index -> position in team_buttons
+        self.team_row_key = None
+        self.ruled_out = set()      # team indices that already answered wrong
+        self.override = False
+        self.player = None          # QMediaPlayer of an audio or video question
+        self.media_paused = False   # paused for a buzz, not by the player itself
+        self.video_widget = None    # created with the first video question
         
-        filename = question_file[category][score]
-        if filename.endswith(".txt"):
-            with open(os.path.join(question_dir, category, filename), "r") as f:
-                question = f.read()
-            lbl = QLabel(question)
-            lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            lbl.setWordWrap(True)
-            layout.addWidget(lbl)
-        else:
-            print("image file", filename)
-            img = QImage(os.path.join(question_dir, category, filename))
-            img = img.scaled(800, 600, Qt.AspectRatioMode.KeepAspectRatio)
-            lbl = QLabel()
-            lbl.setPixmap(QPixmap(img))
-            lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(lbl)
+        self.question_label = QLabel()
+        self.question_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.question_label)
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            
         
         award_layout = QHBoxLayout()
-        for team, data in sorted(teams.items(), key=lambda x: x[0]):
+        self.award_layout = award_layout
+        self.team_row = QWidget()
+        award_layout.addWidget(self.team_row)
+            
+        additional_layout = QVBoxLayout()
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.on_close)
+        close_button.setMinimumHeight(60)
+        close_button.setMinimumWidth(200)
+        
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset_team_buttons)
+        reset_button.setMinimumHeight(60)
+        reset_button.setMinimumWidth(200)
+        
+        
+        nobody_button = QPushButton("Nobody")
+        nobody_button.clicked.connect(lambda _: self.nobody_points(self.category, self.score))
+        nobody_button.setMinimumHeight(60)
+        nobody_button.setMinimumWidth(200)
+        
+        additional_layout.addWidget(close_button)
+        additional_layout.addWidget(reset_button)
+        additional_layout.addWidget(nobody_button)
+        additional_layout.setSpacing(0)
+        
+        additional_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        award_layout.addLayout(additional_layout)
+            
+        layout.addLayout(award_layout)
+        self.setStyleSheet(QUESTION_WINDOW_STYLE)
+        self.setLayout(layout)
+        self.setAttribute(Qt.WidgetAttribute.WA_AlwaysStackOnTop)
+        self.setWindowModality(Qt.WindowModality.WindowModal)
+        self.setWindowFlags(Qt.WindowType.Window | Qt.WindowType.WindowStaysOnTopHint)
+        
+    @metrics.timed(question_buttons_time)
+    def rebuild_team_buttons(self):
+        team_row = QWidget()
+        award_layout = QHBoxLayout(team_row)
+        award_layout.setContentsMargins(0, 0, 0, 0)
+        self.team_buttons = []
+        self.button_positions = {}
+        for team, data in self.room.sorted_teams():
+            self.button_positions[team_index_of(team)] = len(self.team_buttons)
             button = QPushButton(f"Award {data['name']}")
-            button.setStyleSheet("background-color: darkblue; color: yellow; font-size: 20px; font-weight: bold;")
             button.setIconSize(QSize(50, 50))
-            button.setIcon(QIcon("P.png"))
+            button.setIcon(shared_icon())
              
             button.setMinimumHeight(75)
             button.setMinimumWidth(200)
-            button.clicked.connect(lambda _, t=team, c=category, s=score: self.award_points(t, c, s))
+            button.clicked.connect(lambda _, t=team: self.award_points(t, self.category, self.score))
             
             no_answer_btn = QPushButton(f"No Question")
-            no_answer_btn.setStyleSheet("background-color: darkblue; color: yellow; font-size: 20px; font-weight: bold;")
             no_answer_btn.setMinimumHeight(25)
             no_answer_btn.setMinimumWidth(175)
-            no_answer_btn.clicked.connect(lambda _, t=team, c=category, s=score: self.award_points(t, c, s, False))
+            no_answer_btn.clicked.connect(lambda _, t=team: self.award_points(t, self.category, self.score, False))
             
             wrong_btn = QPushButton(f"X")
-            wrong_btn.setStyleSheet("background-color: red; color: yellow; font-size: 20px; font-weight: bold;")
+            wrong_btn.setObjectName("wrong")
             wrong_btn.setMinimumHeight(25)
             wrong_btn.setMinimumWidth(25)
             wrong_btn.setMaximumWidth(25)
-            wrong_btn.clicked.connect(lambda _, t=team, c=category, s=score: self.wrong_answer(t,c,s))
+            wrong_btn.clicked.connect(lambda _, t=team: self.wrong_answer(t, self.category, self.score))
             
             extra_btn = QHBoxLayout()
             extra_btn.addWidget(no_answer_btn)
@@ -335,403 +1446,482 @@ class QuestionWindow(QWidget):
             
             award_layout.addLayout(button_layout)
             self.team_buttons.append((button, (no_answer_btn,wrong_btn)))
-            
-        additional_layout = QVBoxLayout()
-        close_button = QPushButton("Close")
-        close_button.setStyleSheet("background-color: darkblue; color: yellow; font-size: 20px; font-weight: bold;")
-        close_button.clicked.connect(self.on_close)
-        close_button.setMinimumHeight(60)
-        close_button.setMinimumWidth(200)
-        
-        reset_button = QPushButton("Reset")
-        reset_button.setStyleSheet("background-color: darkblue; color: yellow; font-size: 20px; font-weight: bold;")
-        reset_button.clicked.connect(self.reset_team_buttons)
-        reset_button.setMinimumHeight(60)
-        reset_button.setMinimumWidth(200)
+        self.award_layout.replaceWidget(self.team_row, team_row)
+        self.team_row.deleteLater()
+        self.team_row = team_row
         
+    @metrics.timed(question_show_time)
+    def show_question(self, category, score, override=False):
+        self.room.log.info("Showing question %s %s (override: %s)", category, score, override)
+        self.category = category
+        self.score = score
+        self.override = override
         
-        nobody_button = QPushButton("Nobody")
-        nobody_button.setStyleSheet("background-color: darkblue; color: yellow; font-size: 20px; font-weight: bold;")
-        nobody_button.clicked.connect(lambda _, c=category, s=score: self.nobody_points(c, s))
-        nobody_button.setMinimumHeight(60)
-        nobody_button.setMinimumWidth(200)
-        
-        additional_layout.addWidget(close_button)
-        additional_layout.addWidget(reset_button)
-        additional_layout.addWidget(nobody_button)
-        additional_layout.setSpacing(0)
+        team_row_key = tuple(team for team, _ in self.room.sorted_teams())
+        if team_row_key != self.team_row_key:
+            self.rebuild_team_buttons()
+            self.team_row_key = team_row_key
+        for (button, _), (team, data) in zip(self.team_buttons, self.room.sorted_teams()):
+            label = f"Award {data['name']}"
+            if button.text() != label:
+                button.setText(label)
+        self.clear_buzz()
+        self.ruled_out = set()
         
-        additional_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        award_layout.addLayout(additional_layout)
-            
-        layout.addLayout(award_layout)
-        self.setStyleSheet("background-color: white; color: black; font-size: 20px; font-weight: bold;")
-        self.setLayout(layout)
-        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
-        self.setAttribute(Qt.WidgetAttribute.WA_AlwaysStackOnTop)
-        self.setWindowModality(Qt.WindowModality.ApplicationModal)
-        self.setWindowFlags(Qt.WindowType.Window | Qt.WindowType.WindowStaysOnTopHint)
-        self.destroyed.connect(self.on_close)
+        kind, content = question_assets.get(category, score)
+        self.question_label.show()
+        if self.video_widget is not None:
+            self.video_widget.hide()
+        if kind == "text":
+            self.question_label.setWordWrap(True)
+            self.question_label.setText(content)
+        elif kind in MEDIA_KINDS:
+            self.question_label.setWordWrap(True)
+            self.question_label.setText(MEDIA_LABELS[kind] if load_multimedia() else f"{MEDIA_LABELS[kind]}\n(Qt Multimedia is not available)")
+        else:
+            self.question_label.setWordWrap(False)
+            self.question_label.setPixmap(content)
         self.setWindowTitle(f"Question for {category} {score}")
+        self.show()
+        if kind in MEDIA_KINDS:
+            self.play_media(kind, category, score)
+        self.question_changed.emit()
         
-        if buzzer_socket is not None:
-            print("Starting buzzer message polling")
-            reset_buzzer()
-            set_buzzers_enabled(True)
-            self.timer = QTimer(self)
-            self.timer.timeout.connect(self.poll_buzzer)
-            self.timer.start(100)
+        if self.room.client is not None:
+            self.room.reset_buzzer()
+            self.room.set_buzzers_enabled(True)
         else:
-            print("No buzzer connection found, skipping polling")
-            self.timer = None
+            self.room.log.warning("No buzzer connection found")
         
-    def reset_team_buttons(self):
-        for button, _ in self.team_buttons:
-            button.setStyleSheet("background-color: darkblue; color: yellow; font-size: 20px; font-weight: bold;")
+    def play_media(self, kind, category, score):
+        if not load_multimedia():
+            return
+        self.player = self.room.media.take((category, score))
+        if kind == "video":
+            if self.video_widget is None:
+                self.video_widget = QVideoWidget()
+                self.video_widget.setMinimumSize(question_assets.target_size / question_assets.device_pixel_ratio)
+                self.layout().insertWidget(1, self.video_widget)
+            self.player.setVideoOutput(self.video_widget)
+            self.question_label.hide()
+            self.video_widget.show()
+        self.media_paused = False
+        self.player.play()
+
+    def pause_media(self):
+        if self.player is not None and self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+            self.player.pause()
+            self.media_paused = True
+
+    def resume_media(self):
+        if self.player is not None and self.media_paused:
+            self.player.play()
+        self.media_paused = False
+
+    def stop_media(self):
+        if self.player is not None:
+            self.room.media.release(self.player)
+            self.player = None
+        self.media_paused = False
+
+    def clear_buzz(self):
+        if self.input in self.button_positions:
+            set_buzzed(self.team_buttons[self.button_positions[self.input]][0], False)
         self.input = -1
-        reset_buzzer()
+        self.question_changed.emit()
+        
+    def reset_team_buttons(self):
+        self.clear_buzz()
+        self.ruled_out = set()
+        self.room.reset_buzzer()
+        self.resume_media()
             
-    def poll_buzzer(self):
-        global teams_initialized
-        while not buzzer_message_queue.empty():
-            try:
-                message = buzzer_message_queue.get_nowait()
-                data = json.loads(message)
-                
-                if "streamVal" in data:
-                    stream_val = data["streamVal"]
-                    
-                    if "teams" in stream_val:
-                        if not teams_initialized:
-                            initialize_teams_from_server(stream_val["teams"])
-                        else:
-                            for team in stream_val["teams"]:
-                                team_uuid = team["uuid"]
-                                team_name = team["name"]
-                                if team_uuid not in buzzer_team_map:
-                                    team_index = len(buzzer_team_map)
-                                    buzzer_team_map[team_uuid] = team_index
-                                    team_uuid_map[team_index] = team_uuid
-                    
-                    if "lastWinner" in stream_val and stream_val["lastWinner"]:
-                        winner_uuid = stream_val["lastWinner"]
-                        if winner_uuid in buzzer_team_map and self.input == -1:
-                            team_index = buzzer_team_map[winner_uuid]
-                            if team_index < len(self.team_buttons):
-                                print("Team", team_index, "buzzed in")
-                                self.input = team_index
-                                team, _ = self.team_buttons[team_index]
-                                team.setStyleSheet("background-color: green; color: white; font-size: 20px; font-weight: bold;")
-                
-                if self.input != -1:
-                    while not buzzer_message_queue.empty():
-                        buzzer_message_queue.get()
-            except Exception as e:
-                print(f"Error processing buzzer message: {e}")
+    def on_buzz(self, team_index):
+        if self.input != -1 or team_index in self.ruled_out:
+            return False
+        if team_index not in self.button_positions:
+            return False
+        self.room.log.info("Team %s buzzed in", team_index)
+        self.input = team_index
+        team, _ = self.team_buttons[self.button_positions[team_index]]
+        set_buzzed(team, True)
+        self.pause_media()
+        self.question_changed.emit()
+        return True
+        
+    def next_in_line(self, team):
+        # hand the question to the next team that buzzed, without re-arming the buzzers
+        team_index = team_index_of(team)
+        self.ruled_out.add(team_index)
+        self.clear_buzz()
+        if self.room.serial_buzzer is not None:
+            self.room.serial_buzzer.rule_out(team_index)
+        next_index = self.room.buzz_queue.next_team(self.ruled_out)
+        if next_index is not None and self.on_buzz(next_index):
+            self.room.log.info("Next in line: team %s", next_index)
         
         
     def on_close(self):
-        print("Closing question window for", self.category, self.score)
-        set_normal_button(self.category, self.score)
-        if self.timer is not None:
-            self.timer.stop()
-        set_buzzers_enabled(False)
-        self.close()
-        assert mainWindow is not None
-        mainWindow.open_question = None
+        if self.category is None:
+            return
+        self.room.log.info("Closing question window for %s %s", self.category, self.score)
+        self.room.set_normal_button(self.category, self.score)
+        self.finish()
+        
+    def finish(self):
+        self.room.set_buzzers_enabled(False)
+        self.stop_media()
+        self.category = None
+        self.hide()
+        self.room.main_window.open_question = None
+        self.question_changed.emit()
+        
+    def closeEvent(self, event):
+        # closing the window itself behaves like the Close button
+        self.on_close()
+        event.accept()
         
     def wrong_answer(self, team, category, score):
-        print("Wrong answer for team", team)
-        if team not in teams:
-            print(f"Invalid team {team} in for category {category} and score {score}")
+        self.room.log.info("Wrong answer for team %s", team)
+        if team not in self.room.teams:
+            self.room.log.warning("Invalid team %s in for category %s and score %s", team, category, score)
             return
-        self.reset_team_buttons()
-        if category not in point_dict:
-            point_dict[category] = {}
-        if score not in point_dict[category]:
-            point_dict[category][score] = []
+        self.next_in_line(team)
         
         if self.override:
-            print(f"Overriding existing points for {category} {score}")
-            point_dict[category][score] = []
-        
-        point_dict[category][score].append((team, -score))
-        recompute_scores()
-        sync_all_team_points()
-        
-        point_dict.sync()
+            self.room.log.info("Overriding existing points for %s %s", category, score)
+        self.room.engine.wrong(team, category, score, override=self.override)
+        # only the first answer replaces the old result, later ones add to it
+        self.override = False
+        self.room.sync_all_team_points()
          
         
     def nobody_points(self,category, score):
-        if category not in point_dict:
-            point_dict[category] = {}
-        if score not in point_dict[category]:
-            point_dict[category][score] = []
-        if self.timer is not None:
-            self.timer.stop()
-        
         if self.override:
-            print(f"Overriding existing points for {category} {score}")
-            point_dict[category][score] = []
-        
-        point_dict[category][score].append(("-", 0))
-        disable_button(category, score)
-        recompute_scores()
-        sync_all_team_points()
-        point_dict.sync()
-        set_buzzers_enabled(False)
-        self.close()
-        assert mainWindow is not None
-        assert mainWindow.open_question is not None
-        mainWindow.open_question = None
+            self.room.log.info("Overriding existing points for %s %s", category, score)
+        self.room.engine.nobody(category, score, override=self.override)
+        self.room.sync_all_team_points()
+        self.finish()
         
         
     def award_points(self, team, category, score, full_points=True):
-        if team not in teams:
-            print(f"Invalid team {team} in for category {category} and score {score}")
+        if self.override:
+            self.room.log.info("Overriding existing points for %s %s", category, score)
+        if not self.room.engine.award(team, category, score, full_points, override=self.override):
             return
-        if category not in point_dict:
-            point_dict[category] = {}
-        if score not in point_dict[category]:
-            point_dict[category][score] = []
+        self.room.sync_all_team_points()
+        self.finish()
         
-        if self.override:
-            print(f"Overriding existing points for {category} {score}")
-            point_dict[category][score] = []
         
-        if self.timer is not None:
+class BoardView(QWidget):
+    """The question board, painted as one widget.
+
+    Tiles are not widgets but a state and a text each. Their faces are rendered
+    once into a small pixmap cache and blitted, a tile change repaints only
+    that tile's rect, and clicks are hit-tested here, so a 10x10 board costs
+    about the same per frame as a 5x5 one.
+    """
+
+    tile_changed = Signal(str, int)  # category, points: added, removed or changed state
+
+    HEADER_HEIGHT = 60
+    SPACING = 6
+    UNDO_WIDTH = 50
+    ICON_SIZE = 50
+    GLYPH_CACHE_SIZE = 512
+    COLORS = {                 # state -> (background, text, pixel size)
+        "header": ("darkblue", "white", 20),
+        "normal": ("darkblue", "yellow", 20),
+        "active": ("blue", "yellow", 20),
+        "answered": ("gray", "white", 15),
+    }
+
+    def __init__(self, room):
+        super().__init__()
+        self.room = room
+        self.columns = []   # categories, sorted
+        self.rows = {}      # category -> sorted points of its tiles (0 is the category question behind the header)
+        self.tiles = {}     # (category, points) -> [state, text, undo strip shown]
+        self.glyphs = OrderedDict()  # face key -> QPixmap
+        self.pressed = None
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.setMinimumSize(400, 300)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+
+    def sizeHint(self):
+        rows = max((len([s for s in scores if s != 0]) for scores in self.rows.values()), default=1)
+        return QSize(200 * max(1, len(self.columns)), self.HEADER_HEIGHT + 100 * max(1, rows))
+
+    # tiles
+
+    def add_category(self, category):
+        if category in self.rows:
+            return
+        self.columns.append(category)
+        self.columns.sort()
+        self.rows[category] = []
+        self.relayout()
+
+    def remove_category(self, category):
+        if category not in self.rows:
+            return
+        for score in self.rows.pop(category):
+            del self.tiles[(category, score)]
+            self.tile_changed.emit(category, score)
+        self.columns.remove(category)
+        self.relayout()
+
+    def add_tile(self, category, score):
+        self.add_category(category)
+        if (category, score) not in self.tiles:
+            self.rows[category].append(score)
+            self.rows[category].sort()
+        self.tiles[(category, score)] = ["normal", str(score), False]
+        self.relayout()
+        self.tile_changed.emit(category, score)
+
+    def remove_tile(self, category, score):
+        if self.tiles.pop((category, score), None) is None:
+            return
+        self.rows[category].remove(score)
+        self.relayout()
+        self.tile_changed.emit(category, score)
+
+    def has_tile(self, category, score):
+        return (category, score) in self.tiles
+
+    def set_tile(self, category, score, state, text=None, undo=None):
+        tile = self.tiles[(category, score)]
+        new = [state, tile[1] if text is None else text, tile[2] if undo is None else undo]
+        if new == tile:
+            return
+        self.tiles[(category, score)] = new
+        self.update(self.header_rect(category) if score == 0 else self.tile_rect(category, score))
+        self.tile_changed.emit(category, score)
+
+    def relayout(self):
+        # structural change (categories or tiles added/removed): everything moves
+        self.updateGeometry()
+        self.update()
+
+    # geometry
+
+    def column_width(self):
+        return self.width() / max(1, len(self.columns))
+
+    def row_height(self):
+        rows = max((len(self.tile_scores(c)) for c in self.columns), default=1)
+        return (self.height() - self.HEADER_HEIGHT) / max(1, rows)
+
+    def tile_scores(self, category):
+        return [s for s in self.rows[category] if s != 0]
+
+    def header_rect(self, category):
+        width = self.column_width()
+        x = int(self.columns.index(category) * width)
+        return QRect(x + self.SPACING // 2, self.SPACING // 2, int(width) - self.SPACING, self.HEADER_HEIGHT - self.SPACING)
+
+    def tile_rect(self, category, score):
+        width, height = self.column_width(), self.row_height()
+        x = int(self.columns.index(category) * width)
+        y = self.HEADER_HEIGHT + int(self.tile_scores(category).index(score) * height)
+        return QRect(x + self.SPACING // 2, y + self.SPACING // 2, int(width) - self.SPACING, int(height) - self.SPACING)
+
+    def hit(self, pos):
+        """("header", category, 0), ("tile" | "undo", category, points) or None."""
+        if not self.columns:
+            return None
+        column = int(pos.x() // self.column_width())
+        if not 0 <= column < len(self.columns):
+            return None
+        category = self.columns[column]
+        if pos.y() < self.HEADER_HEIGHT:
+            return ("header", category, 0) if self.header_rect(category).contains(pos) else None
+        scores = self.tile_scores(category)
+        row = int((pos.y() - self.HEADER_HEIGHT) // self.row_height())
+        if not 0 <= row < len(scores):
+            return None
+        score = scores[row]
+        rect = self.tile_rect(category, score)
+        if not rect.contains(pos):
+            return None
+        if self.tiles[(category, score)][2] and pos.x() >= rect.right() - self.UNDO_WIDTH:
+            return ("undo", category, score)
+        return ("tile", category, score)
+
+    # painting
+
+    def glyph(self, state, text, size, undo):
+        key = (state, text, size.width(), size.height(), undo)
+        pixmap = self.glyphs.get(key)
+        if pixmap is not None:
+            self.glyphs.move_to_end(key)
+            return pixmap
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(size.width() * ratio), int(size.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        background, color, pixel_size = self.COLORS[state]
+        pixmap.fill(QColor(background))
+        painter = QPainter(pixmap)
+        font = painter.font()
+        font.setBold(True)
+        font.setPixelSize(pixel_size)
+        painter.setFont(font)
+        painter.setPen(QColor(color))
+        face = QRect(0, 0, size.width() - (self.UNDO_WIDTH if undo else 0), size.height())
+        if state in ("normal", "active") and "\n" not in text:
+            # icon and text centred together, like a QPushButton
+            text_width = painter.fontMetrics().horizontalAdvance(text)
+            left = face.x() + (face.width() - self.ICON_SIZE - 4 - text_width) // 2
+            icon = shared_icon().pixmap(self.ICON_SIZE, self.ICON_SIZE)
+            painter.drawPixmap(QRect(left, (face.height() - self.ICON_SIZE) // 2, self.ICON_SIZE, self.ICON_SIZE), icon)
+            face.setLeft(left + self.ICON_SIZE + 4)
+            painter.drawText(face, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, text)
+        else:
+            painter.drawText(face, Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap, text)
+        if undo:
+            strip = QRect(size.width() - self.UNDO_WIDTH, 0, self.UNDO_WIDTH, size.height())
+            painter.fillRect(strip, QColor("darkgray"))
+            font.setPixelSize(20)
+            painter.setFont(font)
+            painter.setPen(QColor("white"))
+            painter.drawText(strip, Qt.AlignmentFlag.AlignCenter, "X")
+        painter.end()
+        self.glyphs[key] = pixmap
+        if len(self.glyphs) > self.GLYPH_CACHE_SIZE:
+            self.glyphs.popitem(last=False)
+        return pixmap
+
+    @metrics.timed(board_paint_time)
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        dirty = event.rect()
+        painter.fillRect(dirty, QColor("black"))
+        if not self.columns:
+            return
+        width = self.column_width()
+        # only the columns the dirty rect touches
+        first = max(0, int(dirty.left() // width))
+        last = min(len(self.columns) - 1, int(dirty.right() // width))
+        for category in self.columns[first:last + 1]:
+            rect = self.header_rect(category)
+            if rect.intersects(dirty):
+                state = self.tiles[(category, 0)][0] if (category, 0) in self.tiles else "normal"
+                painter.drawPixmap(rect.topLeft(), self.glyph("header" if state == "normal" else state, category, rect.size(), False))
+            for score in self.tile_scores(category):
+                rect = self.tile_rect(category, score)
+                if rect.intersects(dirty):
+                    state, text, undo = self.tiles[(category, score)]
+                    painter.drawPixmap(rect.topLeft(), self.glyph(state, text, rect.size(), undo))
+
+    def resizeEvent(self, event):
+        # every face changes size, the old ones would only sit in the cache
+        self.glyphs.clear()
+        super().resizeEvent(event)
+
+    # input
+
+    def mousePressEvent(self, event):
+        self.pressed = self.hit(event.position().toPoint()) if event.button() == Qt.MouseButton.LeftButton else None
+
+    def mouseReleaseEvent(self, event):
+        target = self.hit(event.position().toPoint())
+        pressed, self.pressed = self.pressed, None
+        # a click is press and release on the same spot, like a button
+        if target is None or target != pressed:
+            return
+        kind, category, score = target
+        if kind == "tile":
+            self.room.select_point(category, score)
+        elif kind == "undo":
+            self.room.undo_point(category, score)
+
+    def mouseDoubleClickEvent(self, event):
+        target = self.hit(event.position().toPoint())
+        if target is not None and target[0] == "header" and self.has_tile(target[1], 0):
+            self.room.select_point(target[1], 0)
+        else:
+            self.mousePressEvent(event)
+
+
+class MetricsOverlay(QLabel):
+    """Live timers and counters drawn over the board, toggled with Ctrl+M.
+    Only refreshes while it is visible."""
+
+    REFRESH_MS = 500
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 200); color: lime; font-family: monospace; font-size: 13px; padding: 6px;")
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
             self.timer.stop()
-        
-        awarded_score = score if full_points else score // 2
-        point_dict[category][score].append((team, awarded_score))
-        disable_button(category, score)
-        recompute_scores()
-        sync_all_team_points()
-        
-        point_dict.sync()
-        set_buzzers_enabled(False)
-        self.close()
-        assert mainWindow is not None
-        assert mainWindow.open_question is not None
-        mainWindow.open_question = None
-        
-        
-def select_point(category, score):
-    global mainWindow
-    if mainWindow is None:
-        return
-    assert mainWindow is not None
-    if mainWindow.open_question:
-        print("A question is already open")
-        return
-    
-    if category not in point_buttons or score not in point_buttons[category]:
-        print(f"Button for {category} {score} not found")
-        return
-    
-    button = point_buttons[category][score]
-    is_disabled = button.property("disabled_state")
-    
-    print(f"Selected point {category} {score} (disabled: {is_disabled})")
-    set_active_button(category, score)
-    
-    question_window = QuestionWindow(category, score, override=is_disabled)
-    
-    mainWindow.open_question = (question_window, category, score)
-    mainWindow.open_question[0].show()
-    
-def disable_button(category, score):
-    if category not in point_buttons or score not in point_buttons[category]:
-        print(f"Button for {category} {score} not found")
-        return
-    button = point_buttons[category][score]
-    
-    team_scores = {}
-    winner = None
-    losers = []
-    for team, score in point_dict[category][score]:
-        if team not in team_scores:
-            team_scores[team] = 0
-        team_scores[team] += score
-        if score > 0:
-            winner = (team, score)
-        elif score < 0:
-            losers.append(team)
-    button.setStyleSheet("background-color: gray; color: white; font-size: 15px; font-weight: bold;")
-    button.setIconSize(QSize(0, 0))
-    button.setProperty("disabled_state", True)
-    
-    loser_txt = "\n"
-    for i, team in enumerate(sorted(losers)):
-        if i > 0:
-            loser_txt += ", " 
-        if i > 0 and i%2 == 0:
-            loser_txt += "\n"
-        loser_txt += teams[team]["name"]
-            
-    button.setText(
-        ((teams[winner[0]]["name"] + " (+" + str(winner[1]) + ")\n") if winner else "")+
-        loser_txt
-    )
-    # txt =  (
-    #     ((teams[winner[0]]["name"] + " (+" + str(winner[1]) + ")") if winner else "")+
-    #     # +", ".join([str(team_scores[team]) for team in sorted(team_scores.keys())])
-    #     ", ".join([teams[team]["name"] for team in sorted(team_scores.keys()) if team_scores[team] < 0])
-    # )
-    # lbl = QLabel(txt,button)
-    # lbl.setWordWrap(True)
-    # lbl.setStyleSheet("color: white; font-size: 15px; font-weight: bold;")
-    # # lbl.setMinimumWidth(button.width())
-    # # lbl.setMaximumWidth(button.width())
-    # # lbl.setMinimumHeight(button.height())
-    # # lbl.setMaximumHeight(button.height())
-    # lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-    
-    # allow word wrap
-    # button.setWordWrap(True)
-        
-    # winners = len([team for team in team_scores if team_scores[team] > 0])
-    # if winners == 0:
-    #     button.setText("---")
-    # elif winners == 1:
-    #     team = [team for team in team_scores if team_scores[team] > 0][0]
-    #     button.setText(teams[team]["name"]+f" (+{team_scores[team]})")
-    # else:
-    #     print("Multiple winners for category", category, "and score", score)
-        
-    # score_text = ", ".join([str(score) for _, score in sorted(team_scores.items(), key=lambda x: x[0])])
-    # button.setText(score_text)
-    
-    # team,full_points = point_dict[category][score]
-    # if team not in teams:
-    #     print(f"Invalid team {team} in for category {category} and score {score}")
-    #     return
-    # awarded_score = score if full_points else score // 2
-    # button.setText(teams[team]["name"]+f" (+{awarded_score})")
-    
-def set_active_button(category, score):
-    if category not in point_buttons or score not in point_buttons[category]:
-        print(f"Button for {category} {score} not found")
-        return
-    button = point_buttons[category][score]
-    button.setDisabled(False)
-    button.setStyleSheet("background-color: blue; color: yellow; font-size: 20px; font-weight: bold;")
-    
-def set_normal_button(category, score):
-    if category not in point_buttons or score not in point_buttons[category]:
-        print(f"Button for {category} {score} not found")
-        return
-    button = point_buttons[category][score]
-    button.setDisabled(False)
-    button.setStyleSheet("background-color: darkblue; color: yellow; font-size: 20px; font-weight: bold;")
-    button.setText(str(score))
-    
-    
-def undo_point(category, score):
-    if category not in point_dict:
-        print(f"Category {category} not found")
-        return
-    if score not in point_dict[category]:
-        print(f"Score {score} not found in category {category}")
-        return
-    # team, full_points = point_dict[category][score]
-    # if team not in teams:
-    #     print(f"Invalid team {team} in for category {category} and score {score}")
-    #     return
-    
-    # only positive points
-    # for team, awarded_score in point_dict[category][score]:
-    #     if awarded_score < 0 and 0 in point_dict[category]:
-    #         # move negative to 0 question
-    #         point_dict[category][0].append((team, -awarded_score))
-    del point_dict[category][score]
-    set_normal_button(category, score)
-    recompute_scores()
-    sync_all_team_points()
-    point_dict.sync()
-    
+            self.hide()
+        else:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.timer.start(self.REFRESH_MS)
+
+    def refresh(self):
+        lines = [f"{'':<22} {'count':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        counters = []
+        for metric in metrics.registry.values():
+            if isinstance(metric, metrics.Timer) and metric.count == 0:
+                lines.append(f"{metric.name:<22} {0:>8} {'-':>9} {'-':>9} {'-':>9} {'-':>9}")
+            elif isinstance(metric, metrics.Timer):
+                p50, p90, p99 = (p * 1000 for p in metric.percentiles())
+                lines.append(f"{metric.name:<22} {metric.count:>8} {p50:>9.3f} {p90:>9.3f} {p99:>9.3f} {metric.max * 1000:>9.3f}")
+            else:
+                counters.append(f"{metric.name} {metric.value}")
+        lines.append("  ".join(counters))
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(10, 10)
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    first_paint_done = False  # startup is timed up to the first window painted
+
+    def __init__(self, room):
         super().__init__()
+        self.room = room
         self.open_question : "None | tuple[QuestionWindow,str,int]" = None
+        self.question_window = QuestionWindow(room, self)
+        self.score_buttons = {}
 
-        self.setWindowTitle("Jeopardy")
+        self.setWindowTitle(room.title)
 
         # button yellow text, blue background
         # black background for the whole window
         
-        icon = QIcon("P.png")
-        
         vtbox = QVBoxLayout()
-        hbox = QHBoxLayout()
+        self.main_layout = vtbox
+        self.board = BoardView(room)
         for category in categories:
-            vbox = QVBoxLayout()
-            lbl = QLabel(category)
-            lbl.setStyleSheet("font-size: 20px; font-weight: bold; color: white; background-color: darkblue;")
-            lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            lbl.mouseDoubleClickEvent = lambda event, c=category: select_point(c, 0)
-            vbox.addWidget(lbl)
-            point_buttons[category] = {}
+            self.board.add_category(category)
             for score in sorted(question_file[category].keys()):
-                if score == 0:
-                    continue
-                button = QPushButton(str(score))
-                button.setIconSize(QSize(50, 50))
-                button.setIcon(icon)
-                button.setMinimumHeight(100)
-                button.setMinimumWidth(200)
-                point_buttons[category][score] = button
-                set_normal_button(category, score)
-                if category in point_dict and score in point_dict[category]:
-                    disable_button(category, score)
-                    button.setMinimumWidth(150)
-                    button2 = QPushButton("X")
-                    button2.setStyleSheet("background-color: darkgray; color: white; font-size: 20px; font-weight: bold;")
-                    button2.setMinimumHeight(100)
-                    button2.setMinimumWidth(50)
-                    button2.setMaximumWidth(50)
-                    button2.clicked.connect(lambda _, c=category, s=score: undo_point(c, s))
-                    hgroup = QHBoxLayout()
-                    hgroup.addWidget(button)
-                    hgroup.addWidget(button2)
-                    hgroup.setSpacing(0)
-                    vbox.addLayout(hgroup)
-                else:
-                    vbox.addWidget(button)
-                button.clicked.connect(lambda _, c=category, s=score: select_point(c, s))
-                    
-            hbox.addLayout(vbox)
+                self.add_tile(category, score)
             
-        vtbox.addLayout(hbox)
-        
-        pointbox = QHBoxLayout()
-        for team, data in sorted(teams.items(), key=lambda x: x[0]):
-            vbox = QVBoxLayout()
-            lbl = QLineEdit(data["name"])
-            lbl.setStyleSheet("font-size: 20px; font-weight: bold; color: white; background-color: darkblue;")
-            lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            # write back on change
-            def update_team_name(new_name, team=team):
-                print(f"Updating team {team} to {new_name}")
-                teams[team].update({"name": new_name})
-                teams.sync()
-            lbl.textChanged.connect(lambda text, team=team: update_team_name(text, team))
-            vbox.addWidget(lbl)
-            button = QPushButton("0")
-            button.setStyleSheet("background-color: darkblue; color: yellow; font-size: 20px; font-weight: bold;")
-            button.setIconSize(QSize(50, 50))
-            button.setIcon(icon)
-            button.setMinimumHeight(100)
-            button.setMinimumWidth(200)
-            button.setContextMenuPolicy(Qt.CustomContextMenu)
-            button.customContextMenuRequested.connect(lambda pos, team=team: self.adjust(team,-100))
-            button.clicked.connect(lambda _, team=team: self.adjust(team, 100))
-            score_buttons[team] = button
-            vbox.addWidget(button)
-            pointbox.addLayout(vbox)
-        vtbox.addLayout(pointbox)
-        recompute_scores()
+        vtbox.addWidget(self.board, 1)
+        
+        self.team_columns = QWidget()
+        vtbox.addWidget(self.team_columns)
+        self.rebuild_team_columns()
+        room.engine.rebuild()
+        
+        QShortcut(QKeySequence("Ctrl+R"), self, activated=room.engine.verify)
+        QShortcut(QKeySequence("Ctrl+Z"), self, activated=room.undo_action)
+        QShortcut(QKeySequence("Ctrl+Shift+Z"), self, activated=room.redo_action)
+        QShortcut(QKeySequence("Ctrl+Y"), self, activated=room.redo_action)
+        QShortcut(QKeySequence("Ctrl+L"), self, activated=print_buzzer_stats)
+        self.metrics_overlay = MetricsOverlay(self)
+        QShortcut(QKeySequence("Ctrl+M"), self, activated=self.metrics_overlay.toggle)
         
         vbox = QVBoxLayout()
             
@@ -742,44 +1932,636 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(root)
         self.show()
         
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not MainWindow.first_paint_done:
+            MainWindow.first_paint_done = True
+            startup_phase("first paint")
+            QTimer.singleShot(0, report_startup)
+        
+    def rebuild_team_columns(self):
+        team_columns = QWidget()
+        self.team_layout = QHBoxLayout(team_columns)
+        self.team_layout.setContentsMargins(0, 0, 0, 0)
+        self.score_buttons.clear()
+        self.team_widgets = {}  # team -> (column, name edit)
+        self.team_placeholder = QLabel("Waiting for teams from buzzer server...")
+        self.team_placeholder.setStyleSheet("font-size: 20px; font-weight: bold; color: white; background-color: darkblue;")
+        self.team_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.team_placeholder.setMinimumHeight(100)
+        self.team_layout.addWidget(self.team_placeholder)
+        for team, data in self.room.sorted_teams():
+            self.add_team_column(team)
+        self.team_placeholder.setVisible(not self.team_widgets)
+        self.main_layout.replaceWidget(self.team_columns, team_columns)
+        self.team_columns.deleteLater()
+        self.team_columns = team_columns
+
+    def add_team_column(self, team):
+        data = self.room.teams[team]
+        column = QWidget()
+        vbox = QVBoxLayout(column)
+        vbox.setContentsMargins(0, 0, 0, 0)
+        name_edit = QLineEdit(data["name"])
+        name_edit.setStyleSheet("font-size: 20px; font-weight: bold; color: white; background-color: darkblue;")
+        name_edit.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        # written back once the operator stops typing
+        name_edit.textChanged.connect(lambda text, team=team: self.room.roster_sync.rename_local(team, text))
+        vbox.addWidget(name_edit)
+        button = QPushButton(str(data.get("score", 0)))
+        button.setStyleSheet("background-color: darkblue; color: yellow; font-size: 20px; font-weight: bold;")
+        button.setIconSize(QSize(50, 50))
+        button.setIcon(shared_icon())
+        button.setMinimumHeight(100)
+        button.setMinimumWidth(200)
+        button.setContextMenuPolicy(Qt.CustomContextMenu)
+        button.customContextMenuRequested.connect(lambda pos, team=team: self.adjust(team,-100))
+        button.clicked.connect(lambda _, team=team: self.adjust(team, 100))
+        self.score_buttons[team] = button
+        vbox.addWidget(button)
+        # new teams always have the highest index, so appending keeps the columns in order
+        self.team_layout.addWidget(column)
+        self.team_widgets[team] = (column, name_edit)
+        self.team_placeholder.hide()
+
+    def show_team_column(self, team):
+        if team not in self.team_widgets:
+            self.add_team_column(team)
+            return
+        self.team_widgets[team][0].show()
+        self.set_team_name(team, self.room.teams[team]["name"])
+        self.team_placeholder.hide()
+
+    def hide_team_column(self, team):
+        if team in self.team_widgets:
+            self.team_widgets[team][0].hide()
+        self.team_placeholder.setVisible(not self.room.sorted_teams())
+
+    def set_team_name(self, team, name):
+        if team not in self.team_widgets:
+            return
+        name_edit = self.team_widgets[team][1]
+        if name_edit.text() != name:
+            # not an edit of the operator's, nothing to write back
+            name_edit.blockSignals(True)
+            name_edit.setText(name)
+            name_edit.blockSignals(False)
+
+    def add_tile(self, category, score):
+        self.board.add_tile(category, score)
+        if self.room.engine.is_answered(category, score):
+            self.board.set_tile(category, score, "answered", self.room.answered_tile_text(category, score), undo=True)
+        elif self.room.engine.is_recorded(category, score):
+            self.board.set_tile(category, score, "normal", undo=True)
+        
+    def apply_catalog_changes(self, changes):
+        # update only the tiles that changed on disk
+        for kind, category, score in changes:
+            if kind == "added":
+                self.board.add_category(category)
+                self.add_tile(category, score)
+            elif kind == "removed":
+                self.board.remove_tile(category, score)
+        for category in list(self.board.columns):
+            if category not in question_file:
+                self.board.remove_category(category)
+        
     def adjust(self, team, delta):
-        if team not in teams:
-            print(f"Invalid team {team}")
+        if team not in self.score_buttons:
+            self.room.log.warning("Invalid team %s in score buttons", team)
             return
-        if team not in score_buttons:
-            print(f"Invalid team {team} in score buttons")
+        if self.room.engine.adjust(team, delta):
+            self.room.sync_all_team_points()
+
+
+
+def spectator_media(category, score):
+    # runs on a spectator server worker thread
+    if question_pack is not None:
+        if question_pack.entry(category, score)["kind"] != "image":
+            return None
+        target = question_assets.target_size
+        image = question_pack.image(category, score, target.width(), target.height())
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(SPECTATOR_WRITE_MODE)
+        image.save(buffer, "JPG", 90)
+        return "image/jpeg", bytes(data)
+    filename = question_file.get(category, {}).get(score)
+    if filename is None or question_kind(filename) != "image":
+        return None
+    return file_media(os.path.join(question_dir, category, filename))
+
+
+class Room:
+    """One game: a buzzer instance with its own engine and journal namespace,
+    team mapping, buzzer event pipeline, board window and spectator server.
+
+    Rooms of one process share the buzzer connections (BuzzerPool), the
+    question catalog and the question asset cache, so a second room costs a
+    window and its game state, not another connection or image cache.
+    """
+
+    def __init__(self, instance, admin_session, namespace="", title="Jeopardy"):
+        self.instance = instance
+        self.admin_session = admin_session
+        self.namespace = namespace  # journal namespace, "" for the only room
+        self.title = title
+        self.log = logging.getLogger(f"jeopardy.{instance}") if namespace else log
+        self.client : "BuzzerClient | None" = None
+        self.session = None
+        self.buzzer_team_map = {}  # team uuid -> team index
+        self.team_uuid_map = {}    # team index -> team uuid
+        self.teams_initialized = False
+        self.engine = GameEngine()
+        self.teams = self.engine.teams  # team key -> {"name", "score"}
+        self.events = BuzzerEvents()
+        self.frame_buffer = FrameBuffer(self.events)
+        self.points_sync = PointsSync(self)
+        self.roster_sync = RosterSync(self)
+        self.buzz_queue = BuzzQueue(self)
+        self.reaction_stats = ReactionStats(self)
+        self.buzz_latency = LatencyHistogram("lastWinner frame to highlight")
+        self.media = MediaPlayers(self)
+        self.serial_buzzer : "SerialBuzzer | None" = None
+        self.main_window : "MainWindow | None" = None
+        self.spectators : "SpectatorServer | None" = None
+
+        self.events.frames_ready.connect(self.frame_buffer.drain, Qt.ConnectionType.QueuedConnection)
+        self.events.teams_updated.connect(self.handle_teams_update)
+        self.events.winner.connect(self.handle_last_winner)
+        self.events.settings_updated.connect(self.handle_settings)
+        self.events.local_winner.connect(self.handle_local_winner, Qt.ConnectionType.QueuedConnection)
+        self.events.buzz_feed.connect(self.handle_buzz_feed)
+        self.engine.on("score", self.handle_score_changed)
+        self.engine.on("tile", self.handle_tile_changed)
+        self.engine.on("tile", self.media.prime)
+        self.engine.on("teams", self.handle_roster_changed)
+        self.engine.on("join", self.handle_team_joined)
+        self.engine.on("leave", self.handle_team_left)
+        self.engine.on("rename", self.handle_team_renamed)
+
+    def show(self):
+        # the board shows the last known roster (or a placeholder) until the first teams frame arrives
+        self.main_window = MainWindow(self)
+        self.media.prime()
+
+    # buzzer server
+
+    def connect(self, client):
+        self.client = client
+        self.session = self.admin_session
+        self.log.info("Using admin session: %s", self.session)
+        for kind in ("StreamServerState", "StreamSettings", "StreamBuzzFeed"):
+            # one handler per stream: what a frame is follows from its subscription, not its keys
+            client.subscribe({"kind": kind, "instance": self.instance}, lambda data, received_at, kind=kind: self.dispatch_frame(kind, data, received_at))
+
+    def dispatch_frame(self, kind, data, received_at):
+        self.frame_buffer.push(kind, data, received_at)
+
+    def request(self, payload):
+        if self.client is None:
+            self.log.warning("Cannot send request: No buzzer client")
+            return None
+        self.log.debug("Sending request: %s", payload)
+        return self.client.request(payload)
+
+    def set_points(self, team_uuid, points):
+        if self.session is None:
+            self.log.warning("Cannot set points for %s: No session", team_uuid)
+            return None
+        self.log.info("Setting team %s points to %s", team_uuid, points)
+        return self.request({
+            "kind": "SetPoints",
+            "session": self.session,
+            "teamId": team_uuid,
+            "points": points
+        })
+
+    def sync_all_team_points(self):
+        self.points_sync.schedule()
+
+    def set_buzzers_enabled(self, enabled):
+        if self.serial_buzzer is not None:
+            self.serial_buzzer.set_armed(enabled)
+        if self.session is None:
+            self.log.warning("Cannot set buzzers to %s: No session", enabled)
+            return
+        self.log.info("Setting buzzers to %s", enabled)
+        self.request({
+            "kind": "SetBuzzersEnabled",
+            "session": self.session,
+            "enabled": enabled
+        })
+
+    def reset_buzzer(self):
+        if self.serial_buzzer is not None:
+            self.serial_buzzer.set_armed(True)
+        if self.session is None:
+            self.log.warning("Cannot reset buzzer: No session")
+            return
+        self.log.info("Resetting buzzer")
+        self.request({
+            "kind": "SetBuzzersEnabled",
+            "session": self.session,
+            "enabled": False
+        })
+        self.request({
+            "kind": "SetBuzzersEnabled",
+            "session": self.session,
+            "enabled": True
+        })
+
+    # buzzer events, on the Qt thread
+
+    def handle_teams_update(self, server_teams):
+        for team in server_teams:
+            if "score" in team:
+                self.points_sync.observe(team["uuid"], team["score"])
+        if not self.teams_initialized:
+            self.initialize_teams_from_server(server_teams)
             return
-        if team not in additional_points:
-            additional_points[team] = []
-        additional_points[team].append(delta)
-        additional_points.sync()
-        recompute_scores()
-        sync_all_team_points()
+        self.roster_sync.apply(server_teams)
 
+    def handle_last_winner(self, winner_uuid, received_at):
+        if winner_uuid not in self.buzzer_team_map:
+            return
+        self.highlight_buzz(self.buzzer_team_map[winner_uuid], received_at, self.buzz_latency)
+
+    def handle_local_winner(self, team_index, received_at):
+        self.highlight_buzz(team_index, received_at, self.serial_buzzer.latency)
+
+    def highlight_buzz(self, team_index, received_at, histogram):
+        if self.main_window is None or self.main_window.open_question is None:
+            return
+        question_window = self.main_window.open_question[0]
+        if question_window.on_buzz(team_index):
+            latency = time.perf_counter() - received_at
+            histogram.observe(latency)
+            self.log.info("Buzz highlighted after %.2f ms", latency * 1000)
+
+    def handle_buzz_feed(self, feed, received_at):
+        new_entries = self.buzz_queue.update(feed)
+        for team_uuid, at in new_entries:
+            if at is not None and self.buzz_queue.enabled_at is not None:
+                self.reaction_stats.observe(team_uuid, at - self.buzz_queue.enabled_at)
+        if new_entries and self.main_window is not None and self.main_window.open_question is not None:
+            question_window = self.main_window.open_question[0]
+            next_index = self.buzz_queue.next_team(question_window.ruled_out)
+            if next_index is not None:
+                self.highlight_buzz(next_index, received_at, self.buzz_latency)
+
+    def handle_settings(self, settings):
+        self.log.info("Buzzer settings: %s", settings, extra=logs.RATE_LIMITED)
+
+    # roster
+
+    def sorted_teams(self):
+        # numeric order, so team10 comes after team9; teams that left are not shown
+        return sorted(((team, data) for team, data in self.teams.items() if not data.get("away")), key=lambda x: team_index_of(x[0]))
+
+    def initialize_teams_from_server(self, server_teams):
+        self.log.debug("Initializing teams from server. server_teams: %s", server_teams)
+        self.log.debug("Before: buzzer_team_map=%s, team_uuid_map=%s", self.buzzer_team_map, self.team_uuid_map)
+
+        self.buzzer_team_map.clear()
+        self.team_uuid_map.clear()
+        roster = {}
+        # a restarted game keeps the keys its journal recorded for each uuid; journals
+        # from before teams carried their uuid fall back to the server's order
+        known = {data["uuid"]: team for team, data in self.teams.items() if "uuid" in data}
+        next_index = max(map(team_index_of, self.teams), default=-1) + 1 if known else 0
+
+        for team in server_teams:
+            if team.get("isLobby", False):
+                continue
+
+            team_uuid = team["uuid"]
+            team_name = team["name"]
+
+            if team_uuid in self.buzzer_team_map:
+                continue
 
+            teamkey = known.get(team_uuid)
+            if teamkey is None:
+                teamkey = f"team{next_index}"
+                next_index += 1
+            team_index = team_index_of(teamkey)
+            self.buzzer_team_map[team_uuid] = team_index
+            self.team_uuid_map[team_index] = team_uuid
 
-start_buzzer_connection()
+            roster[teamkey] = {
+                "name": team_name,
+                "score": team.get("score", 0),
+                "uuid": team_uuid,
+            }
+            self.log.info("  Mapped %s (uuid=%s) to %s", team_name, team_uuid, teamkey)
+
+        for team_uuid, teamkey in known.items():
+            if team_uuid not in self.buzzer_team_map:
+                # gone from the server while we were down: its points stay on the board
+                self.buzzer_team_map[team_uuid] = team_index_of(teamkey)
+                self.team_uuid_map[team_index_of(teamkey)] = team_uuid
+                roster[teamkey] = dict(self.teams[teamkey], away=True)
+
+        self.teams_initialized = True
+        startup_event("teams received")
+        self.engine.set_teams(roster)
+        self.roster_sync.reset(server_teams)
+        self.log.info("Initialized %d teams from server", len(self.teams))
+        self.log.debug("After: buzzer_team_map=%s, team_uuid_map=%s", self.buzzer_team_map, self.team_uuid_map)
+        self.sync_all_team_points()
+
+    # engine events
+
+    def handle_score_changed(self, team, score):
+        if self.main_window is not None and team in self.main_window.score_buttons:
+            self.main_window.score_buttons[team].setText(str(score))
+
+    def handle_tile_changed(self, category, score):
+        if self.engine.is_answered(category, score):
+            self.disable_button(category, score)
+        elif self.main_window is None or self.main_window.open_question is None or self.main_window.open_question[1:] != (category, score):
+            self.set_normal_button(category, score)
+
+    def handle_roster_changed(self):
+        if self.main_window is not None:
+            self.main_window.rebuild_team_columns()
+
+    def handle_team_joined(self, team):
+        if self.main_window is not None:
+            self.main_window.show_team_column(team)
+
+    def handle_team_left(self, team):
+        if self.main_window is not None:
+            self.main_window.hide_team_column(team)
+
+    def handle_team_renamed(self, team, name):
+        if self.main_window is not None:
+            self.main_window.set_team_name(team, name)
+
+    # board
+
+    def select_point(self, category, score):
+        main_window = self.main_window
+        if main_window is None:
+            return
+        if main_window.open_question:
+            self.log.warning("A question is already open")
+            return
+
+        if not main_window.board.has_tile(category, score):
+            self.log.warning("Tile for %s %s not found", category, score)
+            return
+
+        is_disabled = self.engine.is_answered(category, score)
+
+        self.log.info("Selected point %s %s (disabled: %s)", category, score, is_disabled)
+        try:
+            # read it before the tile and the board are marked busy: a question file that
+            # cannot be read must leave the board usable; show_question() then hits the cache
+            question_assets.get(category, score)
+        except Exception:
+            self.log.exception("Cannot open question %s %s", category, score)
+            return
+        self.set_active_button(category, score)
+
+        question_window = main_window.question_window
+        main_window.open_question = (question_window, category, score)
+        question_window.show_question(category, score, override=is_disabled)
+
+    def answered_tile_text(self, category, score):
+        winner, losers = self.engine.tile_result(category, score)
+        loser_txt = "\n"
+        for i, team in enumerate(losers):
+            if i > 0:
+                loser_txt += ", "
+            if i > 0 and i%2 == 0:
+                loser_txt += "\n"
+            loser_txt += self.teams[team]["name"]
+        return ((self.teams[winner[0]]["name"] + " (+" + str(winner[1]) + ")\n") if winner else "") + loser_txt
+
+    def set_tile(self, category, score, state, text=None, undo=None):
+        if self.main_window is None:
+            return
+        if not self.main_window.board.has_tile(category, score):
+            self.log.warning("Tile for %s %s not found", category, score)
+            return
+        self.main_window.board.set_tile(category, score, state, text, undo)
+
+    def disable_button(self, category, score):
+        self.set_tile(category, score, "answered", self.answered_tile_text(category, score), undo=True)
+
+    def set_active_button(self, category, score):
+        self.set_tile(category, score, "active")
+
+    def set_normal_button(self, category, score):
+        self.set_tile(category, score, "normal", str(score), undo=self.engine.is_recorded(category, score))
+
+    def undo_point(self, category, score):
+        if self.engine.undo(category, score):
+            self.sync_all_team_points()
+
+    def undo_action(self):
+        self.step_timeline(self.engine.undo_action, "undo")
+
+    def redo_action(self):
+        self.step_timeline(self.engine.redo_action, "redo")
+
+    def step_timeline(self, step, name):
+        if self.main_window is not None and self.main_window.open_question:
+            # the question window keeps its own idea of the open tile
+            self.log.warning("Close the question before you %s", name)
+            return
+        if step():
+            self.log.info("%s: board now after event %d", name.capitalize(), self.engine.journal.head)
+            self.sync_all_team_points()
+        else:
+            self.log.info("Nothing to %s", name)
+
+    # spectators
+
+    def publish_tile(self, category, score):
+        tile = self.main_window.board.tiles.get((category, score))
+        if tile is None:
+            self.spectators.remove_tile(category, score)
+        else:
+            self.spectators.update_tile(category, score, tile[0], tile[1])
+
+    def publish_teams(self, *_):
+        self.spectators.set_teams({team: (data["name"], data.get("score", 0)) for team, data in self.sorted_teams()})
+
+    def publish_question(self):
+        window = self.main_window.question_window
+        if window.category is None:
+            self.spectators.set_question(None)
+            return
+        category, score = window.category, window.score
+        buzzed = self.teams.get(f"team{window.input}")
+        question = {"category": category, "points": score, "buzzed": buzzed["name"] if buzzed else None}
+        kind, content = question_assets.get(category, score)
+        if kind == "text":
+            question["text"] = content
+        elif kind in MEDIA_KINDS:
+            # sound and video play in the room, displays only show that they do
+            question["text"] = MEDIA_LABELS[kind]
+        else:
+            question["media"] = f"/media/{quote(category)}/{score}"
+        self.spectators.set_question(question)
+
+    def print_stats(self):
+        self.log.info("%s", self.frame_buffer.summary())
+        self.log.info("%s", self.roster_sync.summary())
+        if self.spectators is not None:
+            self.log.info("%s", self.spectators.summary())
+        self.log.info("%s", self.buzz_latency.summary())
+        self.log.info("%s", self.reaction_stats.summary())
+        if self.serial_buzzer is not None:
+            self.log.info("%s", self.serial_buzzer.latency.summary())
+            self.log.info("%s", self.serial_buzzer.arbitration.summary())
+
+
+rooms = []  # every game this process runs, in the order they were given
+pool : "BuzzerPool | None" = None
+
+
+def create_rooms(specs):
+    """One room per INSTANCE[:ADMIN_SESSION]. A single room keeps the journal's
+    default namespace and the plain window title, so it runs as it always has."""
+    several = len(specs) > 1
+    for spec in specs:
+        instance, _, admin_session = spec.partition(":")
+        rooms.append(Room(
+            instance, admin_session or ADMIN_SESSION,
+            namespace=instance if several else "",
+            title=f"Jeopardy - {instance}" if several else "Jeopardy"))
+
+
+def open_journal(path="game.db"):
+    for room in rooms:
+        room.engine.open(path, namespace=room.namespace)
+
+
+def start_buzzer_connection():
+    global pool
+    if REPLAY_SESSION:
+        pool = ReplayPool(REPLAY_SESSION, REPLAY_SPEED)
+    else:
+        recorder = None
+        if RECORD_SESSION:
+            recorder = session_log.SessionRecorder(RECORD_SESSION, url=BUZZER_URL, instance=",".join(room.instance for room in rooms))
+            log.info("Recording buzzer session to %s", RECORD_SESSION)
+        pool = BuzzerPool(BUZZER_URL, BUZZER_CONNECTIONS, recorder)
+    for room in rooms:
+        room.connect(pool.client_for(room))
+    pool.start()
+
+
+def stop_buzzer_recording():
+    if pool is not None and pool.recorder is not None:
+        pool.recorder.close()
+        log.info("Recorded %d buzzer frames to %s", pool.recorder.frames, pool.recorder.path)
+
+
+def apply_catalog_changes(changes):
+    for kind, category, score in changes:
+        question_assets.refresh((category, score), removed=(kind == "removed"))
+    for room in rooms:
+        if room.main_window is not None:
+            room.main_window.apply_catalog_changes(changes)
+        for _, category, score in changes:
+            room.media.discard((category, score))
+        room.media.prime()
+
+
+def print_buzzer_stats():
+    for room in rooms:
+        room.print_stats()
+    log.info("%s", metrics.summary())
+
+
+def start_spectator_server(room, port):
+    global SPECTATOR_WRITE_MODE
+    # resolved here on the GUI thread, the media worker must not be the first to look up a Qt enum
+    SPECTATOR_WRITE_MODE = QIODevice.OpenModeFlag.WriteOnly
+    room.spectators = SpectatorServer(port=port, media=spectator_media)
+    board = room.main_window.board
+    room.spectators.set_board(board.columns, {
+        category: {score: board.tiles[(category, score)][:2] for score in board.rows[category]}
+        for category in board.columns
+    })
+    room.publish_teams()
+    board.tile_changed.connect(room.publish_tile)
+    room.main_window.question_window.question_changed.connect(room.publish_question)
+    room.engine.on("score", room.spectators.update_score)
+    room.engine.on("teams", room.publish_teams)
+    room.engine.on("rename", room.publish_teams)
+    room.engine.on("join", room.publish_teams)
+    room.engine.on("leave", room.publish_teams)
+    room.spectators.start()
+
+
+def main():
+    global args, BUZZER_URL, INSTANCE, ADMIN_SESSION, BUZZER_CONNECTIONS, QUESTION_DIR, QUESTION_PACK, SERIAL_PORT, SERIAL_BAUD, SPECTATOR_PORT, METRICS_PORT, RECORD_SESSION, REPLAY_SESSION, REPLAY_SPEED, question_dir, app
+    startup_phase("imports")
+    load_environment()
+    parser = build_parser()
+    args = parser.parse_args()
+    BUZZER_URL = args.buzzer_url or BUZZER_URL
+    INSTANCE = args.instance or INSTANCE
+    ADMIN_SESSION = args.admin_session or ADMIN_SESSION
+    BUZZER_CONNECTIONS = args.connections or BUZZER_CONNECTIONS
+    QUESTION_DIR = args.question_dir or QUESTION_DIR
+    QUESTION_PACK = args.question_pack or QUESTION_PACK
+    SERIAL_PORT = args.serial_port or SERIAL_PORT
+    SERIAL_BAUD = args.serial_baud or SERIAL_BAUD
+    if SERIAL_PORT != "none":
+        try:
+            import serial  # the reader thread would only log the failure
+        except ImportError:
+            parser.error(f"serial port {SERIAL_PORT!r} needs pyserial: pip install pyserial, or use --serial-port none")
+    SPECTATOR_PORT = args.spectator_port if args.spectator_port is not None else SPECTATOR_PORT
+    METRICS_PORT = args.metrics_port if args.metrics_port is not None else METRICS_PORT
+    logs.setup(args.log_level or LOG_LEVEL, args.log_file or LOG_FILE, args.log_json)
+    RECORD_SESSION = args.record_session or RECORD_SESSION
+    REPLAY_SESSION = args.replay_session or REPLAY_SESSION
+    REPLAY_SPEED = args.replay_speed if args.replay_speed is not None else REPLAY_SPEED
+    question_dir = QUESTION_DIR
+    create_rooms(args.rooms or (BUZZER_ROOMS.split(",") if BUZZER_ROOMS else [INSTANCE]))
 
-print("Waiting for teams from buzzer server...")
-timeout = 30
-while not teams_initialized and timeout > 0:
-    process_buzzer_messages()
-    time.sleep(0.1)
-    timeout -= 1
+    open_journal()
+    startup_phase("journal open")
+    open_catalog()
+    startup_phase("directory scan")
 
-if not teams_initialized:
-    print("Warning: Teams not initialized from server within timeout")
-else:
-    print(f"Teams initialized: {teams}")
-    sync_all_team_points()
+    app = QApplication(sys.argv)
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    preload_question_assets()
+    start_buzzer_connection()
+    # the local buzzer box plays for the first room
+    start_serial_buzzer(rooms[0], SERIAL_PORT, SERIAL_BAUD)
+    startup_phase("socket connect start")
 
-print(f"Session: {session}")
+    for room in rooms:
+        room.show()
+    if catalog is not None:
+        catalog.changed.connect(apply_catalog_changes)
+        catalog.watch()
+    if SPECTATOR_PORT:
+        # one port per room, counting up from the first
+        for offset, room in enumerate(rooms):
+            start_spectator_server(room, SPECTATOR_PORT + offset)
+    for room in rooms:
+        # a name still being typed is written before the final snapshot
+        app.aboutToQuit.connect(room.roster_sync.flush)
+        app.aboutToQuit.connect(room.engine.snapshot)
+    app.aboutToQuit.connect(stop_buzzer_recording)
+    app.aboutToQuit.connect(print_buzzer_stats)
+    startup_phase("main window")
 
-app = QApplication(sys.argv)
-mainWindow = MainWindow()
+    app.exec()
 
-message_timer = QTimer()
-message_timer.timeout.connect(process_buzzer_messages)
-message_timer.start(50)
 
-app.exec()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Leveled logging written by a background thread.
+
+Log calls on the GUI or buzzer thread only build a record and put it on a
+queue; formatting and the actual write to the terminal or log file happen on
+a listener thread, so a slow terminal or a file on a slow disk never stalls
+the event loop. Messages use logging's lazy %-style arguments, so a debug
+call costs next to nothing when debug output is off.
+
+    python jeopardy.py --log-level debug --log-file game.log
+    python jeopardy.py --log-json --log-file game.jsonl
+
+Records logged with extra=RATE_LIMITED (repetitive state frames) are let
+through at most BURST times per INTERVAL seconds per message, and the next
+one that gets through says how many were dropped.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+RATE_LIMITED = {"rate_limited": True}
+INTERVAL = 5.0
+BURST = 3
+QUIET = ("websockets", "asyncio")
+
+# arguments of these types can be formatted later on the listener thread
+_IMMUTABLE = (str, int, float, bool, type(None), bytes)
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, interval=INTERVAL, burst=BURST):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self._windows = {}  # (logger, msg) -> [window start, passed, dropped]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, "rate_limited", False):
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                dropped = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+                if dropped:
+                    record.dropped = dropped
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener without formatting them first, unless an
+    argument could change before the listener gets to it."""
+
+    def prepare(self, record):
+        args = record.args if isinstance(record.args, tuple) else (record.args,)
+        if all(isinstance(arg, _IMMUTABLE) or (isinstance(arg, tuple) and all(isinstance(a, _IMMUTABLE) for a in arg)) for arg in args):
+            return record
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s.%(msecs)03d %(levelname)-5s %(name)s: %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        line = super().format(record)
+        if getattr(record, "dropped", 0):
+            line += f" ({record.dropped} similar messages dropped)"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, thread, msg, plus dropped/exc when present."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "dropped", 0):
+            entry["dropped"] = record.dropped
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup(level="info", path=None, as_json=False):
+    """Route all logging through one queue to stderr and, optionally, a file."""
+    global _listener
+    if _listener is not None:
+        return
+    formatter = JsonFormatter() if as_json else TextFormatter()
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if path:
+        handlers.append(logging.FileHandler(path, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records = queue.SimpleQueue()
+    queue_handler = _QueueHandler(records)
+    queue_handler.addFilter(RateLimitFilter())
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    # our own debug output, not every websocket frame and selector of the libraries
+    for name in QUIET:
+        logging.getLogger(name).setLevel(max(root.level, logging.INFO))
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
+
+
+def shutdown():
+    """Write out everything still queued."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,179 @@
+"""In-process timers and counters for the game's hot paths.
+
+Timers keep a running count, sum and max plus a window of the most recent
+samples for percentiles, so observing costs one lock and a deque append.
+Everything registered here shows up in the on-screen overlay of jeopardy.py
+(Ctrl+M) and in a Prometheus text endpoint:
+
+    python jeopardy.py --metrics-port 9100
+    curl http://127.0.0.1:9100/metrics
+"""
+import collections
+import functools
+import logging
+import threading
+import time
+
+PREFIX = "jeopardy_"
+QUANTILES = (0.5, 0.9, 0.99)
+enabled = True  # False: timed functions run bare, for headless load tests
+
+log = logging.getLogger("metrics")
+
+
+class Timer:
+    """Durations in seconds; percentiles over the last `window` samples."""
+
+    def __init__(self, name, help, window=2048):
+        self.name = name
+        self.help = help
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            self._recent.append(seconds)
+
+    def time(self):
+        return _Timing(self)
+
+    def percentiles(self, quantiles=QUANTILES):
+        with self._lock:
+            ordered = sorted(self._recent)
+        if not ordered:
+            return [float("nan")] * len(quantiles)
+        return [ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in quantiles]
+
+    def summary(self):
+        if self.count == 0:
+            return f"{self.name}: no samples"
+        p50, p90, p99 = (p * 1000 for p in self.percentiles())
+        return (
+            f"{self.name}: {self.count} samples, p50 {p50:.3f} ms, p90 {p90:.3f} ms, p99 {p99:.3f} ms, "
+            f"max {self.max * 1000:.3f} ms"
+        )
+
+    def render(self):
+        name = PREFIX + self.name + "_seconds"
+        lines = [f"# HELP {name} {self.help}", f"# TYPE {name} summary"]
+        for q, value in zip(QUANTILES, self.percentiles()):
+            lines.append(f'{name}{{quantile="{q}"}} {"NaN" if value != value else f"{value:.9f}"}')
+        lines.append(f"{name}_sum {self.total:.9f}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class _Timing:
+    __slots__ = ("timer", "start")
+
+    def __init__(self, timer):
+        self.timer = timer
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def summary(self):
+        return f"{self.name}: {self.value}"
+
+    def render(self):
+        name = PREFIX + self.name + "_total"
+        return [f"# HELP {name} {self.help}", f"# TYPE {name} counter", f"{name} {self.value}"]
+
+
+registry = {}  # name -> Timer | Counter, in registration order
+
+
+def timer(name, help):
+    if name not in registry:
+        registry[name] = Timer(name, help)
+    return registry[name]
+
+
+def counter(name, help):
+    if name not in registry:
+        registry[name] = Counter(name, help)
+    return registry[name]
+
+
+def timed(metric):
+    """Decorator observing every call of the function in `metric`."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def summary():
+    return "\n".join(metric.summary() for metric in registry.values())
+
+
+def render():
+    """Everything in the Prometheus text exposition format."""
+    lines = []
+    for metric in list(registry.values()):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics on a daemon thread; returns the server, or None if the port is taken."""
+    # imported here, the command line tools that only time things should not pay for it
+    import http.server
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # scrapes every few seconds would drown the console
+            pass
+
+    try:
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        log.warning("Metrics endpoint could not start on %s:%s: %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    log.info("Metrics: http://%s:%s/metrics", host, port)
+    return server
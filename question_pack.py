@@ -0,0 +1,317 @@
+"""Compiled question packs: one indexed file per board.
+
+A pack holds every question of a question directory, ready to show: text is
+stored as UTF-8, images as raw pixels, pre-scaled to one or more display
+sizes, and audio and video as the file itself. A JSON index at the end of the file maps (category, points) to the
+blobs, so opening a pack reads the index once and any question is then a
+slice of the memory-mapped file, without scanning directories or decoding
+image files.
+
+    python question_pack.py pack questions board.jpack --size 1728x702 --size 3456x1404
+    python question_pack.py check board.jpack --source questions
+    python jeopardy.py --question-pack board.jpack
+
+Layout: 8-byte magic, index offset and index length (two little-endian u64),
+then the blobs (each 64-byte aligned), then the index.
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+
+# reading and checking packs needs no Qt, only building them and decoding their images does
+QImage = None
+
+
+def load_qt():
+    """Import Qt for building packs and decoding images; False if it is not installed.
+
+    Call it on the main thread before any worker needs an image: the enums
+    are resolved here once, Qt looks them up lazily and that is not safe from
+    the packing threads."""
+    global QSize, QImage, KEEP_ASPECT, IGNORE_ASPECT, SMOOTH, FORMATS
+    if QImage is not None:
+        return True
+    try:
+        from PySide6.QtCore import QSize, Qt
+        from PySide6.QtGui import QImage
+    except ImportError:
+        return False
+    KEEP_ASPECT = Qt.AspectRatioMode.KeepAspectRatio
+    IGNORE_ASPECT = Qt.AspectRatioMode.IgnoreAspectRatio
+    SMOOTH = Qt.TransformationMode.SmoothTransformation
+    FORMATS = {"RGB32": QImage.Format.Format_RGB32, "ARGB32_Premultiplied": QImage.Format.Format_ARGB32_Premultiplied}
+    return True
+
+MAGIC = b"JPACK\x00\x01\x00"
+HEADER = struct.Struct("<8sQQ")
+ALIGN = 64
+DEFAULT_SIZES = ("1728x702",)  # 90% x 65% of a 1920x1080 screen, what jeopardy.py scales for
+
+
+AUDIO_SUFFIXES = (".mp3", ".wav", ".ogg", ".oga", ".opus", ".flac", ".m4a", ".aac")
+VIDEO_SUFFIXES = (".mp4", ".m4v", ".mov", ".webm", ".mkv", ".avi")
+MEDIA_KINDS = ("audio", "video")
+
+
+def parse_question_filename(filename):
+    if "disabled" in filename or filename.startswith("."):
+        return None
+    try:
+        return int(filename.split(".")[0])
+    except ValueError:
+        return None
+
+
+def question_kind(filename):
+    """"text", "audio", "video" or "image", by the file's extension."""
+    suffix = os.path.splitext(filename)[1].lower()
+    if suffix == ".txt":
+        return "text"
+    if suffix in AUDIO_SUFFIXES:
+        return "audio"
+    if suffix in VIDEO_SUFFIXES:
+        return "video"
+    return "image"
+
+
+def blob_refs(entry):
+    if entry["kind"] == "text":
+        return [entry["text"]]
+    if entry["kind"] in MEDIA_KINDS:
+        return [entry["media"]]
+    return entry["images"]
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def scan_questions(root):
+    """{category: {points: filename}} for question_dir/<category>/<points>.<ext>."""
+    questions = {}
+    with os.scandir(root) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            files = {}
+            with os.scandir(entry.path) as category_entries:
+                for file_entry in category_entries:
+                    points = parse_question_filename(file_entry.name) if file_entry.is_file() else None
+                    if points is not None:
+                        files[points] = file_entry.name
+            questions[entry.name] = files
+    return questions
+
+
+class QuestionPack:
+    """A pack opened read-only and memory-mapped.
+
+    files mirrors QuestionCatalog.files (category -> points -> source filename)
+    so the rest of the game can use a pack where it used a directory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a question pack")
+        self.index = json.loads(self._map[index_offset:index_offset + index_length])
+        self.questions = {
+            category: {int(points): entry for points, entry in files.items()}
+            for category, files in self.index["questions"].items()
+        }
+        self.categories = sorted(self.questions)
+        self.files = {category: {points: entry["filename"] for points, entry in files.items()} for category, files in self.questions.items()}
+
+    def entry(self, category, points):
+        return self.questions[category][points]
+
+    def stored(self, ref):
+        return memoryview(self._map)[ref["offset"]:ref["offset"] + ref["length"]]
+
+    def blob(self, ref):
+        """The content of a blob reference, as a zero-copy view unless compressed."""
+        if ref.get("compression") == "zlib":
+            return zlib.decompress(self.stored(ref))
+        return self.stored(ref)
+
+    def text(self, category, points):
+        return bytes(self.blob(self.entry(category, points)["text"])).decode("utf-8")
+
+    def media(self, category, points):
+        """The audio or video file as it was packed."""
+        return bytes(self.blob(self.entry(category, points)["media"]))
+
+    def image(self, category, points, width, height, device_pixel_ratio=1.0):
+        """A QImage of the question fitted to width x height. Uses the stored
+        pixels directly when a pre-scaled size matches, else scales the closest."""
+        variant, wanted = self.image_variant(category, points, width, height)
+        # the QImage keeps a reference to the view, so it stays valid while the pack is open
+        image = QImage(self.blob(variant), variant["width"], variant["height"], variant["bytes_per_line"], FORMATS[variant["format"]])
+        if (variant["width"], variant["height"]) != wanted:
+            image = image.scaled(QSize(*wanted), IGNORE_ASPECT, SMOOTH)
+        image.setDevicePixelRatio(device_pixel_ratio)
+        return image
+
+    def image_variant(self, category, points, width, height):
+        """The stored image that best fits a width x height box: the smallest one
+        at least as large as the aspect-correct fit, else the largest one."""
+        images = self.entry(category, points)["images"]
+        # the same rounding QImage.scaled uses, so a pack built for this box matches exactly
+        fitted = QSize(*self.entry(category, points)["size"]).scaled(QSize(width, height), KEEP_ASPECT)
+        wanted = (fitted.width(), fitted.height())
+        large_enough = [i for i in images if i["width"] >= wanted[0] and i["height"] >= wanted[1]]
+        if large_enough:
+            return min(large_enough, key=lambda i: i["width"] * i["height"]), wanted
+        return max(images, key=lambda i: i["width"] * i["height"]), wanted
+
+    def check(self):
+        """Verify every blob against its hash. Returns a list of problems."""
+        problems = []
+        for category, files in self.questions.items():
+            for points, entry in files.items():
+                for ref in blob_refs(entry):
+                    if sha256(self.stored(ref)) != ref["sha256"]:
+                        problems.append(f"{category}/{points}: stored data does not match its hash")
+        return problems
+
+
+def encode_question(root, category, filename, sizes, compress):
+    """Read one question file and return (index entry, [blob bytes]) with blob
+    references still missing their offsets."""
+    path = os.path.join(root, category, filename)
+    with open(path, "rb") as f:
+        source = f.read()
+    entry = {"filename": filename, "source_sha256": sha256(source)}
+    blobs = []
+    kind = question_kind(filename)
+    if kind == "text":
+        entry["kind"] = "text"
+        data = source.decode("utf-8").encode("utf-8")
+        entry["text"] = {"length": len(data), "sha256": sha256(data)}
+        blobs.append(data)
+        return entry, blobs
+    if kind in MEDIA_KINDS:
+        # already compressed, and decoded by the player, so stored as is
+        entry["kind"] = kind
+        entry["media"] = {"length": len(source), "sha256": sha256(source)}
+        blobs.append(source)
+        return entry, blobs
+
+    image = QImage()
+    if not image.loadFromData(source):
+        raise ValueError(f"{category}/{filename} is not a readable image")
+    format_name = "ARGB32_Premultiplied" if image.hasAlphaChannel() else "RGB32"
+    entry["kind"] = "image"
+    entry["size"] = [image.width(), image.height()]
+    entry["images"] = []
+    seen = set()
+    for width, height in sizes:
+        scaled = image.scaled(QSize(width, height), KEEP_ASPECT, SMOOTH).convertToFormat(FORMATS[format_name])
+        if (scaled.width(), scaled.height()) in seen:
+            continue
+        seen.add((scaled.width(), scaled.height()))
+        pixels = bytes(scaled.constBits())
+        ref = {
+            "width": scaled.width(), "height": scaled.height(), "bytes_per_line": scaled.bytesPerLine(),
+            "format": format_name,
+            "sha256": sha256(pixels),
+        }
+        if compress:
+            pixels = zlib.compress(pixels, 1)
+            ref["compression"] = "zlib"
+            ref["sha256"] = sha256(pixels)
+        ref["length"] = len(pixels)
+        entry["images"].append(ref)
+        blobs.append(pixels)
+    return entry, blobs
+
+
+def build_pack(root, output, sizes, compress=False, workers=4):
+    if not load_qt():
+        raise SystemExit("Building a question pack needs PySide6 to scale the images")
+    questions = scan_questions(root)
+    jobs = [(category, points, filename) for category, files in questions.items() for points, filename in sorted(files.items())]
+    start = time.perf_counter()
+    index = {"version": 1, "source": os.path.abspath(root), "sizes": [list(size) for size in sizes], "questions": {}}
+    temporary = output + ".tmp"
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool, open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+        futures = [pool.submit(encode_question, root, category, filename, sizes, compress) for category, _, filename in jobs]
+        for (category, points, filename), future in zip(jobs, futures):
+            entry, blobs = future.result()
+            for ref, blob in zip(blob_refs(entry), blobs):
+                f.write(b"\0" * (-f.tell() % ALIGN))
+                ref["offset"] = f.tell()
+                f.write(blob)
+            index["questions"].setdefault(category, {})[str(points)] = entry
+        index_bytes = json.dumps(index).encode("utf-8")
+        index_offset = f.tell()
+        f.write(index_bytes)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, index_offset, len(index_bytes)))
+    os.replace(temporary, output)
+    print(f"Packed {len(jobs)} questions from {root} into {output} ({os.path.getsize(output) / 1e6:.1f} MB) in {time.perf_counter() - start:.2f} s")
+
+
+def check_pack(path, source=None):
+    pack = QuestionPack(path)
+    problems = pack.check()
+    if source is not None:
+        on_disk = scan_questions(source)
+        for category, files in on_disk.items():
+            for points, filename in files.items():
+                if points not in pack.questions.get(category, {}):
+                    problems.append(f"{category}/{points}: in {source} but not in the pack")
+                    continue
+                with open(os.path.join(source, category, filename), "rb") as f:
+                    if sha256(f.read()) != pack.entry(category, points)["source_sha256"]:
+                        problems.append(f"{category}/{points}: changed since the pack was built")
+        for category, files in pack.questions.items():
+            for points in files:
+                if points not in on_disk.get(category, {}):
+                    problems.append(f"{category}/{points}: in the pack but no longer in {source}")
+    for problem in problems:
+        print(problem)
+    count = sum(len(files) for files in pack.questions.values())
+    print(f"{path}: {count} questions in {len(pack.categories)} categories, {len(problems)} problems")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and check compiled question packs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack_parser = commands.add_parser("pack", help="Compile a question directory into a pack")
+    pack_parser.add_argument("question_dir")
+    pack_parser.add_argument("output")
+    pack_parser.add_argument("--size", action="append", help="Display box to pre-scale images for, WIDTHxHEIGHT (repeatable)")
+    pack_parser.add_argument("--compress", action="store_true", help="zlib-compress image pixels (smaller file, slower load)")
+    pack_parser.add_argument("--workers", type=int, default=4)
+    check_parser = commands.add_parser("check", help="Verify a pack's hashes, optionally against its source directory")
+    check_parser.add_argument("pack")
+    check_parser.add_argument("--source", help="Question directory the pack should match")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        sizes = [parse_size(size) for size in (args.size or DEFAULT_SIZES)]
+        build_pack(args.question_dir, args.output, sizes, args.compress, args.workers)
+    else:
+        sys.exit(1 if check_pack(args.pack, args.source) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Recorded buzzer sessions: every frame to and from the buzzer server.
+
+jeopardy.py --record-session writes each inbound and outbound websocket frame
+with its monotonic arrival or send time. --replay-session feeds a recording
+back through the client's normal frame path, without a network, at the
+recorded pace or faster, so an incident can be reproduced and a real game's
+traffic can serve as a benchmark workload.
+
+    python jeopardy.py --record-session show.jbuz
+    python jeopardy.py --replay-session show.jbuz --replay-speed 4
+    python session_log.py info show.jbuz
+    python session_log.py dump show.jbuz --direction in
+
+Layout: 8-byte magic, u32 length of a JSON header (url, instance, start
+time), then a zlib stream of records, each a direction byte (0 in, 1 out),
+f64 seconds since the recording started and u32 frame length, followed by
+the frame's UTF-8 text. The stream is sync-flushed about once a second while
+frames arrive, so a recording cut short by a crash is readable up to there.
+"""
+import argparse
+import json
+import struct
+import sys
+import threading
+import time
+import zlib
+
+MAGIC = b"JBUZ\x00\x01\x00\x00"
+META = struct.Struct("<I")
+RECORD = struct.Struct("<BdI")
+INBOUND = 0
+OUTBOUND = 1
+FLUSH_EVERY = 1.0
+
+
+class SessionRecorder:
+    """Appends frames to a recording. Thread-safe; writes are buffered and
+    compressed, so recording costs the hot path little more than a copy."""
+
+    def __init__(self, path, **meta):
+        self.path = path
+        self.frames = 0
+        self._file = open(path, "wb")
+        self._lock = threading.Lock()
+        self._compressor = zlib.compressobj(6)
+        self._start = time.perf_counter()
+        self._last_flush = self._start
+        meta = dict(meta, started=time.time())
+        header = json.dumps(meta).encode("utf-8")
+        self._file.write(MAGIC + META.pack(len(header)) + header)
+
+    def record(self, direction, at, frame):
+        data = frame.encode("utf-8") if isinstance(frame, str) else frame
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(self._compressor.compress(RECORD.pack(direction, at - self._start, len(data)) + data))
+            self.frames += 1
+            if at - self._last_flush >= FLUSH_EVERY:
+                self._flush()
+                self._last_flush = at
+
+    def _flush(self):
+        self._file.write(self._compressor.flush(zlib.Z_SYNC_FLUSH))
+        self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(self._compressor.flush())
+            self._file.close()
+            self._file = None
+
+
+def read_session(path, chunk_size=1 << 16):
+    """(header dict, iterator of (direction, seconds, frame text)). A truncated
+    recording ends at the last complete record."""
+    f = open(path, "rb")
+    if f.read(len(MAGIC)) != MAGIC:
+        f.close()
+        raise ValueError(f"{path} is not a buzzer session recording")
+    meta = json.loads(f.read(META.unpack(f.read(META.size))[0]))
+
+    def records():
+        decompressor = zlib.decompressobj()
+        buffer = b""
+        with f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                try:
+                    buffer += decompressor.decompress(chunk)
+                except zlib.error:
+                    # cut off mid-stream, everything before the damage was already yielded
+                    break
+                offset = 0
+                while len(buffer) - offset >= RECORD.size:
+                    direction, at, length = RECORD.unpack_from(buffer, offset)
+                    end = offset + RECORD.size + length
+                    if end > len(buffer):
+                        break
+                    yield direction, at, buffer[offset + RECORD.size:end].decode("utf-8")
+                    offset = end
+                buffer = buffer[offset:]
+
+    return meta, records()
+
+
+def info(path):
+    meta, records = read_session(path)
+    counts = [0, 0]
+    sizes = [0, 0]
+    kinds = {}
+    last = 0.0
+    for direction, at, frame in records:
+        counts[direction] += 1
+        sizes[direction] += len(frame)
+        last = at
+        if direction == OUTBOUND:
+            kind = json.loads(frame).get("payload", {}).get("kind", "?")
+            kinds[kind] = kinds.get(kind, 0) + 1
+    started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(meta.get("started", 0)))
+    print(f"{path}: {meta.get('url')} instance {meta.get('instance')}, started {started}, {last:.1f} s long")
+    print(f"  in:  {counts[INBOUND]} frames, {sizes[INBOUND] / 1e3:.1f} kB")
+    print(f"  out: {counts[OUTBOUND]} frames, {sizes[OUTBOUND] / 1e3:.1f} kB " + ", ".join(f"{k} {n}" for k, n in sorted(kinds.items())))
+
+
+def dump(path, direction=None):
+    _, records = read_session(path)
+    for record_direction, at, frame in records:
+        if direction is None or record_direction == direction:
+            print(f"{at:10.4f} {'<' if record_direction == INBOUND else '>'} {frame}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect recorded buzzer sessions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info_parser = commands.add_parser("info", help="Duration, frame counts and request kinds")
+    info_parser.add_argument("recording")
+    dump_parser = commands.add_parser("dump", help="Every frame with its time, < inbound, > outbound")
+    dump_parser.add_argument("recording")
+    dump_parser.add_argument("--direction", choices=["in", "out"])
+    args = parser.parse_args()
+    try:
+        if args.command == "info":
+            info(args.recording)
+        else:
+            dump(args.recording, {"in": INBOUND, "out": OUTBOUND, None: None}[args.direction])
+    except BrokenPipeError:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
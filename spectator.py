@@ -0,0 +1,308 @@
+"""Local spectator server: the board, scores and open question for browser displays.
+
+Serves a small display page over HTTP and streams state over a websocket on
+the same port. A display gets the full state when it connects and after that
+only deltas. Updates from the game are merged into one pending delta and sent
+at most every flush_ms, encoded once and broadcast to every display, so the
+cost per update does not grow with the number of displays.
+
+    python jeopardy.py --spectator-port 8080      # then open http://<operator box>:8080/
+
+Messages (JSON):
+
+    {"snapshot": {"categories": [...], "tiles": {category: {points: [state, label]}},
+                  "teams": {team: [name, score]}, "question": question or null}}
+    {"tiles": {category: {points: [state, label] or null}}, "scores": {team: score},
+     "teams": {...}, "categories": [...], "question": ...}   # delta, only changed keys
+
+A question is {"category", "points", "text" or "media", "buzzed": team name or null}.
+/media/<category>/<points> answers only for the question currently shown.
+"""
+import asyncio
+import json
+import logging
+import mimetypes
+import threading
+from http import HTTPStatus
+from urllib.parse import unquote
+
+from websockets.asyncio.server import broadcast, serve
+from websockets.datastructures import Headers
+from websockets.exceptions import ConnectionClosed
+from websockets.http11 import Response
+
+log = logging.getLogger("spectator")
+
+
+class SpectatorServer:
+    """Runs on its own asyncio loop thread; the update methods may be called from any thread."""
+
+    def __init__(self, host="0.0.0.0", port=8080, flush_ms=50, media=None):
+        self.host = host
+        self.port = port
+        self.flush_ms = flush_ms
+        self.media = media  # (category, points) -> (content type, bytes) or None, called on the server thread
+        self.categories = []
+        self.tiles = {}     # category -> points (str) -> [state, label]
+        self.teams = {}     # team -> [name, score]
+        self.question = None
+        self.displays = set()
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self._pending = {}
+        self._flush_handle = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="spectator-server", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    # updates, from any thread
+
+    def set_board(self, categories, tiles):
+        """Replace the whole board: categories in order and {category: {points: (state, label)}}."""
+        tiles = {c: {str(p): list(t) for p, t in points.items()} for c, points in tiles.items()}
+        self._loop.call_soon_threadsafe(self._set_board, list(categories), tiles)
+
+    def update_tile(self, category, points, state, label):
+        self._loop.call_soon_threadsafe(self._update_tile, category, str(points), [state, label])
+
+    def remove_tile(self, category, points):
+        self._loop.call_soon_threadsafe(self._update_tile, category, str(points), None)
+
+    def set_teams(self, teams):
+        """Replace the roster: {team: (name, score)}."""
+        self._loop.call_soon_threadsafe(self._set_teams, {team: list(data) for team, data in teams.items()})
+
+    def update_score(self, team, score):
+        self._loop.call_soon_threadsafe(self._update_score, team, score)
+
+    def set_question(self, question):
+        self._loop.call_soon_threadsafe(self._set_question, question)
+
+    # loop thread
+
+    def _set_board(self, categories, tiles):
+        self.categories = categories
+        self.tiles = tiles
+        self._pending["categories"] = categories
+        self._pending["tiles"] = tiles
+        self._schedule_flush()
+
+    def _update_tile(self, category, points, tile):
+        if tile is None:
+            self.tiles.get(category, {}).pop(points, None)
+            if category in self.categories and not self.tiles.get(category):
+                self.tiles.pop(category, None)
+                self.categories = [c for c in self.categories if c != category]
+                self._pending["categories"] = self.categories
+        else:
+            self.tiles.setdefault(category, {})[points] = tile
+            if category not in self.categories:
+                self.categories = sorted(self.categories + [category])
+                self._pending["categories"] = self.categories
+        self._pending.setdefault("tiles", {}).setdefault(category, {})[points] = tile
+        self._schedule_flush()
+
+    def _set_teams(self, teams):
+        self.teams = teams
+        self._pending["teams"] = teams
+        self._pending.pop("scores", None)
+        self._schedule_flush()
+
+    def _update_score(self, team, score):
+        if team not in self.teams or self.teams[team][1] == score:
+            return
+        self.teams[team][1] = score
+        self._pending.setdefault("scores", {})[team] = score
+        self._schedule_flush()
+
+    def _set_question(self, question):
+        if question == self.question:
+            return
+        self.question = question
+        self._pending["question"] = question
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        # coalesce everything that happens within one window into one message
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.flush_ms / 1000, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        delta, self._pending = self._pending, {}
+        if not delta or not self.displays:
+            return
+        message = json.dumps(delta, separators=(",", ":"))
+        broadcast(self.displays, message)
+        self.sent_messages += 1
+        self.sent_bytes += len(message) * len(self.displays)
+
+    def snapshot(self):
+        return {"snapshot": {"categories": self.categories, "tiles": self.tiles, "teams": self.teams, "question": self.question}}
+
+    # serving
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._serve())
+
+    async def _serve(self):
+        try:
+            async with serve(self._handler, self.host, self.port, process_request=self._process_request, compression=None):
+                log.info("Spectator displays: http://%s:%s/", self.host, self.port)
+                await asyncio.Future()
+        except OSError as e:
+            log.warning("Spectator server could not start on %s:%s: %s", self.host, self.port, e)
+
+    async def _handler(self, websocket):
+        # the snapshot is written before this coroutine yields, so every later broadcast follows it
+        self.displays.add(websocket)
+        try:
+            await websocket.send(json.dumps(self.snapshot(), separators=(",", ":")))
+            await websocket.wait_closed()
+        except ConnectionClosed:
+            pass
+        finally:
+            self.displays.discard(websocket)
+
+    async def _process_request(self, connection, request):
+        path = request.path.split("?")[0]
+        if path == "/ws":
+            return None  # continue with the websocket handshake
+        if path in ("/", "/index.html"):
+            return self._response(HTTPStatus.OK, "text/html; charset=utf-8", DISPLAY_PAGE.encode("utf-8"))
+        if path.startswith("/media/") and self.media is not None:
+            try:
+                category, points = unquote(path[len("/media/"):]).rsplit("/", 1)
+                points = int(points)
+            except ValueError:
+                category = points = None
+            # anyone on the venue network can ask: only the question on screen is served,
+            # an upcoming one must not be fetchable by guessing its URL
+            question = self.question
+            found = None
+            if question is not None and "media" in question and (question["category"], question["points"]) == (category, points):
+                try:
+                    # decoding or re-encoding an image must not hold up the broadcasts
+                    found = await self._loop.run_in_executor(None, self.media, category, points)
+                except KeyError:
+                    found = None
+            if found is not None:
+                content_type, body = found
+                return self._response(HTTPStatus.OK, content_type, body)
+        return self._response(HTTPStatus.NOT_FOUND, "text/plain", b"not found")
+
+    @staticmethod
+    def _response(status, content_type, body):
+        headers = Headers([("Content-Type", content_type), ("Content-Length", str(len(body))), ("Cache-Control", "no-cache")])
+        return Response(status.value, status.phrase, headers, body)
+
+    def summary(self):
+        return f"Spectator server: {len(self.displays)} displays, {self.sent_messages} deltas, {self.sent_bytes / 1024:.1f} KiB sent"
+
+
+def file_media(path):
+    """Content type and bytes of a question file, for SpectatorServer(media=...)."""
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    with open(path, "rb") as f:
+        return content_type, f.read()
+
+
+DISPLAY_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Jeopardy</title>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<style>
+html, body { margin: 0; height: 100%; background: black; color: yellow; font: bold 2.2vh sans-serif; }
+#board { display: grid; gap: 0.6vh; height: 72vh; padding: 0.6vh; box-sizing: border-box; }
+.cell { display: flex; align-items: center; justify-content: center; text-align: center; white-space: pre-line; background: darkblue; overflow: hidden; }
+.header { color: white; }
+.active { background: blue; }
+.answered { background: gray; color: white; font-size: 1.6vh; }
+#teams { display: flex; gap: 0.6vh; height: 26vh; padding: 0 0.6vh; }
+.team { flex: 1; display: flex; flex-direction: column; background: darkblue; color: white; text-align: center; justify-content: center; }
+.team .score { color: yellow; font-size: 5vh; }
+.team.buzzed { background: green; }
+#question { display: none; position: fixed; inset: 0; background: white; color: black; align-items: center; justify-content: center; flex-direction: column; font-size: 4vh; padding: 4vh; text-align: center; }
+#question img { max-width: 90vw; max-height: 75vh; }
+#question .title { font-size: 2.4vh; color: #444; margin-bottom: 2vh; }
+#question .buzzed { margin-top: 2vh; background: green; color: white; padding: 1vh 3vh; }
+</style></head>
+<body><div id="board"></div><div id="teams"></div><div id="question"></div>
+<script>
+let state = {categories: [], tiles: {}, teams: {}, question: null};
+function el(tag, cls, text) { const e = document.createElement(tag); if (cls) e.className = cls; if (text !== undefined) e.textContent = text; return e; }
+function renderBoard() {
+  const board = document.getElementById("board");
+  board.textContent = "";
+  const rows = Math.max(1, ...state.categories.map(c => Object.keys(state.tiles[c] || {}).filter(p => p !== "0").length));
+  board.style.gridTemplateColumns = `repeat(${state.categories.length || 1}, 1fr)`;
+  board.style.gridTemplateRows = `0.6fr repeat(${rows}, 1fr)`;
+  board.style.gridAutoFlow = "column";
+  for (const c of state.categories) {
+    board.appendChild(el("div", "cell header", c));
+    const points = Object.keys(state.tiles[c] || {}).filter(p => p !== "0").sort((a, b) => a - b);
+    for (let i = 0; i < rows; i++) {
+      const tile = state.tiles[c][points[i]];
+      const cell = el("div", "cell", tile ? tile[1] : "");
+      if (tile) { cell.classList.add(tile[0]); cell.id = "tile-" + c + "-" + points[i]; } else cell.style.background = "black";
+      board.appendChild(cell);
+    }
+  }
+}
+function renderTile(c, p) {
+  const cell = document.getElementById("tile-" + c + "-" + p), tile = (state.tiles[c] || {})[p];
+  if (!cell || !tile) return renderBoard();
+  cell.className = "cell " + tile[0];
+  cell.textContent = tile[1];
+}
+function renderTeams() {
+  const teams = document.getElementById("teams");
+  teams.textContent = "";
+  const keys = Object.keys(state.teams).sort((a, b) => parseInt(a.replace("team", "")) - parseInt(b.replace("team", "")));
+  for (const t of keys) {
+    const box = el("div", "team");
+    box.id = "team-" + t;
+    box.appendChild(el("div", "name", state.teams[t][0]));
+    box.appendChild(el("div", "score", state.teams[t][1]));
+    teams.appendChild(box);
+  }
+}
+function renderQuestion() {
+  const q = state.question, box = document.getElementById("question");
+  if (!q) { box.style.display = "none"; return; }
+  box.textContent = "";
+  box.appendChild(el("div", "title", q.category + " " + q.points));
+  if (q.media) { const img = el("img"); img.src = q.media; box.appendChild(img); }
+  else box.appendChild(el("div", "", q.text || ""));
+  if (q.buzzed) box.appendChild(el("div", "buzzed", q.buzzed));
+  box.style.display = "flex";
+}
+function apply(msg) {
+  if (msg.snapshot) { state = msg.snapshot; renderBoard(); renderTeams(); renderQuestion(); return; }
+  if (msg.categories) state.categories = msg.categories;
+  if (msg.teams) { state.teams = msg.teams; renderTeams(); }
+  if (msg.scores) for (const [t, s] of Object.entries(msg.scores)) {
+    if (state.teams[t]) state.teams[t][1] = s;
+    const box = document.querySelector("#team-" + t + " .score"); if (box) box.textContent = s;
+  }
+  if (msg.tiles) {
+    let rebuild = !!msg.categories;
+    for (const [c, points] of Object.entries(msg.tiles)) for (const [p, tile] of Object.entries(points)) {
+      state.tiles[c] = state.tiles[c] || {};
+      if (!(p in state.tiles[c]) || tile === null) rebuild = true;
+      if (tile === null) delete state.tiles[c][p]; else state.tiles[c][p] = tile;
+    }
+    if (rebuild) renderBoard(); else for (const [c, points] of Object.entries(msg.tiles)) for (const p of Object.keys(points)) renderTile(c, p);
+  } else if (msg.categories) renderBoard();
+  if ("question" in msg) { state.question = msg.question; renderQuestion(); }
+}
+function connect() {
+  const ws = new WebSocket((location.protocol === "https:" ? "wss://" : "ws://") + location.host + "/ws");
+  ws.onmessage = e => apply(JSON.parse(e.data));
+  ws.onclose = () => setTimeout(connect, 1000);
+}
+connect();
+</script></body></html>
+"""
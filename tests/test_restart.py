@@ -0,0 +1,51 @@
+"""A restarted game must give every buzzer server team back its own points."""
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+
+import jeopardy
+
+SERVER_TEAMS = [
+    {"uuid": "uuid-red", "name": "Red"},
+    {"uuid": "uuid-green", "name": "Green"},
+    {"uuid": "uuid-blue", "name": "Blue"},
+]
+
+
+def start_room(path, server_teams):
+    room = jeopardy.Room("test", "session")
+    room.engine.open(path, migrate=False, verbose=False)
+    room.initialize_teams_from_server(server_teams)
+    return room
+
+
+def points_by_uuid(room):
+    return {room.team_uuid_map[jeopardy.team_index_of(team)]: data["score"] for team, data in room.teams.items()}
+
+
+def test_restart_maps_teams_by_uuid(tmp_path):
+    app = QApplication.instance() or QApplication([])
+    path = str(tmp_path / "game.db")
+    room = start_room(path, SERVER_TEAMS)
+    red, green = (f"team{room.buzzer_team_map[uuid]}" for uuid in ("uuid-red", "uuid-green"))
+    room.engine.award(red, "History", 500)
+    room.engine.award(green, "Science", 200)
+    room.engine.adjust(green, -100)
+    room.roster_sync.apply(SERVER_TEAMS + [{"uuid": "uuid-late", "name": "Late"}])
+    room.engine.award(f"team{room.buzzer_team_map['uuid-late']}", "Science", 300)
+    before = points_by_uuid(room)
+    room.engine.close()
+
+    # the server lists its teams in another order after the restart, and Blue is gone
+    restarted = start_room(path, [SERVER_TEAMS[1], {"uuid": "uuid-late", "name": "Late"}, SERVER_TEAMS[0]])
+    after = points_by_uuid(restarted)
+    restarted.engine.close()
+    app.processEvents()
+
+    assert before == {"uuid-red": 500, "uuid-green": 100, "uuid-blue": 0, "uuid-late": 300}
+    assert after == before
+    assert restarted.teams[f"team{restarted.buzzer_team_map['uuid-blue']}"].get("away")
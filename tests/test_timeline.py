@@ -0,0 +1,135 @@
+"""Undo, redo and jumps in a game's timeline, with concrete boards and totals."""
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_engine import GameEngine, compute_scores
+
+ROSTER = {f"team{i}": {"name": f"Team {i + 1}", "score": 0} for i in range(3)}
+
+
+def open_engine(path):
+    engine = GameEngine()
+    engine.open(str(path), migrate=False, verbose=False)
+    return engine
+
+
+def board(engine):
+    return {tile: list(entries) for tile, entries in engine.tiles().items()}
+
+
+def assert_totals(engine, expected):
+    assert engine.totals == expected
+    # the running totals must also be what the board adds up to
+    assert compute_scores(engine.state) == expected
+    assert {team: data["score"] for team, data in engine.teams.items()} == expected
+
+
+def test_new_action_after_undo_branches_and_the_old_branch_stays_reachable(tmp_path):
+    engine = open_engine(tmp_path / "game.db")
+    engine.set_teams(ROSTER)
+    engine.award("team0", "A", 100)
+    first = engine.journal.head
+    engine.award("team1", "A", 200)
+    old_branch = engine.journal.head
+
+    assert engine.undo_action()
+    assert_totals(engine, {"team0": 100, "team1": 0, "team2": 0})
+    assert board(engine) == {("A", 100): [("team0", 100)]}
+
+    engine.award("team2", "B", 100)
+    new_branch = engine.journal.head
+    assert not engine.redo_action()  # nothing was recorded after the new action
+    assert_totals(engine, {"team0": 100, "team1": 0, "team2": 100})
+
+    assert engine.undo_action()
+    assert engine.journal.head == first
+    assert_totals(engine, {"team0": 100, "team1": 0, "team2": 0})
+    # redo follows the branch recorded last
+    assert engine.redo_action()
+    assert engine.journal.head == new_branch
+    assert board(engine) == {("A", 100): [("team0", 100)], ("B", 100): [("team2", 100)]}
+
+    assert engine.goto(old_branch)
+    assert_totals(engine, {"team0": 100, "team1": 200, "team2": 0})
+    assert board(engine) == {("A", 100): [("team0", 100)], ("A", 200): [("team1", 200)]}
+
+    # undoing an override puts back what the tile held
+    engine.award("team2", "A", 200, full_points=False, override=True)
+    assert_totals(engine, {"team0": 100, "team1": 0, "team2": 100})
+    assert engine.undo_action()
+    assert_totals(engine, {"team0": 100, "team1": 200, "team2": 0})
+    assert board(engine)[("A", 200)] == [("team1", 200)]
+    assert engine.replay_matches()
+    engine.close()
+
+
+def test_undo_and_redo_after_reopening_the_journal(tmp_path):
+    path = tmp_path / "game.db"
+    engine = open_engine(path)
+    engine.set_teams(ROSTER)
+    engine.award("team0", "A", 100)
+    engine.wrong("team1", "A", 200)
+    engine.award("team2", "A", 200)
+    engine.adjust("team0", 50)
+    engine.award("team1", "A", 100, override=True)
+    assert_totals(engine, {"team0": 50, "team1": -100, "team2": 200})
+    engine.close()
+
+    engine = open_engine(path)
+    assert_totals(engine, {"team0": 50, "team1": -100, "team2": 200})
+    assert engine.undo_action()  # the override: team0 gets the tile back
+    assert_totals(engine, {"team0": 150, "team1": -200, "team2": 200})
+    assert board(engine)[("A", 100)] == [("team0", 100)]
+    assert engine.undo_action()  # the adjustment
+    assert_totals(engine, {"team0": 100, "team1": -200, "team2": 200})
+    assert engine.redo_action()
+    assert_totals(engine, {"team0": 150, "team1": -200, "team2": 200})
+    engine.close()
+
+    # where the timeline stood is journaled too
+    engine = open_engine(path)
+    assert_totals(engine, {"team0": 150, "team1": -200, "team2": 200})
+    assert engine.redo_action()
+    assert_totals(engine, {"team0": 50, "team1": -100, "team2": 200})
+    assert board(engine) == {("A", 100): [("team1", 100)], ("A", 200): [("team1", -200), ("team2", 200)]}
+    assert engine.replay_matches()
+    engine.close()
+
+
+def test_journal_from_before_undo_and_redo(tmp_path):
+    # the schema and events as written before scoring events had a parent
+    path = tmp_path / "game.db"
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE events (seq INTEGER PRIMARY KEY, kind TEXT NOT NULL, data TEXT NOT NULL)")
+    db.execute("CREATE TABLE snapshots (seq INTEGER PRIMARY KEY, state TEXT NOT NULL)")
+    events = [
+        ("teams", {"teams": ROSTER}),
+        ("points", {"category": "A", "score": 100, "team": "team0", "value": 100, "replace": False}),
+        ("rename", {"team": "team1", "name": "Renamed"}),
+        ("points", {"category": "A", "score": 200, "team": "team1", "value": -200, "replace": False}),
+        ("adjust", {"team": "team2", "delta": 100}),
+    ]
+    db.executemany("INSERT INTO events (kind, data) VALUES (?, ?)", [(kind, json.dumps(data)) for kind, data in events])
+    db.commit()
+    db.close()
+
+    engine = open_engine(path)
+    assert_totals(engine, {"team0": 100, "team1": -200, "team2": 100})
+    assert engine.undo_action()
+    assert_totals(engine, {"team0": 100, "team1": -200, "team2": 0})
+    assert engine.undo_action()
+    assert_totals(engine, {"team0": 100, "team1": 0, "team2": 0})
+    assert engine.teams["team1"]["name"] == "Renamed"  # roster changes are not undone
+    assert engine.redo_action()
+    assert engine.redo_action()
+    assert_totals(engine, {"team0": 100, "team1": -200, "team2": 100})
+    assert not engine.redo_action()
+    assert engine.undo_action() and engine.undo_action() and engine.undo_action()
+    assert_totals(engine, {"team0": 0, "team1": 0, "team2": 0})
+    assert not engine.undo_action()
+    assert engine.replay_matches()
+    engine.close()